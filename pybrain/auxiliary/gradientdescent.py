@@ -4,6 +4,7 @@ __author__ = ('Thomas Rueckstiess, ruecksti@in.tum.de'
 
 from scipy import zeros, asarray, sign, array, cov, dot, clip, ndarray
 from scipy.linalg import inv
+from numpy import multiply, divide, subtract, sqrt, greater, less, copyto
 
 
 class GradientDescent(object):
@@ -34,21 +35,47 @@ class GradientDescent(object):
         self.etaminus = 0.5
         self.lastgradient = None
 
+        # --- adaptive learning rates ---
+        # one of 'adam', 'adagrad' and 'rmsprop' scales the step of each
+        # parameter by its history of gradients (None = disabled)
+        self.adaptive = None
+        # decay of the first and second moment estimates of Adam (0.9, 0.999)
+        self.beta1 = 0.9
+        self.beta2 = 0.999
+        # decay of the mean squared gradient of RMSProp (0.9)
+        self.rmsdecay = 0.9
+        # added to the root mean squared gradients (1e-8)
+        self.epsilon = 1e-8
+
+        # update the array given to init() itself instead of a copy
+        self.inplace = False
+
     def init(self, values):
         """ call this to initialize data structures *after* algorithm to use
         has been selected
 
         :arg values: the list (or array) of parameters to perform gradient descent on
-                       (will be copied, original not modified)
+                       (will be copied, original not modified, unless `inplace` is set)
         """
         assert isinstance(values, ndarray)
-        self.values = values.copy()
+        assert not (self.rprop and self.adaptive), "RProp cannot be combined with adaptive learning rates."
+        assert self.adaptive in (None, 'adam', 'adagrad', 'rmsprop'), \
+            "Unknown adaptive method %s." % self.adaptive
+        self.values = values if self.inplace else values.copy()
+        # all state is allocated here, the steps do not allocate any arrays
+        self._buffer = zeros(len(values))
+        self.momentumvector = None
+        self.lastgradient = None
         if self.rprop:
             self.lastgradient = zeros(len(values), dtype='float64')
             self.rprop_theta = self.lastgradient + self.deltanull
-            self.momentumvector = None
+            self._increase = zeros(len(values), dtype=bool)
+            self._decrease = zeros(len(values), dtype=bool)
+        elif self.adaptive:
+            self.firstmoment = zeros(len(values))
+            self.secondmoment = zeros(len(values))
+            self.steps = 0
         else:
-            self.lastgradient = None
             self.momentumvector = zeros(len(values))
 
     def __call__(self, gradient, error=None):
@@ -56,34 +83,72 @@ class GradientDescent(object):
         # check if gradient has correct dimensionality, then make array """
         assert len(gradient) == len(self.values)
         gradient_arr = asarray(gradient)
+        buf = self._buffer
 
         if self.rprop:
             rprop_theta = self.rprop_theta
 
             # update parameters
-            self.values += sign(gradient_arr) * rprop_theta
+            sign(gradient_arr, out=buf)
+            buf *= rprop_theta
+            self.values += buf
 
             # update rprop meta parameters
-            dirSwitch = self.lastgradient * gradient_arr
-            rprop_theta[dirSwitch > 0] *= self.etaplus
-            idx =  dirSwitch < 0
-            rprop_theta[idx] *= self.etaminus
-            gradient_arr[idx] = 0
+            dirSwitch = multiply(self.lastgradient, gradient_arr, out=buf)
+            greater(dirSwitch, 0, out=self._increase)
+            less(dirSwitch, 0, out=self._decrease)
+            multiply(rprop_theta, self.etaplus, out=rprop_theta, where=self._increase)
+            multiply(rprop_theta, self.etaminus, out=rprop_theta, where=self._decrease)
 
             # upper and lower bound for both matrices
-            rprop_theta = rprop_theta.clip(min=self.deltamin, max=self.deltamax)
-
-            # save current gradients to compare with in next time step
-            self.lastgradient = gradient_arr.copy()
-
-            self.rprop_theta = rprop_theta
+            clip(rprop_theta, self.deltamin, self.deltamax, out=rprop_theta)
+
+            # save current gradients to compare with in next time step, where
+            # the direction switched they do not count
+            copyto(self.lastgradient, gradient_arr)
+            self.lastgradient[self._decrease] = 0
+
+        elif self.adaptive:
+            m = self.firstmoment
+            v = self.secondmoment
+            if self.adaptive == 'adam':
+                self.steps += 1
+                m *= self.beta1
+                multiply(gradient_arr, 1 - self.beta1, out=buf)
+                m += buf
+                v *= self.beta2
+                multiply(gradient_arr, gradient_arr, out=buf)
+                buf *= 1 - self.beta2
+                v += buf
+                # correct the bias of the moments towards zero
+                correction = (1 - self.beta2 ** self.steps) ** 0.5
+                rate = self.alpha * correction / (1 - self.beta1 ** self.steps)
+                sqrt(v, out=buf)
+                buf += self.epsilon * correction
+                divide(m, buf, out=buf)
+            else:
+                if self.adaptive == 'rmsprop':
+                    v *= self.rmsdecay
+                    multiply(gradient_arr, gradient_arr, out=buf)
+                    buf *= 1 - self.rmsdecay
+                    v += buf
+                else:
+                    multiply(gradient_arr, gradient_arr, out=buf)
+                    v += buf
+                rate = self.alpha
+                sqrt(v, out=buf)
+                buf += self.epsilon
+                divide(gradient_arr, buf, out=buf)
+            buf *= rate
+            self.values += buf
+            self.alpha *= self.alphadecay
 
         else:
             # update momentum vector (momentum = 0 clears it)
             self.momentumvector *= self.momentum
 
             # update parameters (including momentum)
-            self.momentumvector += self.alpha * gradient_arr
+            self.momentumvector += multiply(gradient_arr, self.alpha, out=buf)
             self.alpha *= self.alphadecay
 
             # update parameters
@@ -122,52 +187,66 @@ class NaturalGradient(object):
 
 
 class IRpropPlus(object):
+    """ iRprop+, RProp with weight backtracking (Igel & Huesken, 2003).
 
-    def __init__(self, upfactor=1.1, downfactor=0.9, bound=0.5):
+        Like GradientDescent, the gradient is expected to point in the
+        direction in which the parameters improve. Each parameter moves by its
+        own step width in the direction of the sign of its derivative. The
+        step width grows by `upfactor` while the sign stays the same and
+        shrinks by `downfactor` when it changes, staying between `deltamin`
+        and `bound`. If the sign changes while the error has increased, the
+        last step of that parameter is taken back.
+
+        All state is allocated by init(), the steps do not allocate any
+        arrays. With `inplace` set, the array given to init() is updated
+        instead of a copy. """
+
+    def __init__(self, upfactor=1.2, downfactor=0.5, bound=50., deltamin=1e-6, delta0=0.1):
         self.upfactor = upfactor
         self.downfactor = downfactor
         if not bound > 0:
             raise ValueError("bound greater than 0 needed.")
+        self.bound = bound
+        self.deltamin = deltamin
+        self.delta0 = delta0
+        self.inplace = False
 
     def init(self, values):
-        self.values = values.copy()
-        self.prev_values = values.copy()
-        self.more_prev_values = values.copy()
+        self.values = values if self.inplace else values.copy()
         self.previous_gradient = zeros(values.shape)
-        self.step = zeros(values.shape)
-        self.previous_error = float("-inf")
+        self.step = zeros(values.shape) + self.delta0
+        self.last_update = zeros(values.shape)
+        self.previous_error = float("inf")
+        self._buffer = zeros(values.shape)
+        self._same = zeros(values.shape, dtype=bool)
+        self._switched = zeros(values.shape, dtype=bool)
 
     def __call__(self, gradient, error):
-        products = self.previous_gradient * gradient
-        signs = sign(gradient)
-
-        # For positive gradient parts.
-        positive = (products > 0).astype('int8')
-        pos_step = self.step * self.upfactor * positive
-        clip(pos_step, -self.bound, self.bound)
-        pos_update = self.values - signs * pos_step
-
-        # For negative gradient parts.
-        negative = (products < 0).astype('int8')
-        neg_step = self.step * self.downfactor * negative
-        clip(neg_step, -self.bound, self.bound)
-        if error <= self.previous_error:
-            # If the error has decreased, do nothing.
-            neg_update = zeros(gradient.shape)
-        else:
-            # If it has increased, move back 2 steps.
-            neg_update = self.more_prev_values
-        # Set all negative gradients to zero for the next step.
-        gradient *= positive
-
-        # Bookkeeping.
-        self.previous_gradient = gradient
-        self.more_prev_values = self.prev_values
-        self.prev_values = self.values.copy()
+        gradient = asarray(gradient)
+        buf = self._buffer
+        same = self._same
+        switched = self._switched
+        multiply(self.previous_gradient, gradient, out=buf)
+        greater(buf, 0, out=same)
+        less(buf, 0, out=switched)
+
+        # adapt the step widths
+        multiply(self.step, self.upfactor, out=self.step, where=same)
+        multiply(self.step, self.downfactor, out=self.step, where=switched)
+        clip(self.step, self.deltamin, self.bound, out=self.step)
+
+        # step along the signs of the derivatives, except where they switched
+        sign(gradient, out=buf)
+        buf *= self.step
+        buf[switched] = 0
+        if error > self.previous_error:
+            # take back the last step where the sign switched
+            subtract(buf, self.last_update, out=buf, where=switched)
+        self.values += buf
+        copyto(self.last_update, buf)
+
+        # a switched sign does not count for the next step
+        copyto(self.previous_gradient, gradient)
+        self.previous_gradient[switched] = 0
         self.previous_error = error
-
-        # Updates.
-        self.step[:] = pos_step + neg_step
-        self.values[:] = positive * pos_update + negative * neg_update
-
         return self.values
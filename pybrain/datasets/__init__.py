@@ -4,4 +4,7 @@ from pybrain.datasets.supervised import SupervisedDataSet
 from pybrain.datasets.unsupervised import UnsupervisedDataSet
 from pybrain.datasets.importance import ImportanceDataSet
 from pybrain.datasets.reinforcement import ReinforcementDataSet
-from pybrain.datasets.classification import ClassificationDataSet, SequenceClassificationDataSet
\ No newline at end of file
+from pybrain.datasets.classification import ClassificationDataSet, SequenceClassificationDataSet
+from pybrain.datasets.streaming import StreamingDataSet
+from pybrain.datasets.batchloader import BatchLoader
+from pybrain.datasets.shared import SharedDataSet
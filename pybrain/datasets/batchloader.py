@@ -0,0 +1,120 @@
+from threading import Thread, Event
+from queue import Queue, Empty, Full
+from numpy import take, empty
+from numpy.random import permutation
+
+
+class BatchLoader(object):
+    """Iterable yielding minibatches of linked dataset fields.
+
+    Every batch is a tuple with one array per linked field of the dataset,
+    e.g. (input, target) for a SupervisedDataSet or (input, target,
+    importance) for an ImportanceDataSet. The rows of the batches correspond
+    to each other. Upcoming batches are assembled on a background thread, so
+    that the consumer does not wait for the gathering and copying of the data.
+
+    Batches are formed from single rows; sequence boundaries of sequential
+    datasets are not respected."""
+
+    # sentinel marking the end of an epoch in the prefetch queue
+    _done = object()
+
+    def __init__(self, dataset, batchsize, shuffle=True, contiguous=True,
+                 prefetch=2, fields=None, droplast=False):
+        """
+        :arg dataset: the dataset to draw the batches from
+        :arg batchsize: number of rows per batch
+        :key shuffle: draw the rows in a new random order on every pass (True)
+        :key contiguous: return every batch as freshly gathered C-contiguous
+             arrays. Otherwise unshuffled batches are views on the fields,
+             without any copying. (True)
+        :key prefetch: number of batches assembled ahead of time on a
+             background thread, 0 assembles them on demand. (2)
+        :key fields: names of the fields to return, defaults to the linked
+             fields of the dataset
+        :key droplast: skip the last batch, if it has less than `batchsize`
+             rows (False)
+        """
+        assert batchsize > 0
+        self.dataset = dataset
+        self.batchsize = batchsize
+        self.shuffle = shuffle
+        self.contiguous = contiguous
+        self.prefetch = prefetch
+        self.fields = list(dataset.link) if fields is None else list(fields)
+        self.droplast = droplast
+
+    def __len__(self):
+        """Return the number of batches per pass."""
+        full, rest = divmod(len(self.dataset), self.batchsize)
+        return full if (self.droplast or rest == 0) else full + 1
+
+    def _indices(self):
+        """Yield the row selection of every batch of one pass: slices for
+        sequential access, index arrays otherwise."""
+        length = len(self.dataset)
+        stops = range(self.batchsize, length + self.batchsize, self.batchsize)
+        if self.shuffle:
+            perm = permutation(length)
+        for start, stop in zip(range(0, length, self.batchsize), stops):
+            stop = min(stop, length)
+            if self.droplast and stop - start < self.batchsize:
+                break
+            yield perm[start:stop] if self.shuffle else slice(start, stop)
+
+    def _assemble(self, rows):
+        arrays = [self.dataset.data[f] for f in self.fields]
+        if isinstance(rows, slice):
+            if not self.contiguous:
+                return tuple(a[rows] for a in arrays)
+            return tuple(a[rows].copy() for a in arrays)
+        batch = []
+        for a in arrays:
+            out = empty((len(rows),) + a.shape[1:], dtype=a.dtype)
+            take(a, rows, axis=0, out=out)
+            batch.append(out)
+        return tuple(batch)
+
+    def _produce(self, queue, stop):
+        try:
+            for rows in self._indices():
+                batch = self._assemble(rows)
+                while not stop.is_set():
+                    try:
+                        queue.put(batch, timeout=0.1)
+                        break
+                    except Full:
+                        continue
+                if stop.is_set():
+                    return
+            queue.put(self._done)
+        except Exception as e:
+            queue.put(e)
+
+    def __iter__(self):
+        if self.prefetch <= 0:
+            for rows in self._indices():
+                yield self._assemble(rows)
+            return
+        queue = Queue(maxsize=self.prefetch)
+        stop = Event()
+        worker = Thread(target=self._produce, args=(queue, stop))
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                batch = queue.get()
+                if batch is self._done:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            # the consumer might stop early: release the worker
+            stop.set()
+            while worker.is_alive():
+                try:
+                    queue.get(timeout=0.1)
+                except Empty:
+                    pass
+            worker.join()
@@ -2,9 +2,80 @@ from __future__ import print_function
 
 __author__ = "Martin Felder, felder@in.tum.de"
 
-from numpy import zeros, where, ravel, r_, single
+from numpy import zeros, where, ravel, r_, single, array, arange, full, integer
 from numpy.random import permutation
 from pybrain.datasets import SupervisedDataSet, SequentialDataSet
+from pybrain.datasets.libsvmformat import readLibsvm
+
+
+class OneOfManyTargets(object):
+    """Compact 1-of-k representation of an array of class numbers.
+
+    Only the class numbers are stored. A row is expanded into a vector of
+    length `nClasses`, holding the membership bound at the position of its
+    class and the non-membership bound elsewhere, when it is accessed.
+    Indexing with a slice or an index array returns another compact view,
+    while `toarray()` (or `array()`) yields the dense representation."""
+
+    ndim = 2
+
+    def __init__(self, classes, nClasses, bounds=(0, 1)):
+        self.classes = ravel(classes)
+        self.nClasses = nClasses
+        self.bounds = tuple(bounds)
+
+    @property
+    def shape(self):
+        return len(self.classes), self.nClasses
+
+    @property
+    def dtype(self):
+        return array(self.bounds).dtype
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __getitem__(self, index):
+        rest = ()
+        if isinstance(index, tuple):
+            index, rest = index[0], index[1:]
+        if isinstance(index, (int, integer)):
+            row = full(self.nClasses, self.bounds[0], dtype=self.dtype)
+            row[int(self.classes[index])] = self.bounds[1]
+            return row[rest] if rest else row
+        view = OneOfManyTargets(self.classes[index], self.nClasses, self.bounds)
+        if all(isinstance(r, slice) and r == slice(None) for r in rest):
+            return view
+        return view.toarray()[(slice(None),) + rest]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __array__(self, dtype=None):
+        dense = self.toarray()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def toarray(self):
+        """Return the dense (n, nClasses) array."""
+        dense = full(self.shape, self.bounds[0], dtype=self.dtype)
+        dense[arange(len(self)), self.classes.astype(int)] = self.bounds[1]
+        return dense
+
+    def astype(self, dtype):
+        return self.toarray().astype(dtype)
+
+    def tolist(self):
+        return self.toarray().tolist()
+
+    def copy(self):
+        return OneOfManyTargets(self.classes.copy(), self.nClasses, self.bounds)
+
+    def argmax(self, axis=None, out=None):
+        if axis in (1, -1) and self.bounds[1] > self.bounds[0]:
+            return self.classes.astype(int)
+        return self.toarray().argmax(axis, out)
+
 
 class ClassificationDataSet(SupervisedDataSet):
     """ Specialized data set for classification data. Classes are to be numbered from 0 to nb_classes-1. """
@@ -42,42 +113,15 @@ class ClassificationDataSet(SupervisedDataSet):
         return cls(d.data[:, 0], d.data[:, 1:])
 
     @classmethod
-    def load_libsvm(cls, f):
+    def load_libsvm(cls, f, sparse=False, nfeatures=None):
         """Create a dataset by reading a sparse LIBSVM/SVMlight format file
-        (with labels only)."""
-        nFeat = 0
-        # find max. number of features
-        for line in f:
-            n = int(line.split()[-1].split(':')[0])
-            if n > nFeat:
-                nFeat = n
-        f.seek(0)
-        labels = []
-        features = []
-        # read all data
-        for line in f:
-            # format is:
-            # <class>  <featnr>:<featval>  <featnr>:<featval> ...
-            # (whereby featnr starts at 1)
-            if not line: break
-            line = line.split()
-            label = int(line[0])
-            feat = []
-            nextidx = 1
-            for r in line[1:]:
-                # construct list of features, taking care of sparsity
-                (idx, val) = r.split(':')
-                idx = int(idx)
-                for _ in range(nextidx, idx):
-                    feat.append(0.0)
-                feat.append(float(val))
-                nextidx = idx + 1
-            for _ in range(nextidx, nFeat + 1):
-                feat.append(0.0)
-            features.append(feat[:])    # [:] causes copy
-            labels.append([label])
-
-        DS = cls(features, labels)
+        (with labels only).
+
+        If `sparse` is set, the input field is kept as a scipy.sparse CSR
+        matrix, otherwise a dense array is built. The number of features is
+        determined from the file unless given as `nfeatures`."""
+        features, labels = readLibsvm(f, nfeatures=nfeatures, sparse=sparse)
+        DS = cls(features, labels.astype(int).reshape(-1, 1))
         return DS
 
     def __add__(self, other):
@@ -127,21 +171,27 @@ class ClassificationDataSet(SupervisedDataSet):
         except IndexError:
             print("error: classes not defined yet!")
 
-    def _convertToOneOfMany(self, bounds=(0, 1)):
+    def _convertToOneOfMany(self, bounds=(0, 1), compact=False):
         """Converts the target classes to a 1-of-k representation, retaining the
         old targets as a field `class`.
 
         To supply specific bounds, set the `bounds` parameter, which consists of
-        target values for non-membership and membership."""
+        target values for non-membership and membership.
+
+        If `compact` is set, the target field becomes a `OneOfManyTargets` view
+        on the class field, which expands rows only when they are accessed
+        instead of storing `nClasses` values per sample."""
         if self.outdim != 1:
             # we already have the correct representation (hopefully...)
             return
         if self.nClasses <= 0:
             self.calculateStatistics()
         oldtarg = self.getField('target')
-        newtarg = zeros([len(self), self.nClasses], dtype='Int32') + bounds[0]
-        for i in range(len(self)):
-            newtarg[i, int(oldtarg[i])] = bounds[1]
+        if compact:
+            newtarg = OneOfManyTargets(oldtarg, self.nClasses, bounds)
+        else:
+            newtarg = zeros([len(self), self.nClasses], dtype=array(bounds).dtype) + bounds[0]
+            newtarg[arange(len(self)), ravel(oldtarg).astype(int)] = bounds[1]
         self.setField('target', newtarg)
         self.setField('class', oldtarg)
         # probably better not to link field, otherwise there may be confusion
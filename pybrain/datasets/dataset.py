@@ -1,11 +1,15 @@
 
 
+from __future__ import print_function
+
 __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
 import random
 import pickle
 from itertools import chain
 from scipy import zeros, resize, ravel, asarray
+from numpy import ndarray
+from scipy.sparse import issparse
 import scipy
 
 from pybrain.utilities import Serializable
@@ -20,7 +24,17 @@ class DataSet(Serializable):
     """DataSet is a general base class for other data set classes
     (e.g. SupervisedDataSet, SequentialDataSet, ...). It consists of several
     fields. A field is a NumPy array with a label (a string) attached to it.
-    Fields can be linked together which means they must have the same length."""
+    Fields can be linked together which means they must have the same length.
+
+    Fields grow by reallocation when rows are appended. The new number of rows
+    is `growthFactor` times the old one (plus one), plus `growthIncrement`;
+    set these on the class or an instance to trade reallocations for slack.
+    The slack can be reported with memoryReport() and released with
+    shrinkToFit()."""
+
+    # growth policy of the field arrays
+    growthFactor = 2
+    growthIncrement = 0
 
     def __init__(self):
         self.data = {}
@@ -113,8 +127,12 @@ class DataSet(Serializable):
         self.endmarker[label] = 0
 
     def setField(self, label, arr):
-        """Set the given array `arr` as the new array of field `label`,"""
-        as_arr = asarray(arr)
+        """Set the given array `arr` as the new array of field `label`,
+
+        Sparse matrices (e.g. in CSR format) and other array-likes providing a
+        `toarray` method are stored as they are. Such fields can be read and
+        sliced, but appending to them converts them into dense arrays."""
+        as_arr = arr if hasattr(arr, 'toarray') else asarray(arr)
         self.data[label] = as_arr
         self.endmarker[label] = as_arr.shape[0]
 
@@ -182,9 +200,13 @@ class DataSet(Serializable):
 
     def _resizeArray(self, a):
         """Increase the buffer size. It should always be one longer than the
-        current sequence length and double on every growth step."""
+        current sequence length and grow by `growthFactor` (doubling by
+        default) and `growthIncrement` on every growth step."""
+        if hasattr(a, 'toarray'):
+            a = a.toarray()
         shape = list(a.shape)
-        shape[0] = (shape[0] + 1) * 2
+        shape[0] = max(shape[0] + 1,
+                       int((shape[0] + 1) * self.growthFactor) + self.growthIncrement)
         return resize(a, shape)
 
     def _appendUnlinked(self, label, row):
@@ -301,13 +323,43 @@ class DataSet(Serializable):
             obj.setField(key, val)
         return obj
 
+    def memoryReport(self, verbose=False):
+        """Return a dictionary mapping every field to a tuple of the number of
+        bytes used by its rows and the number of bytes allocated for it.
+
+        If `verbose` is set, a table with the fields and the total is printed
+        as well."""
+        report = {}
+        for label, arr in self.data.items():
+            if issparse(arr):
+                used = allocated = arr.data.nbytes + arr.indices.nbytes + arr.indptr.nbytes
+            elif hasattr(arr, 'classes'):
+                # compact 1-of-k targets only hold the class numbers
+                used = allocated = arr.classes.nbytes
+            else:
+                allocated = arr.nbytes
+                used = allocated // arr.shape[0] * self.endmarker[label] if arr.shape[0] else 0
+            report[label] = (used, allocated)
+        if verbose:
+            print('%-20s %14s %14s' % ('field', 'used', 'allocated'))
+            for label in sorted(report):
+                print('%-20s %14d %14d' % ((label,) + report[label]))
+            print('%-20s %14d %14d' % ('total',
+                                       sum(u for u, _ in report.values()),
+                                       sum(a for _, a in report.values())))
+        return report
+
+    def shrinkToFit(self):
+        """Release the rows allocated beyond the end of every field."""
+        for label, arr in self.data.items():
+            if isinstance(arr, ndarray) and arr.shape[0] > self.endmarker[label]:
+                self.data[label] = arr[:self.endmarker[label]].copy()
+
     def save_pickle(self, flo, protocol=0, compact=False):
         """Save data set as pickle, removing empty space if desired."""
         if compact:
             # remove padding of zeros for each field
-            for field in self.getFieldNames():
-                temp = self[field][0:self.endmarker[field] + 1, :]
-                self.setField(field, temp)
+            self.shrinkToFit()
         Serializable.save_pickle(self, flo, protocol)
 
     def __reduce__(self):
@@ -359,7 +411,9 @@ class DataSet(Serializable):
 
     def randomBatches(self, label, n):
         """Like .batches(), but the order is random."""
-        permutation = random.shuffle(list(range(len(self))))
+        # one entry per batch, random.shuffle works in place
+        permutation = list(range(-(-len(self) // n)))
+        random.shuffle(permutation)
         return self.batches(label, n, permutation)
 
     def replaceNansByMeans(self):
@@ -32,6 +32,12 @@ class ImportanceDataSet(SequentialDataSet):
             importance = ones(len(target))
         self.appendLinked(inp, target, importance)
 
+    def _evaluateBatch(self, module):
+        """ return the importance-ponderated error of all samples at once. """
+        importance = self.getField('importance')
+        error = self.getField('target') - module.activateBatch(self.getField('input'))
+        return 0.5 * (importance * error ** 2).sum(), importance.sum()
+
     def _evaluateSequence(self, f, seq, verbose = False):
         """ return the importance-ponderated MSE over one sequence. """
         totalError = 0
@@ -0,0 +1,84 @@
+"""Fast reader for data files in the sparse LIBSVM/SVMlight format:
+
+    <label> <index>:<value> <index>:<value> ...
+
+Feature indices start at 1. The file is parsed in chunks of lines, and each
+chunk is converted by a handful of vectorized operations instead of looping
+over the single entries in Python."""
+
+import re
+from itertools import islice
+
+from numpy import array, zeros, ones, cumsum, concatenate, repeat, arange, empty
+from scipy.sparse import csr_matrix
+
+
+_qid = re.compile(r'\bqid:\S+')
+
+
+def _parseChunk(lines):
+    """Return the labels, the number of entries per row, the (0-based)
+    feature indices and the values for a list of lines."""
+    lines = [l.split('#', 1)[0] for l in lines]
+    lines = [l for l in lines if l.strip()]
+    if not lines:
+        return zeros(0), zeros(0, dtype=int), zeros(0, dtype=int), zeros(0)
+    text = ' '.join(lines)
+    if 'qid:' in text:
+        lines = [_qid.sub('', l) for l in lines]
+        text = ' '.join(lines)
+    counts = array([l.count(':') for l in lines], dtype=int)
+    tokens = array(text.replace(':', ' ').split(), dtype=float)
+    # every line contributes its label followed by index/value pairs
+    starts = concatenate([[0], cumsum(1 + 2 * counts)[:-1]])
+    labels = tokens[starts]
+    ispair = ones(len(tokens), dtype=bool)
+    ispair[starts] = False
+    pairs = tokens[ispair]
+    indices = pairs[0::2].astype(int) - 1
+    values = pairs[1::2]
+    return labels, counts, indices, values
+
+
+def readLibsvm(f, nfeatures=None, sparse=False, chunksize=10000):
+    """Read a file in LIBSVM/SVMlight format and return a pair of the input
+    matrix and an array of the labels.
+
+    :arg f: file name or file-like object
+    :key nfeatures: number of features; determined from the largest index
+         occurring in the file if not given
+    :key sparse: if True, the inputs are returned as a scipy.sparse CSR matrix,
+         otherwise as a dense array
+    :key chunksize: number of lines that are converted at once
+    """
+    if isinstance(f, str):
+        with open(f, 'r') as fp:
+            return readLibsvm(fp, nfeatures, sparse, chunksize)
+    labels, counts, indices, values = [], [], [], []
+    while True:
+        lines = list(islice(f, chunksize))
+        if not lines:
+            break
+        for store, part in zip((labels, counts, indices, values), _parseChunk(lines)):
+            store.append(part)
+    if not labels:
+        return zeros((0, nfeatures or 0)), zeros(0)
+    labels = concatenate(labels)
+    counts = concatenate(counts)
+    indices = concatenate(indices)
+    values = concatenate(values)
+    if nfeatures is None:
+        nfeatures = int(indices.max()) + 1 if len(indices) else 0
+    nrows = len(labels)
+    if sparse:
+        indptr = empty(nrows + 1, dtype=int)
+        indptr[0] = 0
+        cumsum(counts, out=indptr[1:])
+        inputs = csr_matrix((values, indices, indptr), shape=(nrows, nfeatures))
+        # libsvm files may contain entries in any order or explicit zeros
+        inputs.sum_duplicates()
+        inputs.eliminate_zeros()
+    else:
+        inputs = zeros((nrows, nfeatures))
+        inputs[repeat(arange(nrows), counts), indices] = values
+    return inputs, labels
@@ -39,7 +39,7 @@ class SequentialDataSet(SupervisedDataSet):
     def _getSequenceField(self, index, field):
         """Return a sequence of one single field given by `field` and indexed by
         `index`."""
-        seq = ravel(self.getField('sequence_index'))
+        seq = ravel(self.getField('sequence_index')).astype(int)
         if len(seq) == index + 1:
             # user wants to access the last sequence, return until end of data
             return self.getField(field)[seq[index]:]
@@ -67,7 +67,7 @@ class SequentialDataSet(SupervisedDataSet):
         sequence `index`, False otherwise.
 
         Mostly used like .endOfData() with while loops."""
-        seq = ravel(self.getField('sequence_index'))
+        seq = ravel(self.getField('sequence_index')).astype(int)
         if len(seq) == index + 1:
             # user wants to access the last sequence, return until end of data
             return self.endOfData()
@@ -86,7 +86,7 @@ class SequentialDataSet(SupervisedDataSet):
 
     def getCurrentSequence(self):
         """Return the current sequence, according to the marker position."""
-        seq = ravel(self.getField('sequence_index'))
+        seq = ravel(self.getField('sequence_index')).astype(int)
         return len(seq) - sum(seq > self.index) - 1
 
     def getNumSequences(self):
@@ -98,7 +98,7 @@ class SequentialDataSet(SupervisedDataSet):
         """Return the length of the given sequence. If `index` is pointing
         to the last sequence, the sequence is considered to go until the end
         of the dataset."""
-        seq = ravel(self.getField('sequence_index'))
+        seq = ravel(self.getField('sequence_index')).astype(int)
         if len(seq) == index + 1:
             # user wants to access the last sequence, return until end of data
             return int(self.getLength() - seq[index])
@@ -177,6 +177,12 @@ class SequentialDataSet(SupervisedDataSet):
         and return the MSE (potentially average over a number of epochs)."""
         res = 0.
         for dummy in range(averageOver):
+            if module._batchable() and not args.get('verbose'):
+                # the sequences need not be fed one by one
+                totalError, ponderation = self._evaluateBatch(module)
+                assert ponderation > 0
+                res += totalError / ponderation
+                continue
             ponderation = 0.
             totalError = 0
             for seq in self._provideSequences():
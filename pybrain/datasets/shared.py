@@ -0,0 +1,101 @@
+from copy import deepcopy
+
+from numpy import ndarray
+
+from pybrain.datasets.streaming import StreamingDataSet
+
+
+class SharedDataSet(object):
+    """Handle to a dataset whose fields are published in shared memory.
+
+    The rows of every array field are copied once into a shared memory block.
+    The handle itself is small when pickled: it carries the names, shapes and
+    dtypes of the blocks and the remaining attributes of the dataset, so it
+    can be sent to any number of worker processes cheaply. There, attach()
+    reconstructs a dataset of the original class whose fields are read-only
+    arrays on the shared blocks, without copying.
+
+    Fields that are no plain arrays (e.g. sparse matrices) are pickled along
+    with the handle.
+
+    The process that published the dataset owns the blocks and has to free
+    them with unlink() (or by using the handle as a context manager) once the
+    workers are done."""
+
+    def __init__(self, dataset):
+        """Publish the fields of `dataset` into shared memory."""
+        from multiprocessing.shared_memory import SharedMemory
+        if isinstance(dataset, StreamingDataSet):
+            raise TypeError("A StreamingDataSet does not hold its data, it cannot be shared.")
+        self.cls = dataset.__class__
+        self.vectorformat = dataset.vectorformat
+        # everything except the fields, the bound conversion method and the
+        # blocks of a dataset that is attached itself
+        self.attributes = dict((k, v) for k, v in dataset.__dict__.items()
+                               if k not in ('data', '_convert', '_sharedsegments'))
+        self.fields = {}
+        self.other = {}
+        self._segments = {}
+        for label, arr in dataset.data.items():
+            if not isinstance(arr, ndarray):
+                self.other[label] = arr
+                continue
+            rows = arr[:dataset.endmarker[label]]
+            shm = SharedMemory(create=True, size=max(rows.nbytes, 1))
+            view = ndarray(rows.shape, dtype=rows.dtype, buffer=shm.buf)
+            view[...] = rows
+            self.fields[label] = (shm.name, rows.shape, rows.dtype.str)
+            self._segments[label] = shm
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_segments'] = {}
+        return state
+
+    def _segment(self, label):
+        from multiprocessing.shared_memory import SharedMemory
+        if label not in self._segments:
+            name = self.fields[label][0]
+            try:
+                # do not let this process' resource tracker remove the block
+                self._segments[label] = SharedMemory(name=name, track=False)
+            except TypeError:
+                self._segments[label] = SharedMemory(name=name)
+        return self._segments[label]
+
+    def attach(self):
+        """Return a dataset of the original class with read-only fields that
+        live in the shared memory blocks.
+
+        Rows appended to such a dataset go to a private copy of the field."""
+        dataset = self.cls.__new__(self.cls)
+        # e.g. the end markers and links must not be shared with the original
+        dataset.__dict__.update(deepcopy(self.attributes))
+        dataset.vectorformat = self.vectorformat
+        dataset.data = dict(self.other)
+        for label, (_, shape, dtype) in self.fields.items():
+            arr = ndarray(shape, dtype=dtype, buffer=self._segment(label).buf)
+            arr.flags.writeable = False
+            dataset.data[label] = arr
+        # the blocks must stay mapped as long as the dataset is alive
+        dataset._sharedsegments = list(self._segments.values())
+        return dataset
+
+    def close(self):
+        """Release the blocks in the current process."""
+        for shm in self._segments.values():
+            shm.close()
+        self._segments = {}
+
+    def unlink(self):
+        """Free the shared memory blocks. Only call this in the publishing
+        process, after all workers are done."""
+        for label in self.fields:
+            self._segment(label).unlink()
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
@@ -0,0 +1,247 @@
+from itertools import islice
+from numpy import zeros, asarray, atleast_2d, loadtxt, concatenate
+from numpy.random import permutation
+
+from pybrain.datasets.supervised import SupervisedDataSet
+
+
+def iterFileChunks(filename, indim, outdim, chunksize=1000, delimiter=None):
+    """Yield (input, target) array pairs of at most `chunksize` rows read from
+    the ascii file `filename`.
+
+    Every line of the file holds one sample: `indim` input columns followed by
+    `outdim` target columns. Only a single chunk of lines is held in memory at
+    any time."""
+    with open(filename, 'r') as f:
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                break
+            rows = loadtxt(lines, delimiter=delimiter, ndmin=2)
+            assert rows.shape[1] == indim + outdim, \
+                "Expected %i columns, found %i." % (indim + outdim, rows.shape[1])
+            yield rows[:, :indim], rows[:, indim:]
+
+
+class StreamingDataSet(SupervisedDataSet):
+    """A supervised dataset that does not hold all of its samples in memory.
+
+    Samples are pulled from a `source` chunk by chunk whenever the dataset is
+    iterated over (e.g. by a trainer), so that only the current chunk and the
+    optional shuffle buffer reside in memory. The 'input' and 'target' fields
+    always hold the chunk that is currently being processed.
+
+    The source can be given in two ways:
+
+    - a callable returning a fresh iterable: every pass over the dataset calls
+      it again, so that each training epoch sees the same data (e.g. a file
+      that is read again from the beginning).
+    - an iterable (e.g. a generator): it is consumed only once, and successive
+      passes continue where the previous one stopped. This is the mode for
+      continuously generated data such as logs or simulator rollouts; set
+      `epochsize` so that a single pass terminates.
+
+    The iterable may yield single samples as (input, target) pairs, or whole
+    chunks as pairs of 2d arrays with one sample per row."""
+
+    def __init__(self, inp, target, source, chunksize=1000, maxbytes=None,
+                 shufflebuffer=0, epochsize=None):
+        """Initialize a streaming dataset.
+
+        :arg inp: dimension of the input vectors
+        :arg target: dimension of the target vectors
+        :arg source: callable returning an iterable, or an iterable itself
+        :key chunksize: number of samples per chunk held in memory (1000)
+        :key maxbytes: memory budget of the chunk buffer in bytes; if given,
+             it determines the chunk size instead of `chunksize`
+        :key shufflebuffer: number of samples kept back to randomize the order
+             in which samples are delivered (0 disables shuffling)
+        :key epochsize: maximal number of samples delivered per pass
+        """
+        SupervisedDataSet.__init__(self, inp, target)
+        if maxbytes is not None:
+            rowbytes = zeros(1).itemsize * (inp + target)
+            chunksize = max(1, maxbytes // rowbytes)
+        self.chunksize = int(chunksize)
+        self.shufflebuffer = shufflebuffer
+        self.epochsize = epochsize
+        self.source = source
+        self._stream = None
+        self._pending = None
+        self._passlength = None
+        # functions applied to the 'input' or 'target' part of every piece of
+        # data pulled from the source, e.g. a normalization
+        self.transforms = {}
+        # preallocate the chunk buffers, they are reused for every chunk
+        self.data['input'] = zeros((self.chunksize, inp))
+        self.data['target'] = zeros((self.chunksize, target))
+        self._pool = [zeros((0, inp)), zeros((0, target))]
+
+    def __reduce__(self):
+        raise TypeError("StreamingDataSet cannot be pickled, its source is not serializable.")
+
+    def _restartable(self):
+        return callable(self.source)
+
+    def _openStream(self):
+        if self._stream is None:
+            source = self.source() if self._restartable() else self.source
+            self._stream = iter(source)
+        return self._stream
+
+    def _readChunk(self, limit=None):
+        """Read the next chunk of at most `chunksize` (and `limit`) samples
+        from the source into the field buffers and return the number of
+        samples read."""
+        stream = self._openStream()
+        inbuf = self.data['input']
+        tarbuf = self.data['target']
+        size = self.chunksize if limit is None else min(limit, self.chunksize)
+        n = 0
+        while n < size:
+            if self._pending is not None:
+                inp, tar = self._pending
+                self._pending = None
+            else:
+                try:
+                    inp, tar = next(stream)
+                except StopIteration:
+                    break
+                inp, tar = self._transform(inp, tar)
+            inp = asarray(inp, dtype=float)
+            tar = asarray(tar, dtype=float)
+            if inp.ndim < 2:
+                inbuf[n] = inp
+                tarbuf[n] = tar
+                n += 1
+                continue
+            # a whole chunk was given: copy as much as fits, keep the rest
+            tar = atleast_2d(tar)
+            take = min(size - n, inp.shape[0])
+            inbuf[n:n + take] = inp[:take]
+            tarbuf[n:n + take] = tar[:take]
+            n += take
+            if take < inp.shape[0]:
+                self._pending = (inp[take:], tar[take:])
+        self.endmarker['input'] = self.endmarker['target'] = n
+        return n
+
+    def _transform(self, inp, tar):
+        """Apply the transforms to a fresh piece of data from the source.
+        Leftovers kept in `_pending` were transformed already."""
+        if 'input' in self.transforms:
+            inp = self.transforms['input'](asarray(inp, dtype=float))
+        if 'target' in self.transforms:
+            tar = self.transforms['target'](asarray(tar, dtype=float))
+        return inp, tar
+
+    def _shuffled(self, inp, tar):
+        """Merge the chunk into the shuffle buffer and return a random
+        selection of samples of the same size, keeping the rest back."""
+        pool_inp = concatenate([self._pool[0], inp])
+        pool_tar = concatenate([self._pool[1], tar])
+        perm = permutation(len(pool_inp))
+        keep = min(self.shufflebuffer, len(pool_inp) - len(inp))
+        out, rest = perm[:len(pool_inp) - keep], perm[len(pool_inp) - keep:]
+        self._pool = [pool_inp[rest], pool_tar[rest]]
+        return pool_inp[out], pool_tar[out]
+
+    def iterChunks(self):
+        """Yield (input, target) arrays for all chunks of one pass over the
+        data, in shuffled order if a shuffle buffer is used.
+
+        The arrays are views on the chunk buffers: they are only valid until
+        the next chunk is requested."""
+        self.reset()
+        delivered = 0
+        while self.epochsize is None or delivered < self.epochsize:
+            if self.epochsize is None:
+                n = self._readChunk()
+            else:
+                n = self._readChunk(self.epochsize - delivered)
+            if n == 0:
+                break
+            inp = self.data['input'][:n]
+            tar = self.data['target'][:n]
+            if self.shufflebuffer:
+                inp, tar = self._shuffled(inp, tar)
+            delivered += len(inp)
+            yield inp, tar
+        if self.shufflebuffer and len(self._pool[0]) and self.epochsize is None:
+            # flush the remainder of the shuffle buffer at the end of the data
+            inp, tar = self._pool
+            self._pool = [inp[:0], tar[:0]]
+            delivered += len(inp)
+            yield inp, tar
+        if self._restartable() and self.epochsize is None:
+            self._stream = None
+        self._passlength = delivered
+
+    def __iter__(self):
+        for inp, tar in self.iterChunks():
+            for sample in zip(inp, tar):
+                yield list(sample)
+
+    def _provideSequences(self):
+        """Return an iterator over one-sample sequences, without ever
+        materializing the whole data."""
+        return ([sample] for sample in iter(self))
+
+    def _evaluateBatch(self, module):
+        """Return the error and the ponderation of a module that can transform
+        batches, evaluated chunk by chunk."""
+        totalError = 0.
+        ponderation = 0.
+        for inp, tar in self.iterChunks():
+            error = tar - module.activateBatch(inp)
+            totalError += 0.5 * (error ** 2).sum()
+            ponderation += error.size
+        return totalError, ponderation
+
+    def getLength(self):
+        """Return the number of samples per pass.
+
+        This is `epochsize` if given, otherwise the length of the last complete
+        pass. As long as no pass was completed, the first chunk is read ahead
+        and its size is returned."""
+        if self.epochsize is not None:
+            return self.epochsize
+        if self._passlength is not None:
+            return self._passlength
+        if self._pending is None:
+            n = self._readChunk()
+            if n > 0:
+                # keep the chunk (and any leftover) for the upcoming pass
+                inp, tar = self.data['input'][:n], self.data['target'][:n]
+                if self._pending is not None:
+                    inp = concatenate([inp, self._pending[0]])
+                    tar = concatenate([tar, self._pending[1]])
+                self._pending = (inp.copy(), tar.copy())
+        return len(self._pending[0]) if self._pending is not None else 0
+
+    def reset(self):
+        self.index = 0
+
+    def clear(self):
+        """Drop the current chunk, the shuffle buffer and restart the source,
+        if possible."""
+        self.reset()
+        self._stream = None
+        self._pending = None
+        self._pool = [self._pool[0][:0], self._pool[1][:0]]
+        self.endmarker['input'] = self.endmarker['target'] = 0
+
+    def shrinkToFit(self):
+        """The chunk buffers are reused for every chunk and keep their size."""
+
+    def splitWithProportion(self, proportion=0.5):
+        raise NotImplementedError("Streamed data cannot be split, provide separate validation data.")
+
+    @classmethod
+    def fromFile(cls, filename, indim, outdim, delimiter=None, **kwargs):
+        """Return a dataset streaming the samples from an ascii file with one
+        sample per line. The file is read again for every pass."""
+        ds = cls(indim, outdim, None, **kwargs)
+        ds.source = lambda: iterFileChunks(filename, indim, outdim,
+                                           ds.chunksize, delimiter)
+        return ds
@@ -68,7 +68,16 @@ class SupervisedDataSet(DataSet):
 
     def evaluateMSE(self, f, **args):
         """Evaluate the predictions of a function on the dataset and return the
-        Mean Squared Error, incorporating importance."""
+        Mean Squared Error, incorporating importance.
+
+        If `f` is the activate method of a module that can transform batches,
+        all samples are evaluated at once."""
+        module = getattr(f, '__self__', None)
+        if (getattr(f, '__name__', None) == 'activate' and not args.get('verbose')
+                and hasattr(module, '_batchable') and module._batchable()):
+            totalError, ponderation = self._evaluateBatch(module)
+            assert ponderation > 0
+            return totalError / ponderation
         ponderation = 0.
         totalError = 0
         for seq in self._provideSequences():
@@ -93,6 +102,12 @@ class SupervisedDataSet(DataSet):
                 print((    'error: % .8f' % e))
         return totalError, ponderation
 
+    def _evaluateBatch(self, module):
+        """Return the error and the ponderation of all samples at once, for a
+        module that can transform batches (see Module.activateBatch)."""
+        error = self.getField('target') - module.activateBatch(self.getField('input'))
+        return 0.5 * (error ** 2).sum(), float(error.size)
+
     def evaluateModuleMSE(self, module, averageOver = 1, **args):
         """Evaluate the predictions of a module on a dataset and return the MSE
         (potentially average over a number of epochs)."""
@@ -92,12 +92,42 @@ class Connection(Named):
             self.inmod.outputerror[inmodOffset, self.inSliceFrom:self.inSliceTo],
             self.inmod.outputbuffer[inmodOffset, self.inSliceFrom:self.inSliceTo])
 
+    def forwardR(self, inmodOffset=0, outmodOffset=0):
+        """Propagate the directional derivative of the incoming module's
+        output to the outgoing module's input (R-operator), like forward()."""
+        self._forwardRImplementation(
+            self.inmod.outputbuffer[inmodOffset, self.inSliceFrom:self.inSliceTo],
+            self.inmod._routputbuffer[inmodOffset, self.inSliceFrom:self.inSliceTo],
+            self.outmod._rinputbuffer[outmodOffset, self.outSliceFrom:self.outSliceTo])
+
     def _forwardImplementation(self, inbuf, outbuf):
         abstractMethod()
 
+    def _forwardRImplementation(self, inbuf, rinbuf, routbuf):
+        """Add the directional derivative of the transformation to routbuf.
+        Connections without parameters are linear, so they transform the
+        derivative rinbuf like their input. Connections with parameters
+        have to take the direction _rparams of these into account."""
+        if self.paramdim:
+            raise NotImplementedError("%s does not support the R-operator." % self.__class__.__name__)
+        self._forwardImplementation(rinbuf, routbuf)
+
+    def _forwardBatch(self, inbuf, outbuf):
+        """Forward transformation of a batch of rows. Can be overwritten in
+        subclasses that transform all rows at once."""
+        for inrow, outrow in zip(inbuf, outbuf):
+            self._forwardImplementation(inrow, outrow)
+
     def _backwardImplementation(self, outerr, inerr, inbuf):
         abstractMethod()
 
+    def _backwardBatch(self, outerr, inerr, inbuf):
+        """Backward transformation of a batch of rows, summing up the
+        derivatives. Can be overwritten in subclasses that transform all rows
+        at once."""
+        for outerrrow, inerrrow, inrow in zip(outerr, inerr, inbuf):
+            self._backwardImplementation(outerrrow, inerrrow, inrow)
+
     def __repr__(self):
         """A simple representation (this should probably be expanded by
         subclasses). """
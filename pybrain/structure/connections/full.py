@@ -1,6 +1,6 @@
 __author__ = 'Tom Schaul, tom@idsia.ch'
 
-from scipy import reshape, dot, outer
+from scipy import reshape, dot, outer, flatnonzero
 
 from pybrain.structure.connections.connection import Connection
 from pybrain.structure.parametercontainer import ParameterContainer
@@ -9,19 +9,63 @@ from pybrain.structure.parametercontainer import ParameterContainer
 class FullConnection(Connection, ParameterContainer):
     """Connection which fully connects every element from the first module's
     output buffer to the second module's input buffer in a matrix multiplicative
-    manner."""
+    manner.
+
+    Wide inputs (at least `sparseDim` elements) are checked for sparsity: if
+    less than a quarter of the entries are non-zero, only the corresponding
+    columns of the weight matrix are used, e.g. for rows of a sparse dataset
+    field."""
+
+    # minimal input dimension for which the sparsity of the input is exploited
+    sparseDim = 1000
 
     def __init__(self, *args, **kwargs):
         Connection.__init__(self, *args, **kwargs)
         ParameterContainer.__init__(self, self.indim*self.outdim)
 
+    def _nonzero(self, inbuf):
+        """Return the indices of the non-zero input elements if the input is
+        wide and sparse enough, None otherwise."""
+        if self.indim < self.sparseDim:
+            return None
+        nz = flatnonzero(inbuf)
+        return nz if 4 * len(nz) < self.indim else None
+
     def _forwardImplementation(self, inbuf, outbuf):
-        outbuf += dot(reshape(self.params, (self.outdim, self.indim)), inbuf)
+        nz = self._nonzero(inbuf)
+        if nz is None:
+            outbuf += dot(reshape(self.params, (self.outdim, self.indim)), inbuf)
+        else:
+            outbuf += dot(reshape(self.params, (self.outdim, self.indim))[:, nz], inbuf[nz])
+
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not FullConnection._forwardImplementation:
+            # a subclass transforms single rows in its own way
+            return Connection._forwardBatch(self, inbuf, outbuf)
+        outbuf += dot(inbuf, reshape(self.params, (self.outdim, self.indim)).T)
+
+    def _forwardRImplementation(self, inbuf, rinbuf, routbuf):
+        routbuf += dot(reshape(self.params, (self.outdim, self.indim)), rinbuf)
+        routbuf += dot(reshape(self._rparams, (self.outdim, self.indim)), inbuf)
 
     def _backwardImplementation(self, outerr, inerr, inbuf):
+        # the error reaches all inputs, zero outputs of a hidden layer too
         inerr += dot(reshape(self.params, (self.outdim, self.indim)).T, outerr)
         ds = self.derivs
-        ds += outer(inbuf, outerr).T.flatten()
+        nz = self._nonzero(inbuf)
+        if nz is None:
+            ds += outer(inbuf, outerr).T.flatten()
+        else:
+            # only the columns of the non-zero inputs receive a gradient
+            reshape(ds, (self.outdim, self.indim))[:, nz] += outer(outerr, inbuf[nz])
+
+    def _backwardBatch(self, outerr, inerr, inbuf):
+        if type(self)._backwardImplementation is not FullConnection._backwardImplementation:
+            # a subclass back-propagates single rows in its own way
+            return Connection._backwardBatch(self, outerr, inerr, inbuf)
+        inerr += dot(outerr, reshape(self.params, (self.outdim, self.indim)))
+        ds = reshape(self.derivs, (self.outdim, self.indim))
+        ds += dot(outerr.T, inbuf)
 
     def whichBuffers(self, paramIndex):
         """Return the index of the input module's output buffer and
@@ -2,6 +2,7 @@ __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
 from scipy import reshape, dot, outer, eye
 from pybrain.structure.connections import FullConnection
+from pybrain.structure.connections.connection import Connection
 
 
 class FullNotSelfConnection(FullConnection):
@@ -22,8 +23,27 @@ class FullNotSelfConnection(FullConnection):
         p = reshape(self.params, (self.outdim, self.indim)) * (1-eye(self.outdim))
         outbuf += dot(p, inbuf)
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not FullNotSelfConnection._forwardImplementation:
+            return Connection._forwardBatch(self, inbuf, outbuf)
+        p = reshape(self.params, (self.outdim, self.indim)) * (1-eye(self.outdim))
+        outbuf += dot(inbuf, p.T)
+
+    def _forwardRImplementation(self, inbuf, rinbuf, routbuf):
+        mask = 1 - eye(self.outdim)
+        routbuf += dot(reshape(self.params, (self.outdim, self.indim)) * mask, rinbuf)
+        routbuf += dot(reshape(self._rparams, (self.outdim, self.indim)) * mask, inbuf)
+
     def _backwardImplementation(self, outerr, inerr, inbuf):
         p = reshape(self.params, (self.outdim, self.indim)) * (1-eye(self.outdim))
         inerr += dot(p.T, outerr)
         ds = self.derivs
         ds += outer(inbuf, outerr).T.flatten()
+
+    def _backwardBatch(self, outerr, inerr, inbuf):
+        if type(self)._backwardImplementation is not FullNotSelfConnection._backwardImplementation:
+            return Connection._backwardBatch(self, outerr, inerr, inbuf)
+        p = reshape(self.params, (self.outdim, self.indim)) * (1-eye(self.outdim))
+        inerr += dot(outerr, p)
+        ds = reshape(self.derivs, (self.outdim, self.indim))
+        ds += dot(outerr.T, inbuf)
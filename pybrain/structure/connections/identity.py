@@ -16,5 +16,18 @@ class IdentityConnection(Connection):
     def _forwardImplementation(self, inbuf, outbuf):
         outbuf += inbuf
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not IdentityConnection._forwardImplementation:
+            # a subclass transforms single rows in its own way
+            return Connection._forwardBatch(self, inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
     def _backwardImplementation(self, outerr, inerr, inbuf):
-        inerr += outerr
\ No newline at end of file
+        inerr += outerr
+
+    def _backwardBatch(self, outerr, inerr, inbuf):
+        if type(self)._backwardImplementation is not IdentityConnection._backwardImplementation:
+            return Connection._backwardBatch(self, outerr, inerr, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, inbuf)
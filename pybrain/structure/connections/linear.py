@@ -21,6 +21,22 @@ class LinearConnection(Connection, ParameterContainer):
     def _forwardImplementation(self, inbuf, outbuf):
         outbuf += inbuf * self.params
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not LinearConnection._forwardImplementation:
+            # a subclass transforms single rows in its own way
+            return Connection._forwardBatch(self, inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _forwardRImplementation(self, inbuf, rinbuf, routbuf):
+        routbuf += rinbuf * self.params + inbuf * self._rparams
+
     def _backwardImplementation(self, outerr, inerr, inbuf):
         #CHECKME: not setting derivatives -- this means the multiplicative weight is never updated!
         inerr += outerr * self.params
+
+    def _backwardBatch(self, outerr, inerr, inbuf):
+        if type(self)._backwardImplementation is not LinearConnection._backwardImplementation:
+            return Connection._backwardBatch(self, outerr, inerr, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, inbuf)
@@ -47,6 +47,9 @@ class SharedConnection(Connection):
     @property
     def derivs(self): return self.mother.derivs
 
+    @property
+    def _rparams(self): return self.mother._rparams
+
     def _getName(self):
         return self.mother.name if self._name is None else self._name
 
@@ -60,6 +60,13 @@ class CheaplyCopiable(ParameterContainer, Module):
         self.__stored._params[:] = self._params
         return self.__stored.activate(*args, **kwargs)
 
+    def activateBatch(self, *args, **kwargs):
+        self.__stored._params[:] = self._params
+        return self.__stored.activateBatch(*args, **kwargs)
+
+    def _batchable(self, backward=False):
+        return self.__stored._batchable() and not backward
+
     def backActivate(self, *args, **kwargs):
         self.__stored._params[:] = self._params
         return self.__stored.backActivate(*args, **kwargs)
@@ -16,6 +16,13 @@ class MaskedModule(MaskedParameters, Module):
     def activate(self, *args, **kwargs):
         return self.pcontainer.activate(*args, **kwargs)
 
+    def activateBatch(self, *args, **kwargs):
+        return self.pcontainer.activateBatch(*args, **kwargs)
+
+    def _batchable(self, backward=False):
+        # the derivatives of the masked parameters are not maintained
+        return self.pcontainer._batchable() and not backward
+
     def backActivate(self, *args, **kwargs):
         return self.pcontainer.backActivate(*args, **kwargs)
 
@@ -13,4 +13,20 @@ class BiasUnit(NeuronLayer):
         Module.__init__(self, 0, 1, name = name)
 
     def _forwardImplementation(self, inbuf, outbuf):
-        outbuf[:] = 1
\ No newline at end of file
+        outbuf[:] = 1
+
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not BiasUnit._forwardImplementation:
+            # a subclass transforms single inputs in its own way
+            return self._forwardRows(inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        routbuf[:] = 0
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        if type(self)._backwardImplementation is not BiasUnit._backwardImplementation:
+            return self._backwardRows(outerr, inerr, outbuf, inbuf)
+        # there is no input to propagate the errors to
+        pass
@@ -2,7 +2,9 @@ __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
 from scipy import random
 from scipy.ndimage import minimum_position
-from scipy import mgrid, zeros, tile, array, floor, sum
+from scipy import mgrid, zeros, array, floor, sum, dot, ones, arange, maximum, abs
+from scipy.sparse import csr_matrix
+from scipy.signal import fftconvolve
 
 from pybrain.structure.modules.module import Module
 
@@ -13,7 +15,11 @@ class KohonenMap(Module):
         neighbourhood relationship on a 2-dimensional grid. There are two
         versions: With the outputFullMap option set to True, it outputs
         the full Kohonen map to the next layer, set to False it will only
-        return 2 values: the x and y coordinate of the winner neuron. """
+        return 2 values: the x and y coordinate of the winner neuron.
+
+        Besides training online, with one backward pass after each
+        activation, the map can be trained on whole batches of samples with
+        the batch SOM algorithm, see trainBatch(). """
 
     def __init__(self, dim, nNeurons, name=None, outputFullMap=False):
         if outputFullMap:
@@ -46,19 +52,29 @@ class KohonenMap(Module):
         """ assigns one of the neurons to the input given in inbuf and writes
             the neuron's coordinates to outbuf. """
         # calculate the winner neuron with lowest error (square difference)
-        self.difference = self.neurons - tile(inbuf, (self.nNeurons, self.nNeurons, 1))
+        self.difference = self.neurons - inbuf
         error = sum(self.difference ** 2, 2)
         self.winner = array(minimum_position(error))
         if not self.outputFullMap:
             outbuf[:] = self.winner
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if not self.outputFullMap:
+            outbuf[:] = self.winners(inbuf)
+
+    def _neighbourhood(self, n):
+        """ Return the weights of the neighbours of a neuron, for offsets of up
+            to n positions along both axes of the grid. """
+        offsets = arange(-n, n + 1)
+        distance = abs(offsets)[:, None] + abs(offsets)[None, :]
+        return maximum(1 - distance / float(self.nNeurons), 0)
 
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         """ trains the kohonen map in unsupervised manner, moving the
             closest neuron and its neighbours closer to the input pattern. """
 
         # calculate neighbourhood and limit to edge of matrix
-        n = floor(self.neighbours)
+        n = int(floor(self.neighbours))
         self.neighbours *= self.neighbourdecay
         tl = (self.winner - n)
         br = (self.winner + n + 1)
@@ -68,10 +84,63 @@ class KohonenMap(Module):
         # calculate distance matrix
         tempm = 1 - sum(abs(self.distmatrix - self.winner.reshape(1, 1, 2)), 2) / self.nNeurons
         tempm[tempm < 0] = 0
-        distm = zeros((self.nNeurons, self.nNeurons, self.nInput))
-        for i in range(self.nInput):
-            distm[:, :, i] = tempm
-            distm[:, :, i] = tempm
-
-        self.neurons[tl[0]:br[0], tl[1]:br[1]] -= self.learningrate * self.difference[tl[0]:br[0], tl[1]:br[1]] * distm[tl[0]:br[0], tl[1]:br[1]]
 
+        self.neurons[tl[0]:br[0], tl[1]:br[1]] -= self.learningrate * self.difference[tl[0]:br[0], tl[1]:br[1]] * tempm[tl[0]:br[0], tl[1]:br[1], None]
+
+    def winners(self, inputs, kdtree=False):
+        """ Return the coordinates of the winner neurons of the inputs, given
+            as the rows of an array, one row per input.
+
+            The squared distances of a part of at most `maxbatchsize` inputs
+            to all neurons are computed at once by a matrix product. If
+            `kdtree` is set, the winners are looked up in a k-d tree of the
+            neurons instead, which is faster for large maps with few input
+            dimensions. """
+        inputs = array(inputs, dtype=float).reshape(-1, self.nInput)
+        neurons = self.neurons.reshape(-1, self.nInput)
+        indices = zeros(len(inputs), dtype=int)
+        if kdtree:
+            from scipy.spatial import cKDTree
+            tree = cKDTree(neurons)
+        else:
+            norms = sum(neurons ** 2, 1)
+        for start in range(0, len(inputs), self.maxbatchsize):
+            stop = start + self.maxbatchsize
+            if kdtree:
+                indices[start:stop] = tree.query(inputs[start:stop])[1]
+            else:
+                # the squared norms of the inputs do not change the winners
+                error = norms - 2 * dot(inputs[start:stop], neurons.T)
+                indices[start:stop] = error.argmin(1)
+        return array(divmod(indices, self.nNeurons)).T
+
+    def trainBatch(self, inputs, epochs=1, kdtree=False):
+        """ Train the map on the inputs, given as the rows of an array, with
+            the batch SOM algorithm.
+
+            In every epoch, the winner neurons of all inputs are determined
+            (see winners()), and every neuron is set to the mean of the
+            inputs, each weighted by the neighbourhood function of the online
+            training between the neuron and the input's winner. Neurons
+            without any input in their neighbourhood stay where they are.
+            The neighbourhood shrinks as if the inputs had been presented
+            online, i.e. by neighbourdecay for each input; the learning rate
+            is not used. """
+        inputs = array(inputs, dtype=float).reshape(-1, self.nInput)
+        shape = (self.nNeurons, self.nNeurons)
+        for _ in range(epochs):
+            n = int(floor(self.neighbours))
+            x, y = self.winners(inputs, kdtree).T
+            # sums and numbers of the inputs won by every neuron
+            won = csr_matrix((ones(len(inputs)), (x * self.nNeurons + y, arange(len(inputs)))),
+                             shape=(self.nNeurons ** 2, len(inputs)))
+            sums = won.dot(inputs).reshape(shape + (self.nInput,))
+            counts = array(won.sum(1)).reshape(shape)
+            # spread them over the neighbourhoods
+            kernel = self._neighbourhood(n)
+            sums = fftconvolve(sums, kernel[:, :, None], mode='same', axes=(0, 1))
+            counts = fftconvolve(counts, kernel, mode='same')
+            # the weights of the neighbourhood are multiples of 1 / nNeurons
+            covered = counts > 0.5 / self.nNeurons
+            self.neurons[covered] = sums[covered] / counts[covered][:, None]
+            self.neighbours *= self.neighbourdecay ** len(inputs)
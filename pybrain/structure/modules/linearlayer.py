@@ -9,5 +9,21 @@ class LinearLayer(NeuronLayer):
     def _forwardImplementation(self, inbuf, outbuf):
         outbuf[:] = inbuf
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not LinearLayer._forwardImplementation:
+            # a subclass transforms single inputs in its own way
+            return self._forwardRows(inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        routbuf[:] = rinbuf
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
-        inerr[:] = outerr
\ No newline at end of file
+        inerr[:] = outerr
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        if type(self)._backwardImplementation is not LinearLayer._backwardImplementation:
+            return self._backwardRows(outerr, inerr, outbuf, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, outbuf, inbuf)
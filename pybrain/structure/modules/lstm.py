@@ -1,6 +1,6 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import tanh
+from scipy import tanh, zeros
 
 from pybrain.structure.modules.neuronlayer import NeuronLayer
 from pybrain.structure.modules.module import Module
@@ -111,6 +111,36 @@ class LSTMLayer(NeuronLayer, ParameterContainer):
 
         outbuf[:] = self.outgate[self.offset] * self.h(self.state[self.offset])
 
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        dim = self.outdim
+        t = self.offset
+        if t == 0:
+            # directional derivatives of the states of the whole sequence
+            self._rstate = zeros(self.state.shape)
+        rstate = self._rstate
+        cellx = inbuf[dim*2:dim*3]
+        ringatex = rinbuf[:dim].copy()
+        rforgetgatex = rinbuf[dim:dim*2].copy()
+        rcellx = rinbuf[dim*2:dim*3]
+        routgatex = rinbuf[dim*3:].copy()
+
+        if self.peepholes and t > 0:
+            rp = self._rparams
+            ringatex += rp[:dim] * self.state[t-1] + self.ingatePeepWeights * rstate[t-1]
+            rforgetgatex += rp[dim:dim*2] * self.state[t-1] + self.forgetgatePeepWeights * rstate[t-1]
+
+        ringate = self.fprime(self.ingatex[t]) * ringatex
+        rstate[t] = ringate * self.g(cellx) + self.ingate[t] * self.gprime(cellx) * rcellx
+        if t > 0:
+            rforgetgate = self.fprime(self.forgetgatex[t]) * rforgetgatex
+            rstate[t] += rforgetgate * self.state[t-1] + self.forgetgate[t] * rstate[t-1]
+
+        if self.peepholes:
+            routgatex += self._rparams[dim*2:] * self.state[t] + self.outgatePeepWeights * rstate[t]
+        routgate = self.fprime(self.outgatex[t]) * routgatex
+
+        routbuf[:] = routgate * self.h(self.state[t]) + self.outgate[t] * self.hprime(self.state[t]) * rstate[t]
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         dim = self.outdim
         cellx = inbuf[dim*2:dim*3]
@@ -1,6 +1,7 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import append, zeros
+from scipy import append, zeros, asarray
+from scipy.sparse import issparse
 
 from pybrain.utilities import abstractMethod, Named
 
@@ -28,6 +29,9 @@ class Module(Named):
     # things like time.
     offset = 0
 
+    # Maximal number of rows that activateBatch() computes at once.
+    maxbatchsize = 1000
+
     bufferlist = None
 
     def __init__(self, indim, outdim, name=None, **args):
@@ -81,6 +85,18 @@ class Module(Named):
                                      self.outputbuffer[self.offset],
                                      self.inputbuffer[self.offset])
 
+    def forwardR(self):
+        """Propagate the directional derivative of the input to the output
+        (R-operator, cf. Pearlmutter 1994), at the current offset.
+
+        The derivatives are kept in the buffers _rinputbuffer and
+        _routputbuffer, the direction of the parameters in _rparams. Both are
+        set up by the surrounding network, see Network.activateR()."""
+        self._forwardRImplementation(self.inputbuffer[self.offset],
+                                     self.outputbuffer[self.offset],
+                                     self._rinputbuffer[self.offset],
+                                     self._routputbuffer[self.offset])
+
     def reset(self):
         """Set all buffers, past and present, to zero."""
         self.offset = 0
@@ -88,6 +104,13 @@ class Module(Named):
             buf = getattr(self, buffername)
             buf[:] = zeros(l)
 
+    def _resetErrors(self):
+        """Set the error buffers, past and present, to zero, but keep the
+        activations."""
+        for buffername, _ in self.bufferlist:
+            if buffername.lower().endswith('error'):
+                getattr(self, buffername)[:] = 0
+
     def shift(self, items):
         """Shift all buffers up or down a defined number of items on offset axis.
         Negative values indicate backward shift."""
@@ -108,18 +131,85 @@ class Module(Named):
         and return the output."""
         dataset.reset()
         self.reset()
-        out = zeros((len(dataset), self.outdim))
-        for i, sample in enumerate(dataset):
-            # FIXME: Can we always assume that sample[0] is the input data?
-            out[i, :] = self.activate(sample[0])
+        # FIXME: Can we always assume that the first linked field is the input data?
+        out = self.activateBatch(dataset.getField(dataset.link[0]))
         self.reset()
         dataset.reset()
         return out
 
+    def activateBatch(self, inputs):
+        """Return the outputs for a batch of inputs, given as the rows of a 2d
+        array.
+
+        If the module keeps no state between samples (see _batchable()), the
+        rows are transformed all at once, in parts of at most `maxbatchsize`
+        rows, without using the module's buffers. Otherwise the module is
+        activated on one row after the other, like on a time series."""
+        if not issparse(inputs):
+            inputs = asarray(inputs, dtype=float).reshape(-1, self.indim)
+        outputs = zeros((inputs.shape[0], self.outdim))
+        if issparse(inputs) or not self._batchable():
+            for i in range(inputs.shape[0]):
+                outputs[i] = self.activate(inputs[i])
+            return outputs
+        for start in range(0, len(inputs), self.maxbatchsize):
+            stop = start + self.maxbatchsize
+            self._forwardBatch(inputs[start:stop], outputs[start:stop])
+        return outputs
+
+    def _batchable(self, backward=False):
+        """Tell whether the module can transform a batch of inputs at once:
+        it is not sequential and implements _forwardBatch(), and, if
+        `backward` is set, also _backwardBatch()."""
+        cls = type(self)
+        return (not self.sequential
+                and cls._forwardBatch is not Module._forwardBatch
+                and (not backward or cls._backwardBatch is not Module._backwardBatch))
+
+    def _forwardBatch(self, inbuf, outbuf):
+        """Forward transformation of a batch of inputs, one per row, into
+        `outbuf`. To be overwritten in subclasses whose transformation works
+        on all rows at once."""
+        abstractMethod()
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        """Backward transformation of a batch of output errors, one per row,
+        given the buffers of the last call to _forwardBatch(). The derivatives
+        of the parameters are summed over the rows. To be overwritten in
+        subclasses that implement _forwardBatch()."""
+        abstractMethod()
+
+    def _forwardRows(self, inbuf, outbuf):
+        """Forward transformation of a batch one row after the other, for
+        subclasses that override the single-row transformation of a module
+        with a vectorized _forwardBatch()."""
+        for inrow, outrow in zip(inbuf, outbuf):
+            self._forwardImplementation(inrow, outrow)
+
+    def _backwardRows(self, outerr, inerr, outbuf, inbuf):
+        """Backward transformation of a batch one row after the other, the
+        counterpart of _forwardRows()."""
+        for rows in zip(outerr, inerr, outbuf, inbuf):
+            self._backwardImplementation(*rows)
+
+    def _setInput(self, inpt):
+        """Write the input vector into the input buffer at the current offset.
+
+        The input can also be given as a sparse matrix with a single row, of
+        which only the non-zero entries are written."""
+        buf = self.inputbuffer[self.offset]
+        if issparse(inpt):
+            inpt = inpt.tocsr()
+            assert inpt.shape == (1, len(buf)), str((len(buf), inpt.shape))
+            buf[:] = 0
+            buf[inpt.indices] = inpt.data
+        else:
+            assert len(buf) == len(inpt), str((len(buf), len(inpt)))
+            buf[:] = inpt
+
     def activate(self, inpt):
         """Do one transformation of an input and return the result."""
-        assert len(self.inputbuffer[self.offset]) == len(inpt), str((len(self.inputbuffer[self.offset]), len(inpt)))
-        self.inputbuffer[self.offset] = inpt
+        self._setInput(inpt)
         self.forward()
         return self.outputbuffer[self.offset].copy()
 
@@ -140,3 +230,10 @@ class Module(Named):
         in subclasses, does not have to.
 
         Should also compute the derivatives of the parameters."""
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        """Write the directional derivative of the output into routbuf, given
+        the one of the input in rinbuf and the buffers of the last forward
+        pass. Modules with parameters add the derivative along the direction
+        _rparams of their parameters. Can be overwritten in subclasses."""
+        raise NotImplementedError("%s does not support the R-operator." % self.__class__.__name__)
@@ -8,5 +8,21 @@ class ReluLayer(NeuronLayer):
     def _forwardImplementation(self, inbuf, outbuf):
         outbuf[:] = inbuf * (inbuf > 0)
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not ReluLayer._forwardImplementation:
+            # a subclass transforms single inputs in its own way
+            return self._forwardRows(inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        routbuf[:] = rinbuf * (inbuf > 0)
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
-        inerr[:] = outerr * (inbuf > 0)
\ No newline at end of file
+        inerr[:] = outerr * (inbuf > 0)
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        if type(self)._backwardImplementation is not ReluLayer._backwardImplementation:
+            return self._backwardRows(outerr, inerr, outbuf, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, outbuf, inbuf)
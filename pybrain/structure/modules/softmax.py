@@ -17,9 +17,25 @@ class SoftmaxLayer(NeuronLayer):
         outbuf[:] = safeExp(inbuf)
         outbuf /= sum(outbuf)
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not SoftmaxLayer._forwardImplementation:
+            # a subclass transforms single inputs in its own way
+            return self._forwardRows(inbuf, outbuf)
+        outbuf[:] = safeExp(inbuf)
+        outbuf /= outbuf.sum(axis=1)[:, None]
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        routbuf[:] = outbuf * (rinbuf - scipy.dot(outbuf, rinbuf))
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         inerr[:] = outerr
 
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        if type(self)._backwardImplementation is not SoftmaxLayer._backwardImplementation:
+            return self._backwardRows(outerr, inerr, outbuf, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, outbuf, inbuf)
+
 
 class PartialSoftmaxLayer(NeuronLayer):
     """Layer implementing a softmax distribution over slices of the input."""
@@ -11,5 +11,21 @@ class SoftSignLayer(NeuronLayer):
     def _forwardImplementation(self, inbuf, outbuf):
         outbuf[:] = inbuf / (1 + abs(inbuf))
 
+    def _forwardBatch(self, inbuf, outbuf):
+        if type(self)._forwardImplementation is not SoftSignLayer._forwardImplementation:
+            # a subclass transforms single inputs in its own way
+            return self._forwardRows(inbuf, outbuf)
+        # the transformation works row-wise on batches as well
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        routbuf[:] = (1 - abs(outbuf))**2 * rinbuf
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         inerr[:] = (1 - abs(outbuf))**2 * outerr
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        if type(self)._backwardImplementation is not SoftSignLayer._backwardImplementation:
+            return self._backwardRows(outerr, inerr, outbuf, inbuf)
+        # the derivative works row-wise on batches as well
+        self._backwardImplementation(outerr, inerr, outbuf, inbuf)
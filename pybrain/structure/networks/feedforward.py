@@ -5,14 +5,23 @@
 
 __author__ = 'Justin Bayer, bayer.justin@googlemail.com'
 
+from scipy import zeros
+
 from pybrain.structure.networks.network import Network
 
 
 class FeedForwardNetworkComponent(object):
 
+    # buffers of the modules for the last batch, see _forwardBatch()
+    _batchbuffers = None
+
     def __init__(self, name=None, **args):
         pass
 
+    def reset(self):
+        super(FeedForwardNetworkComponent, self).reset()
+        self._batchbuffers = None
+
     def activate(self, inpt):
         """Do one transformation of an input and return the result."""
         self.reset()
@@ -36,6 +45,75 @@ class FeedForwardNetworkComponent(object):
             outbuf[index:index + m.outdim] = m.outputbuffer[offset]
             index += m.outdim
 
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        index = 0
+        offset = self.offset
+        for m in self.modules:
+            m._rinputbuffer[offset] = 0
+        for m in self.inmodules:
+            m._rinputbuffer[offset] = rinbuf[index:index + m.indim]
+            index += m.indim
+
+        for m in self.modulesSorted:
+            m.forwardR()
+            for c in self.connections[m]:
+                c.forwardR(offset, offset)
+
+        index = 0
+        for m in self.outmodules:
+            routbuf[index:index + m.outdim] = m._routputbuffer[offset]
+            index += m.outdim
+
+    def _batchable(self, backward=False):
+        return all(m._batchable(backward) for m in self.modules)
+
+    def _forwardBatch(self, inbuf, outbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        # batch buffers of all modules, the modules' own buffers stay untouched;
+        # they are kept for _backwardBatch()
+        inputs = dict((m, zeros((len(inbuf), m.indim))) for m in self.modulesSorted)
+        outputs = dict((m, zeros((len(inbuf), m.outdim))) for m in self.modulesSorted)
+        self._batchbuffers = inputs, outputs
+        index = 0
+        for m in self.inmodules:
+            inputs[m][:] = inbuf[:, index:index + m.indim]
+            index += m.indim
+
+        for m in self.modulesSorted:
+            m._forwardBatch(inputs[m], outputs[m])
+            for c in self.connections[m]:
+                c._forwardBatch(outputs[c.inmod][:, c.inSliceFrom:c.inSliceTo],
+                                inputs[c.outmod][:, c.outSliceFrom:c.outSliceTo])
+
+        index = 0
+        for m in self.outmodules:
+            outbuf[:, index:index + m.outdim] = outputs[m]
+            index += m.outdim
+
+    def _backwardBatch(self, outerr, inerr, outbuf, inbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        inputs, outputs = self._batchbuffers
+        inerrs = dict((m, zeros((len(outerr), m.indim))) for m in self.modulesSorted)
+        outerrs = dict((m, zeros((len(outerr), m.outdim))) for m in self.modulesSorted)
+        index = 0
+        for m in self.outmodules:
+            outerrs[m][:] = outerr[:, index:index + m.outdim]
+            index += m.outdim
+
+        for m in reversed(self.modulesSorted):
+            for c in self.connections[m]:
+                c._backwardBatch(inerrs[c.outmod][:, c.outSliceFrom:c.outSliceTo],
+                                 outerrs[c.inmod][:, c.inSliceFrom:c.inSliceTo],
+                                 outputs[c.inmod][:, c.inSliceFrom:c.inSliceTo])
+            m._backwardBatch(outerrs[m], inerrs[m], outputs[m], inputs[m])
+
+        index = 0
+        for m in self.inmodules:
+            inerr[:, index:index + m.indim] = inerrs[m]
+            index += m.indim
+        self._batchbuffers = None
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         assert self.sorted, ".sortModules() has not been called"
         index = 0
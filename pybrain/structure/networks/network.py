@@ -149,6 +149,20 @@ class Network(Module, ParameterContainer):
         for m in self.modules:
             m.reset()
 
+    def _resetErrors(self):
+        Module._resetErrors(self)
+        for m in self.modules:
+            m._resetErrors()
+
+    def shift(self, items):
+        """Shift the buffers of the network and of all its modules."""
+        if items == 0:
+            return
+        for m in self.modules:
+            m.shift(items)
+        # also sets the offsets of the modules
+        Module.shift(self, items)
+
     def _setParameters(self, p, owner=None):
         """ put slices of this array back into the modules """
         ParameterContainer._setParameters(self, p, owner)
@@ -171,6 +185,50 @@ class Network(Module, ParameterContainer):
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         raise NotImplementedError("Must be implemented by subclass.")
 
+    def _resetRBuffers(self, length):
+        """Create zeroed buffers for the directional derivatives of the inputs
+        and outputs of all component modules."""
+        for m in self.modules:
+            m._rinputbuffer = scipy.zeros((length, m.indim))
+            m._routputbuffer = scipy.zeros((length, m.outdim))
+            if isinstance(m, Network):
+                m._resetRBuffers(length)
+
+    def _setRDirection(self, v):
+        """Put slices of the parameter direction v into the modules and
+        connections, like _setParameters()."""
+        index = 0
+        for x in self._containerIterator():
+            x._rparams = v[index:index + x.paramdim]
+            if isinstance(x, Network):
+                x._setRDirection(x._rparams)
+            index += x.paramdim
+
+    def activateR(self, direction, length=1):
+        """Return the directional derivatives of the outputs with respect to
+        the parameters along `direction`, i.e. the product of the Jacobian of
+        the outputs with that vector, by a single forward pass of the
+        R-operator (Pearlmutter, 1994).
+
+        The derivatives are computed for the `length` time steps the network
+        has been activated on since the last reset(), using the buffers of
+        these activations. For non-sequential networks, this is the last
+        activation."""
+        assert self.sorted, ".sortModules() has not been called"
+        assert len(direction) == self.paramdim
+        offset = self.offset
+        self._resetRBuffers(self.inputbuffer.shape[0])
+        self._setRDirection(direction)
+        rinput = scipy.zeros(self.indim)
+        routputs = scipy.zeros((length, self.outdim))
+        try:
+            for t in range(length):
+                self.offset = t
+                self._forwardRImplementation(None, None, rinput, routputs[t])
+        finally:
+            self.offset = offset
+        return routputs
+
     def _topologicalSort(self):
         """Update the network structure and make .modulesSorted a topologically
         sorted list of the modules."""
@@ -33,8 +33,8 @@ class Rbm(object):
         self.net.sortModules()
         self.bias = [i for i in self.net.modules if isinstance(i, BiasUnit)][0]
         self.biascon = self.net.connections[self.bias][0]
-        self.visible = net['visible']
-        self.hidden = net['hidden']
+        self.visible = net.inmodules[0]
+        self.hidden = net.outmodules[0]
         self.con = self.net.connections[self.visible][0]
 
     @classmethod
@@ -7,6 +7,8 @@
 __author__ = 'Justin Bayer, bayer.justin@googlemail.com'
 
 
+from scipy.sparse import issparse
+
 from pybrain.structure.networks.network import Network
 from pybrain.structure.connections.shared import SharedConnection
 
@@ -46,7 +48,10 @@ class RecurrentNetworkComponent(object):
 
     def activate(self, inpt):
         """Do one transformation of an input and return the result."""
-        self.inputbuffer[self.offset] = inpt
+        if issparse(inpt):
+            self._setInput(inpt)
+        else:
+            self.inputbuffer[self.offset] = inpt
         self.forward()
         if self.forget:
             return self.outputbuffer[self.offset].copy()
@@ -108,6 +113,29 @@ class RecurrentNetworkComponent(object):
             outbuf[index:index + m.outdim] = m.outputbuffer[offset]
             index += m.outdim
 
+    def _forwardRImplementation(self, inbuf, outbuf, rinbuf, routbuf):
+        assert not self.forget, "Cannot compute directional derivatives of a forgetful network"
+        assert self.sorted, ".sortModules() has not been called"
+        index = 0
+        offset = self.offset
+        for m in self.inmodules:
+            m._rinputbuffer[offset] = rinbuf[index:index + m.indim]
+            index += m.indim
+
+        if offset > 0:
+            for c in self.recurrentConns:
+                c.forwardR(offset - 1, offset)
+
+        for m in self.modulesSorted:
+            m.forwardR()
+            for c in self.connections[m]:
+                c.forwardR(offset, offset)
+
+        index = 0
+        for m in self.outmodules:
+            routbuf[index:index + m.outdim] = m._routputbuffer[offset]
+            index += m.outdim
+
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         assert not self.forget, "Cannot back propagate a forgetful network"
         assert self.sorted, ".sortModules() has not been called"
@@ -8,7 +8,8 @@ from pybrain.supervised.evolino.population import SimplePopulation
 from pybrain.tools.validation import Validator
 from pybrain.tools.kwargsprocessor import KWArgsProcessor
 
-from numpy import array, dot, concatenate, Infinity
+from numpy import array, dot, concatenate, Infinity, zeros, einsum, matmul, array_split, finfo
+from numpy.linalg import pinv
 from scipy.linalg import pinv2
 from copy import deepcopy
 
@@ -42,6 +43,19 @@ class EvolinoEvaluation(Filter):
         self.max_fitness = -Infinity
 
 
+    def _splitSequences(self, dataset, wtRatio):
+        """ Split the target sequences of the dataset into the washout and the
+            training phase. Returns the lists of washout and training sequences.
+        """
+        washout_sequences = []
+        training_sequences = []
+        for i in range(dataset.getNumSequences()):
+            sequence = dataset.getSequence(i)[1]
+            training_start = int(wtRatio * len(sequence))
+            washout_sequences.append(sequence[                  : training_start   ])
+            training_sequences.append(sequence[ training_start   :                  ])
+        return washout_sequences, training_sequences
+
     def _evaluateNet(self, net, dataset, wtRatio):
         """ Evaluates the performance of net on the given dataset.
             Returns the fitness value.
@@ -52,14 +66,8 @@ class EvolinoEvaluation(Filter):
         """
 
         # === extract sequences from dataset ===
-        numSequences = dataset.getNumSequences()
-        washout_sequences = []
-        training_sequences = []
-        for i in range(numSequences):
-            sequence = dataset.getSequence(i)[1]
-            training_start = int(wtRatio * len(sequence))
-            washout_sequences.append(sequence[                  : training_start   ])
-            training_sequences.append(sequence[ training_start   :                  ])
+        washout_sequences, training_sequences = self._splitSequences(dataset, wtRatio)
+        numSequences = len(washout_sequences)
 
 
         # === collect raw output (denoted by phi) ===
@@ -138,6 +146,179 @@ class EvolinoEvaluation(Filter):
 
 
 
+# layer, sequences and fitness function of the worker processes
+_state = None
+
+def _initWorker(state):
+    global _state
+    _state = state
+
+
+def _genomeWeights(net, genomes):
+    """ Return the weights from the input layer, from the bias unit and from
+        the recurrent connection to the LSTM layer of the network as arrays,
+        with the genomes along the first axis. """
+    layer = net._hid_layer
+    dim = layer.outdim
+    connections = net._getInputConnectionsOfLayer(layer)
+    # the genome of a cell holds the weights of the four gate types, each
+    # ordered by connections and sources
+    genomes = array(genomes, dtype=float)
+    genomes = genomes.reshape(len(genomes), dim, 4, -1)
+    weights = {}
+    index = 0
+    for c in connections:
+        w = genomes[:, :, :, index:index + c.indim]
+        weights[c.inmod] = w.transpose(0, 2, 1, 3).reshape(len(genomes), 4 * dim, c.indim)
+        index += c.indim
+    return (weights[net._in_layer], weights[net._bias][:, :, 0], weights[layer])
+
+
+def _lstmStep(layer, x, state):
+    """ Do one time step of the LSTM layer on the net inputs x, for all
+        genomes at once. Returns the outputs and the new cell states. """
+    dim = layer.outdim
+    ingate = layer.f(x[:, :dim])
+    forgetgate = layer.f(x[:, dim:dim * 2])
+    outgate = layer.f(x[:, dim * 3:])
+    state = ingate * layer.g(x[:, dim * 2:dim * 3]) + forgetgate * state
+    return outgate * layer.h(state), state
+
+
+def _evaluateGenomes(weights):
+    """ Return the fitness values and the output weight matrices of the
+        genomes whose weights are given, as EvolinoEvaluation._evaluateNet()
+        computes them. """
+    layer, factor, washout_sequences, training_sequences, evalfunc = _state
+    inweights, biasweights, recweights = weights
+    ngenomes, dim = len(inweights), layer.outdim
+
+    # === run the network with the sequences as backprojection ===
+    phis = []
+    washout_states = []
+    for washout, training in zip(washout_sequences, training_sequences):
+        sequence = concatenate([washout, training])
+        backprojection = zeros(sequence.shape)
+        backprojection[1:] = factor * sequence[:-1]
+        netinputs = einsum('gkd,td->tgk', inweights, backprojection) + biasweights
+        out = zeros((ngenomes, dim))
+        state = zeros((ngenomes, dim))
+        phi = zeros((len(training), ngenomes, dim))
+        for t in range(len(sequence)):
+            x = netinputs[t] + matmul(recweights, out[:, :, None])[:, :, 0]
+            out, state = _lstmStep(layer, x, state)
+            if t == len(washout) - 1:
+                washout_states.append((out, state))
+            if t >= len(washout):
+                phi[t - len(washout)] = out
+        phis.append(phi)
+
+    # === weights of the linear output layers, by one batched pseudo-inverse ===
+    # (with the cutoff of scipy.linalg.pinv2)
+    PHI = concatenate(phis).transpose(1, 0, 2)
+    TARGET = concatenate(training_sequences)
+    W = matmul(pinv(PHI, rcond=finfo(float).eps * 1e6), TARGET).transpose(0, 2, 1)
+
+    # === extrapolate the training sequences after the washout ===
+    outputs = []
+    for (out, state), washout, training in zip(washout_states, washout_sequences, training_sequences):
+        y = zeros((ngenomes, len(washout[-1])))
+        y[:] = washout[-1]
+        output = zeros((len(training), ngenomes, y.shape[1]))
+        for t in range(len(training)):
+            x = (matmul(inweights, factor * y[:, :, None]) + matmul(recweights, out[:, :, None]))[:, :, 0]
+            out, state = _lstmStep(layer, x + biasweights, state)
+            y = matmul(W, out[:, :, None])[:, :, 0]
+            output[t] = y
+        outputs.append(output)
+
+    OUTPUT = concatenate(outputs)
+    fitnesses = [evalfunc(OUTPUT[:, g], TARGET) for g in range(ngenomes)]
+    return fitnesses, W
+
+
+class EvolinoBatchEvaluation(EvolinoEvaluation):
+    """ Evaluate all individuals of the Evolino population at once, and store
+        their fitness value inside the population.
+
+        Instead of loading the genome of each individual into the network and
+        activating it step by step, the LSTM layer is simulated for all
+        genomes together on arrays of their weights, and the weights of all
+        linear output layers are computed by one batched pseudo-inverse. The
+        fitness values are those of EvolinoEvaluation, up to rounding. The
+        individuals can be spread over a pool of worker processes.
+    """
+
+    def __init__(self, evolino_network, dataset, **kwargs):
+        """ :key processes: Number of worker processes the individuals are spread over,
+                              None starts one per CPU. Defaults to 1
+
+            The other keyword arguments are those of EvolinoEvaluation.
+        """
+        EvolinoEvaluation.__init__(self, evolino_network, dataset, **kwargs)
+        ap = KWArgsProcessor(self, kwargs)
+        ap.add('processes', default=1)
+
+    def apply(self, population):
+        """ Evaluate all individuals, and store their fitness inside population.
+            Also set the genome of the best individual and its weight matrix W
+            of the linear output layer in the network.
+
+            :arg population: Instance of EvolinoPopulation
+        """
+        net = self.network
+        population.clearFitness()
+        individuals = list(population.getIndividuals())
+        genomes = [individual.getGenome() for individual in individuals]
+        weights = _genomeWeights(net, genomes)
+
+        washout_sequences, training_sequences = self._splitSequences(self.dataset, self.wtRatio)
+        state = (net._hid_layer, net.backprojectionFactor,
+                 washout_sequences, training_sequences, self.evalfunc)
+        processes = self.processes
+        if processes is None:
+            from multiprocessing import cpu_count
+            processes = cpu_count()
+        chunks = [chunk for chunk in array_split(range(len(genomes)), processes) if len(chunk)]
+        tasks = [tuple(w[chunk] for w in weights) for chunk in chunks]
+        if len(tasks) == 1:
+            _initWorker(state)
+            try:
+                results = list(map(_evaluateGenomes, tasks))
+            finally:
+                _initWorker(None)
+        else:
+            from multiprocessing import Pool
+            pool = Pool(len(tasks), _initWorker, (state,))
+            try:
+                results = pool.map(_evaluateGenomes, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        fitnesses = sum((f for f, _ in results), [])
+        Ws = concatenate([W for _, W in results])
+
+        best_fitness = -Infinity
+        for individual, genome, fitness, W in zip(individuals, genomes, fitnesses, Ws):
+            if self.verbosity > 1:
+                print(("Calculated fitness for individual", id(individual), " is ", fitness))
+            population.setIndividualFitness(individual, fitness)
+            if best_fitness < fitness:
+                best_fitness = fitness
+                best_genome = genome
+                best_W = W
+
+        net.reset()
+        net.setGenome(best_genome)
+        net.setOutputWeightMatrix(best_W)
+
+        # store fitness maximum to use it for triggering burst mutation
+        self.max_fitness = best_fitness
+
+
+
+
+
 class EvolinoSelection(Filter):
     """ Evolino's selection operator.
         Set its nParents attribute at any time.
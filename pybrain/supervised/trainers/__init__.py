@@ -1,3 +1,7 @@
 from pybrain.supervised.trainers.trainer import Trainer
 from pybrain.supervised.trainers.backprop import BackpropTrainer
-from pybrain.supervised.trainers.rprop import RPropMinusTrainer
+from pybrain.supervised.trainers.rprop import RPropMinusTrainer, IRpropPlusTrainer
+from pybrain.supervised.trainers.lbfgs import LBFGSTrainer, ConjugateGradientTrainer
+from pybrain.supervised.trainers.hessianfree import HessianFreeTrainer
+from pybrain.supervised.trainers.parallel import DataParallelTrainer
+from pybrain.supervised.trainers.checkpoint import Checkpointer
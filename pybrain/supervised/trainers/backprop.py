@@ -2,12 +2,18 @@ from __future__ import print_function
 
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import dot, argmax
+from scipy import dot, argmax, zeros
+from numpy import multiply, random
+from scipy.sparse import issparse
 from random import shuffle
 from math import isnan
 from pybrain.supervised.trainers.trainer import Trainer
 from pybrain.utilities import fListToString
 from pybrain.auxiliary import GradientDescent
+from pybrain.datasets.streaming import StreamingDataSet
+from pybrain.datasets.batchloader import BatchLoader
+from pybrain.structure.networks.recurrent import RecurrentNetworkComponent
+from pybrain.supervised.trainers.checkpoint import Checkpointer
 
 
 class BackpropTrainer(Trainer):
@@ -17,7 +23,8 @@ class BackpropTrainer(Trainer):
 
     def __init__(self, module, dataset=None, learningrate=0.01, lrdecay=1.0,
                  momentum=0., verbose=False, batchlearning=False,
-                 weightdecay=0.):
+                 weightdecay=0., minibatchsize=None, bpttchunk=None, bptthorizon=None,
+                 adaptive=None):
         """Create a BackpropTrainer to train the specified `module` on the
         specified `dataset`.
 
@@ -32,12 +39,32 @@ class BackpropTrainer(Trainer):
 
         `weightdecay` corresponds to the weightdecay rate, where 0 is no weight
         decay at all.
+
+        `adaptive` selects an adaptive learning rate for each parameter, one of
+        'adam', 'adagrad' and 'rmsprop', with the learning rate as the base
+        step size. The momentum is then not used.
+
+        If `minibatchsize` is given, the parameters of a non-sequential module
+        are updated once per minibatch of that many samples, drawn in random
+        order by a prefetching :class:`BatchLoader`.
+
+        If `bpttchunk` is given, recurrent networks are trained by truncated
+        backpropagation through time: the sequences are activated in chunks of
+        that many steps, carrying the state of the network across the chunks.
+        After each chunk, the errors of its steps are backpropagated through
+        the last `bptthorizon` steps (by default the chunk itself), and, unless
+        batch learning, the parameters are updated. Only the time steps within
+        the horizon are kept in the buffers of the network, so the memory used
+        does not depend on the length of the sequences.
         """
         Trainer.__init__(self, module)
         self.setData(dataset)
         self.verbose = verbose
         self.batchlearning = batchlearning
         self.weightdecay = weightdecay
+        self.minibatchsize = minibatchsize
+        self.bpttchunk = bpttchunk
+        self.bptthorizon = bptthorizon
         self.epoch = 0
         self.totalepochs = 0
         # set up gradient descender
@@ -45,41 +72,96 @@ class BackpropTrainer(Trainer):
         self.descent.alpha = learningrate
         self.descent.momentum = momentum
         self.descent.alphadecay = lrdecay
+        self.descent.adaptive = adaptive
+        # the steps are made directly on the parameters of the module
+        self.descent.inplace = True
         self.descent.init(module.params)
+        self._decay = zeros(module.paramdim)
 
     def train(self):
         """Train the associated module for one epoch."""
         assert len(self.ds) > 0, "Dataset cannot be empty."
+        if self.minibatchsize and not self.batchlearning:
+            return self._trainMinibatches()
         self.module.resetDerivatives()
         errors = 0
         ponderation = 0.
-        shuffledSequences = []
-        for seq in self.ds._provideSequences():
-            shuffledSequences.append(seq)
-        shuffle(shuffledSequences)
+        if isinstance(self.ds, StreamingDataSet):
+            # streamed samples are never materialized, the dataset's own
+            # shuffle buffer takes care of the ordering
+            shuffledSequences = self.ds._provideSequences()
+        else:
+            shuffledSequences = []
+            for seq in self.ds._provideSequences():
+                shuffledSequences.append(seq)
+            shuffle(shuffledSequences)
         for seq in shuffledSequences:
-            e, p = self._calcDerivs(seq)
-            errors += e
-            ponderation += p
-            if not self.batchlearning:
-                gradient = self.module.derivs - self.weightdecay * self.module.params
-                new = self.descent(gradient, errors)
-                if new is not None:
-                    self.module.params[:] = new
-                self.module.resetDerivatives()
+            if self.bpttchunk:
+                chunks = self._truncatedDerivs(seq)
+            else:
+                chunks = [self._calcDerivs(seq)]
+            for e, p in chunks:
+                errors += e
+                ponderation += p
+                if not self.batchlearning:
+                    self._updateParameters(errors)
+                    self.module.resetDerivatives()
 
         if self.verbose:
             print("Total error: {z: .12g}".format(z=errors / ponderation))
         if self.batchlearning:
-            self.module._setParameters(self.descent(self.module.derivs))
+            self._updateParameters(errors)
+        self.epoch += 1
+        self.totalepochs += 1
+        return errors / ponderation
+
+
+    def _trainMinibatches(self):
+        """Train the associated module for one epoch, doing one update per
+        minibatch."""
+        assert not self.module.sequential, \
+            "Minibatches cannot be used to train sequential modules."
+        fields = ['input', 'target']
+        if self.ds.hasField('importance'):
+            fields.append('importance')
+        errors = 0
+        ponderation = 0.
+        for batch in BatchLoader(self.ds, self.minibatchsize, fields=fields):
+            self.module.resetDerivatives()
+            for sample in zip(*batch):
+                e, p = self._calcDerivs([sample])
+                errors += e
+                ponderation += p
+            self._updateParameters(errors)
+        if self.verbose:
+            print("Total error: {z: .12g}".format(z=errors / ponderation))
         self.epoch += 1
         self.totalepochs += 1
         return errors / ponderation
 
+    def _updateParameters(self, error=None):
+        """Make a step of the gradient descent with the derivatives of the
+        module, from which the weight decay term is subtracted in place."""
+        if getattr(self.descent, 'inplace', False) and self.descent.values is not self.module.params:
+            # the module got a new parameter array, e.g. by _setParameters()
+            self.descent.values = self.module.params
+        gradient = self.module.derivs
+        if self.weightdecay:
+            gradient -= multiply(self.module.params, self.weightdecay, out=self._decay)
+        new = self.descent(gradient, error)
+        if new is not None and new is not self.module.params:
+            self.module.params[:] = new
 
     def _calcDerivs(self, seq):
         """Calculate error function and backpropagate output errors to yield
         the gradient."""
+        if self.bpttchunk:
+            error = 0
+            ponderation = 0.
+            for e, p in self._truncatedDerivs(seq):
+                error += e
+                ponderation += p
+            return error, ponderation
         self.module.reset()
         for sample in seq:
             self.module.activate(sample[0])
@@ -106,6 +188,97 @@ class BackpropTrainer(Trainer):
 
         return error, ponderation
 
+    def _calcDerivsBatch(self, inputs, targets, importance=None):
+        """Calculate the error on a batch of independent samples, given as the
+        rows of the arrays, and add the derivatives summed over the batch to
+        those of the module, which has to support batches in both directions
+        (see Module._batchable())."""
+        module = self.module
+        outputs = zeros((len(inputs), module.outdim))
+        module._forwardBatch(inputs, outputs)
+        outerr = targets - outputs
+        if importance is not None:
+            error = 0.5 * (importance * outerr ** 2).sum()
+            ponderation = importance.sum()
+            outerr *= importance
+        else:
+            error = 0.5 * (outerr ** 2).sum()
+            ponderation = float(outerr.size)
+        module._backwardBatch(outerr, zeros((len(inputs), module.indim)), outputs, inputs)
+        return error, ponderation
+
+    def _calcDatasetDerivs(self, dataset):
+        """Add the derivatives of the error on the whole dataset to those of
+        the module and return the error and the ponderation. Modules without
+        state, like feed-forward networks, are given up to `maxbatchsize`
+        samples at once."""
+        errors = 0
+        ponderation = 0.
+        if (self.module._batchable(backward=True) and not isinstance(dataset, StreamingDataSet)
+                and dataset.hasField('input') and not issparse(dataset.getField('input'))):
+            inputs = dataset.getField('input')
+            targets = dataset.getField('target')
+            importance = dataset.getField('importance') if dataset.hasField('importance') else None
+            for start in range(0, len(inputs), self.module.maxbatchsize):
+                stop = start + self.module.maxbatchsize
+                e, p = self._calcDerivsBatch(inputs[start:stop], targets[start:stop],
+                                             None if importance is None else importance[start:stop])
+                errors += e
+                ponderation += p
+        else:
+            for seq in dataset._provideSequences():
+                e, p = self._calcDerivs(seq)
+                errors += e
+                ponderation += p
+        return errors, ponderation
+
+    def _truncatedDerivs(self, seq):
+        """Activate the module on the sequence chunk by chunk and, after each
+        chunk, backpropagate its output errors through the last time steps.
+        Yields the error and ponderation of every chunk, as soon as its
+        derivatives have been added to those of the module."""
+        module = self.module
+        assert isinstance(module, RecurrentNetworkComponent), \
+            "Truncated backpropagation through time needs a recurrent network."
+        assert not module.forget, "Cannot back propagate a forgetful network"
+        chunksize = self.bpttchunk
+        horizon = max(self.bptthorizon or chunksize, chunksize)
+        module.reset()
+        for start in range(0, len(seq), chunksize):
+            chunk = seq[start:start + chunksize]
+            # drop the steps that are out of reach of the coming backward pass,
+            # except for the one the oldest reachable step depends on
+            drop = module.offset + len(chunk) - horizon - 1
+            if drop > 0:
+                module.shift(-drop)
+            for sample in chunk:
+                module.activate(sample[0])
+            end = module.offset
+            first = max(end - horizon, 0)
+            module._resetErrors()
+            error = 0
+            ponderation = 0.
+            for offset in range(end - 1, first - 1, -1):
+                if offset < end - len(chunk):
+                    module.backActivate(zeros(module.outdim))
+                    continue
+                sample = chunk[offset - end + len(chunk)]
+                outerr = sample[1] - module.outputbuffer[offset]
+                if len(sample) > 2:
+                    error += 0.5 * dot(sample[2], outerr ** 2)
+                    ponderation += sum(sample[2])
+                    module.backActivate(outerr * sample[2])
+                else:
+                    error += 0.5 * sum(outerr ** 2)
+                    ponderation += len(sample[1])
+                    module.backActivate(outerr)
+            if first > 0:
+                # the recurrent weights also act on the step before the horizon
+                for c in module.recurrentConns:
+                    c.backward(first - 1, first)
+            module.offset = end
+            yield error, ponderation
+
     def _checkGradient(self, dataset=None, silent=False):
         """Numeric check of the computed gradient for debugging purposes."""
         if dataset:
@@ -140,6 +313,11 @@ class BackpropTrainer(Trainer):
         if dataset == None:
             dataset = self.ds
         dataset.reset()
+        if not verbose and self.module._batchable() and dataset.hasField('input'):
+            # all samples at once, the sequences need not be fed one by one
+            totalError, ponderation = dataset._evaluateBatch(self.module)
+            assert ponderation > 0
+            return totalError / ponderation
         if verbose:
             print('\nTesting on data:')
         errors = []
@@ -172,6 +350,11 @@ class BackpropTrainer(Trainer):
         if dataset == None:
             dataset = self.ds
         dataset.reset()
+        if self.module._batchable() and not isinstance(dataset, StreamingDataSet):
+            out = self.module.activateBatch(dataset.getField('input')).argmax(axis=1).tolist()
+            if return_targets:
+                return out, dataset.getField('target').argmax(axis=1).tolist()
+            return out
         out = []
         targ = []
         for seq in dataset._provideSequences():
@@ -188,7 +371,7 @@ class BackpropTrainer(Trainer):
     def trainUntilConvergence(self, dataset=None, maxEpochs=None, verbose=None,
                               continueEpochs=10, validationProportion=0.25,
                               trainingData=None, validationData=None,
-                              convergence_threshold=10):
+                              convergence_threshold=10, checkpoint=None):
         """Train the module on the dataset until it converges.
 
         Return the module with the parameters that gave the minimal validation
@@ -202,7 +385,14 @@ class BackpropTrainer(Trainer):
 
         If maxEpochs is given, at most that many epochs
         are trained. Each time validation error hits a minimum, try for
-        continueEpochs epochs to find a better one."""
+        continueEpochs epochs to find a better one.
+
+        A :class:`Checkpointer` can be given as `checkpoint` to keep the
+        parameters of the last epochs and to write checkpoints to disk. If it
+        has loaded a checkpoint, training resumes from there."""
+        if checkpoint is None:
+            checkpoint = Checkpointer(self, size=0)
+        resume = checkpoint._loaded is not None
         epochs = 0
         if dataset is None:
             dataset = self.ds
@@ -210,18 +400,23 @@ class BackpropTrainer(Trainer):
             verbose = self.verbose
         if trainingData is None or validationData is None:
             # Split the dataset randomly: validationProportion of the samples for
-            # validation.
+            # validation. A resumed run has to make the same split.
+            if resume and checkpoint._presplit is not None:
+                random.set_state(checkpoint._presplit)
+            else:
+                checkpoint._presplit = random.get_state()
             trainingData, validationData = (
                 dataset.splitWithProportion(1 - validationProportion))
         if not (len(trainingData) > 0 and len(validationData)):
             raise ValueError("Provided dataset too small to be split into training " +
                              "and validation sets with proportion " + str(validationProportion))
         self.ds = trainingData
-        bestweights = self.module.params.copy()
-        bestverr = self.testOnData(validationData)
-        bestepoch = 0
-        self.trainingErrors = []
-        self.validationErrors = [bestverr]
+        if resume:
+            epochs = checkpoint._restore()
+        else:
+            checkpoint.clear()
+            self.trainingErrors = []
+            self.validationErrors = [self.testOnData(validationData)]
         while True:
             trainingError = self.train()
             validationError = self.testOnData(validationData)
@@ -229,14 +424,10 @@ class BackpropTrainer(Trainer):
                 raise Exception("Training produced NaN results")
             self.trainingErrors.append(trainingError)
             self.validationErrors.append(validationError)
-            if epochs == 0 or self.validationErrors[-1] < bestverr:
-                # one update is always done
-                bestverr = self.validationErrors[-1]
-                bestweights = self.module.params.copy()
-                bestepoch = epochs
+            # one update of the best parameters is always done
+            checkpoint.store(epochs, validationError)
 
             if maxEpochs != None and epochs >= maxEpochs:
-                self.module.params[:] = bestweights
                 break
             epochs += 1
 
@@ -246,12 +437,14 @@ class BackpropTrainer(Trainer):
                 old = self.validationErrors[-continueEpochs * 2:-continueEpochs]
                 new = self.validationErrors[-continueEpochs:]
                 if min(new) > max(old):
-                    self.module.params[:] = bestweights
                     break
                 lastnew = round(new[-1], convergence_threshold)
                 if sum(round(y, convergence_threshold) - lastnew for y in new) == 0:
-                    self.module.params[:] = bestweights
                     break
+            checkpoint.save(epochs)
+        self.module.params[:] = checkpoint.best
+        bestepoch = checkpoint.bestepoch
+        checkpoint.wait()
         #self.trainingErrors.append(self.testOnData(trainingData))
         self.ds = dataset
         if verbose:
@@ -0,0 +1,237 @@
+import os
+import json
+import random as pyrandom
+from threading import Thread
+try:
+    from queue import Queue, Empty, Full
+except ImportError:
+    from Queue import Queue, Empty, Full
+
+from numpy import zeros, ndarray, array, asarray, generic, load, savez, random, inf
+
+
+def _splitNumpyState(state):
+    """Split a state of the numpy random number generator into its key array
+    and the other values."""
+    return state[1], [state[0], state[2], state[3], state[4]]
+
+
+def _joinNumpyState(keys, values):
+    return (values[0], asarray(keys), values[1], values[2], values[3])
+
+
+class Checkpointer(object):
+    """ Keep the parameters of the last epochs of a trainer and the best
+        ones, and write checkpoints of the trainer to disk.
+
+        The parameters of the last `size` epochs are copied into a ring of
+        preallocated arrays, and the best ones (those with the lowest error)
+        into another array. If a `filename` is given, a checkpoint is written
+        every `interval` epochs: the state of the trainer, i.e. the parameters
+        of the module, the epoch counters, the errors so far, the state of its
+        GradientDescent and of the random number generators, as well as the
+        ring. The state is copied in the training thread and written by a
+        background thread into a numpy .npz file, which is replaced
+        atomically, so training is not slowed down by the disk and a crash
+        never leaves a broken checkpoint. When the disk cannot keep up, only
+        the latest pending checkpoint is written. An error while writing is
+        raised in the training thread by the next save(), wait() or close().
+
+        A checkpoint is resumed by load(), which restores the ring and
+        prepares the trainer to continue in the next call to
+        trainUntilConvergence() exactly where it stopped, given the same data.
+        """
+
+    def __init__(self, trainer, size=5, filename=None, interval=1):
+        """
+        :arg trainer: the trainer whose module's parameters are kept
+        :key size: number of epochs whose parameters are kept in memory
+        :key filename: file the checkpoints are written to, if any
+        :key interval: number of epochs between two checkpoints
+        """
+        self.trainer = trainer
+        self.size = size
+        self.filename = filename
+        self.interval = interval
+        paramdim = trainer.module.paramdim
+        self.snapshots = zeros((size, paramdim))
+        self.epochs = zeros(size, dtype=int)
+        self.errors = zeros(size)
+        self.best = zeros(paramdim)
+        self.clear()
+        self._loaded = None
+        self._presplit = None
+        self._queue = Queue(maxsize=1)
+        self._thread = None
+        self._error = None
+
+    def clear(self):
+        """ Forget all parameters stored so far. """
+        self.stored = 0
+        self.bestepoch = -1
+        self.besterror = inf
+
+    def store(self, epoch, error):
+        """ Copy the current parameters of the module into the ring, and keep
+            them as the best ones if the error is lower than all before. """
+        params = self.trainer.module.params
+        if self.size:
+            i = self.stored % self.size
+            self.snapshots[i] = params
+            self.epochs[i] = epoch
+            self.errors[i] = error
+        self.stored += 1
+        if error < self.besterror:
+            self.best[:] = params
+            self.besterror = error
+            self.bestepoch = epoch
+
+    def snapshot(self, age=0):
+        """ Return the parameters stored `age` epochs before the last one. """
+        assert age < min(self.stored, self.size), "Snapshot not kept."
+        return self.snapshots[(self.stored - 1 - age) % self.size]
+
+    def save(self, epochs, force=False):
+        """ Write a checkpoint after `epochs` epochs in the background, if
+            there is a file and a checkpoint is due (or `force` is set). """
+        if self.filename is None or not (force or epochs % self.interval == 0):
+            return
+        self._raiseError()
+        state = self._state(epochs)
+        if self._thread is None:
+            self._thread = Thread(target=self._write)
+            self._thread.daemon = True
+            self._thread.start()
+        try:
+            self._queue.put_nowait(state)
+        except Full:
+            # replace the checkpoint that has not been written yet
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except Empty:
+                pass
+            self._queue.put(state)
+
+    def wait(self):
+        """ Block until all checkpoints are written. """
+        self._queue.join()
+        self._raiseError()
+
+    def close(self):
+        """ Write the pending checkpoints and stop the background thread. """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._raiseError()
+
+    def _raiseError(self):
+        """ Raise the last error of the background thread, if any. """
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _write(self):
+        while True:
+            state = self._queue.get()
+            try:
+                if state is None:
+                    break
+                tmpname = self.filename + '.tmp'
+                with open(tmpname, 'wb') as f:
+                    savez(f, **state)
+                os.replace(tmpname, self.filename)
+            except Exception as e:
+                # keep the thread alive, the error is raised by the trainer
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _state(self, epochs):
+        """ Return copies of all arrays of the state, with the other values
+            as JSON in 'meta'. """
+        trainer = self.trainer
+        arrays = {'params': trainer.module.params.copy(),
+                  'snapshots': self.snapshots.copy(),
+                  'ringepochs': self.epochs.copy(),
+                  'ringerrors': self.errors.copy(),
+                  'best': self.best.copy(),
+                  'trainingErrors': array(getattr(trainer, 'trainingErrors', []), dtype=float),
+                  'validationErrors': array(getattr(trainer, 'validationErrors', []), dtype=float)}
+        descent = {}
+        for name, value in trainer.descent.__dict__.items():
+            if isinstance(value, ndarray):
+                arrays['descent_' + name] = value.copy()
+            else:
+                if isinstance(value, generic):
+                    value = value.item()
+                if value is None or isinstance(value, (bool, int, float, str)):
+                    descent[name] = value
+        keys, numpystate = _splitNumpyState(random.get_state())
+        arrays['numpykeys'] = keys
+        meta = {'epochs': epochs,
+                'epoch': trainer.epoch,
+                'totalepochs': trainer.totalepochs,
+                'stored': self.stored,
+                'bestepoch': self.bestepoch,
+                'besterror': self.besterror,
+                'descent': descent,
+                'pythonrandom': pyrandom.getstate(),
+                'numpyrandom': numpystate}
+        if self._presplit is not None:
+            keys, meta['presplit'] = _splitNumpyState(self._presplit)
+            arrays['presplitkeys'] = keys
+        arrays['meta'] = array(json.dumps(meta))
+        return arrays
+
+    def load(self, filename=None):
+        """ Read a checkpoint, by default from the file checkpoints are
+            written to. The ring and the best parameters are restored right
+            away, the trainer by the next trainUntilConvergence(). """
+        if filename is None:
+            filename = self.filename
+        with load(filename) as f:
+            arrays = dict((name, f[name]) for name in f.files)
+        meta = json.loads(str(arrays.pop('meta')))
+        self.snapshots[:] = arrays['snapshots']
+        self.epochs[:] = arrays['ringepochs']
+        self.errors[:] = arrays['ringerrors']
+        self.best[:] = arrays['best']
+        self.stored = meta['stored']
+        self.bestepoch = meta['bestepoch']
+        self.besterror = meta['besterror']
+        if 'presplit' in meta:
+            self._presplit = _joinNumpyState(arrays['presplitkeys'], meta['presplit'])
+        self._loaded = arrays, meta
+
+    def _restore(self):
+        """ Put the trainer into the state of the loaded checkpoint and return
+            the number of epochs done. """
+        arrays, meta = self._loaded
+        self._loaded = None
+        trainer = self.trainer
+        trainer.module.params[:] = arrays['params']
+        trainer.epoch = meta['epoch']
+        trainer.totalepochs = meta['totalepochs']
+        trainer.trainingErrors = arrays['trainingErrors'].tolist()
+        trainer.validationErrors = arrays['validationErrors'].tolist()
+        descent = trainer.descent
+        for name, value in meta['descent'].items():
+            setattr(descent, name, value)
+        for name, value in arrays.items():
+            if not name.startswith('descent_'):
+                continue
+            name = name[len('descent_'):]
+            current = getattr(descent, name, None)
+            if isinstance(current, ndarray) and current.shape == value.shape:
+                # keep arrays that are shared, e.g. with the module
+                current[...] = value
+            else:
+                setattr(descent, name, value.copy())
+        if hasattr(trainer, 'resetHistory'):
+            trainer.resetHistory()
+        version, state, gauss = meta['pythonrandom']
+        pyrandom.setstate((version, tuple(state), gauss))
+        random.set_state(_joinNumpyState(arrays['numpykeys'], meta['numpyrandom']))
+        return meta['epochs']
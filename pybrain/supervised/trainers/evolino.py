@@ -7,7 +7,7 @@ from numpy import Infinity
 from pybrain.supervised.trainers.trainer import Trainer
 from pybrain.supervised.evolino.population import EvolinoPopulation
 from pybrain.supervised.evolino.individual import EvolinoSubIndividual
-from pybrain.supervised.evolino.filter import EvolinoEvaluation, EvolinoSelection, EvolinoReproduction, EvolinoBurstMutation
+from pybrain.supervised.evolino.filter import EvolinoBatchEvaluation, EvolinoSelection, EvolinoReproduction, EvolinoBurstMutation
 from pybrain.supervised.evolino.gfilter import Randomization
 from pybrain.supervised.evolino.variate import CauchyVariate
 from pybrain.tools.kwargsprocessor import KWArgsProcessor
@@ -50,7 +50,9 @@ class EvolinoTrainer(Trainer):
             :key selection: Selection object for evolino
             :key reproduction: Reproduction object for evolino
             :key burstMutation: BurstMutation object for evolino
-            :key evaluation: Evaluation object for evolino
+            :key evaluation: Evaluation object for evolino. default=EvolinoBatchEvaluation(...)
+            :key processes: Number of worker processes the default evaluation spreads
+                              the individuals over. default=1
             :key verbosity: verbosity level
         """
         Trainer.__init__(self, evolino_network)
@@ -88,7 +90,7 @@ class EvolinoTrainer(Trainer):
         ap.add('selection', default=EvolinoSelection())
         ap.add('reproduction', default=EvolinoReproduction(mutationVariate=self.mutationVariate))
         ap.add('burstMutation', default=EvolinoBurstMutation())
-        ap.add('evaluation', default=EvolinoEvaluation(evolino_network, self.ds, **kwargs))
+        ap.add('evaluation', default=EvolinoBatchEvaluation(evolino_network, self.ds, **kwargs))
 
         self.selection.nParents = self.nParents
 
@@ -0,0 +1,168 @@
+from __future__ import print_function
+
+from scipy import dot, sqrt, zeros
+
+from pybrain.supervised.trainers.lbfgs import LBFGSTrainer
+
+
+class HessianFreeTrainer(LBFGSTrainer):
+    """ Train the parameters of a network by the truncated Newton method known
+        as Hessian-free optimization (Martens, 2010).
+
+        Every call to train() performs one Newton iteration on the full
+        training set: the damped Gauss-Newton system (G + lambda*I) d = -g is
+        solved approximately by conjugate gradient, and the step d is taken
+        if it decreases the error. The products with the Gauss-Newton matrix
+        G are computed exactly, with one R-operator pass and one backward
+        pass over the data each (see gaussNewtonProduct()), so the matrix is
+        never formed. The damping lambda is adapted by the ratio of the
+        actual reduction of the error and the one predicted by the quadratic
+        model.
+
+        The network has to support the R-operator, i.e. consist of the
+        standard layers, LSTM layers and full, linear or identity
+        connections. """
+
+    def __init__(self, module, dataset=None, damping=1., maxcgiterations=50, cgtolerance=1e-4,
+                 cgdecay=0.95, **kwargs):
+        """ Set up training algorithm parameters, and objects associated with the trainer.
+
+            :arg module: the network whose parameters should be trained.
+            :key dataset: the dataset to train on
+            :key damping: initial value of the Levenberg-Marquardt damping lambda (1.)
+            :key maxcgiterations: maximum number of conjugate gradient steps per iteration (50)
+            :key cgtolerance: the conjugate gradient solution is accepted once the residual
+                 has decreased by this factor relative to the gradient (1e-4)
+            :key cgdecay: the conjugate gradient run starts from the last step, scaled by this
+                 factor (0.95)
+
+            The other keyword arguments are passed on to :class:`LBFGSTrainer`.
+        """
+        LBFGSTrainer.__init__(self, module, dataset, **kwargs)
+        self.damping = damping
+        self.maxcgiterations = maxcgiterations
+        self.cgtolerance = cgtolerance
+        self.cgdecay = cgdecay
+
+    def resetHistory(self):
+        """ Forget the last step, which the next conjugate gradient run starts from. """
+        self._lastdirection = None
+        self._point = None
+
+    def gaussNewtonProduct(self, v, dataset=None):
+        """ Return the product of the Gauss-Newton approximation of the Hessian
+            of the error with the vector v, on the given dataset or the
+            trainer's one. The error is the one of train(), including the
+            weight decay term.
+
+            For each sequence, the outputs' directional derivatives along v
+            (the product J v of their Jacobian with v) are computed by an
+            R-operator pass, and backpropagated like output errors, which
+            yields J^T J v. For a softmax output layer, whose backward pass
+            implements the cross-entropy error, this amounts to the
+            Gauss-Newton matrix of the cross-entropy. """
+        if dataset is None:
+            dataset = self.ds
+        module = self.module
+        module.resetDerivatives()
+        ponderation = 0.
+        for seq in dataset._provideSequences():
+            module.reset()
+            for sample in seq:
+                module.activate(sample[0])
+            routputs = module.activateR(v, len(seq) if module.sequential else 1)
+            for offset, sample in reversed(list(enumerate(seq))):
+                routput = routputs[offset if module.sequential else 0]
+                if len(sample) > 2:
+                    ponderation += sum(sample[2])
+                    routput = routput * sample[2]
+                else:
+                    ponderation += len(sample[1])
+                module.backActivate(routput)
+        assert ponderation > 0, "Dataset cannot be empty."
+        return module.derivs / ponderation + self.weightdecay * v
+
+    def hessianProduct(self, v, epsilon=1e-6):
+        """ Return the product of the Hessian of the training error with the
+            vector v, approximated by central differences of the gradient
+            along v. This takes two gradient evaluations on the dataset. """
+        params = self.module.params.copy()
+        scale = epsilon / max(sqrt(dot(v, v)), 1e-12)
+        _, gplus = self._evaluate(params + scale * v)
+        _, gminus = self._evaluate(params - scale * v)
+        self.module._setParameters(params)
+        return (gplus - gminus) / (2 * scale)
+
+    def _solve(self, g):
+        """ Approximately solve the damped Gauss-Newton system for the step
+            by conjugate gradient. Returns the step and the damped curvature
+            matrix multiplied with it. """
+        product = lambda v: self.gaussNewtonProduct(v) + self.damping * v
+        if self._lastdirection is None:
+            d = zeros(len(g))
+            Ad = zeros(len(g))
+        else:
+            d = self.cgdecay * self._lastdirection
+            Ad = product(d)
+        r = -g - Ad
+        p = r.copy()
+        rr = dot(r, r)
+        tolerance = self.cgtolerance ** 2 * dot(g, g)
+        for _ in range(self.maxcgiterations):
+            if rr <= tolerance:
+                break
+            Ap = product(p)
+            pAp = dot(p, Ap)
+            if pAp <= 0:
+                break
+            alpha = rr / pAp
+            d += alpha * p
+            Ad += alpha * Ap
+            r -= alpha * Ap
+            rrnew = dot(r, r)
+            p = r + (rrnew / rr) * p
+            rr = rrnew
+        return d, Ad
+
+    def train(self):
+        """ Train the module by one Newton iteration and return the training
+            error at the new parameters. """
+        assert len(self.ds) > 0, "Dataset cannot be empty."
+        x, f, g = self._currentPoint()
+        if sqrt(dot(g, g)) > self.gtol:
+            d, Ad = self._solve(g)
+            gd = dot(g, d)
+            if gd >= 0:
+                # no descent direction, e.g. the solver stopped right away
+                d = -g / sqrt(dot(g, g))
+                Ad = None
+                gd = dot(g, d)
+            # reduction of the error predicted by the damped quadratic model
+            predicted = gd + 0.5 * dot(d, Ad) if Ad is not None else gd
+            step = 1.
+            for _ in range(self.maxlinesearch):
+                xnew = x + step * d
+                fnew, gnew = self._evaluate(xnew)
+                if fnew <= f + self.c1 * step * gd:
+                    break
+                step *= 0.8
+            else:
+                xnew, fnew, gnew = x, f, g
+            rho = (fnew - f) / predicted if predicted < 0 else 0.
+            if rho < 0.25:
+                self.damping *= 1.5
+            elif rho > 0.75:
+                self.damping *= 2. / 3.
+            if xnew is x:
+                self._lastdirection = None
+            else:
+                self._lastdirection = d
+            x, f, g = xnew, fnew, gnew
+        self.module._setParameters(x)
+        self._point = (self.ds, x.copy(), f, g)
+        if self.verbose:
+            print("epoch {epoch:6d}  total error {error:12.5g}   damping {damping:12.5g}".format(
+                epoch=self.epoch, error=f, damping=self.damping))
+        self.epoch += 1
+        self.totalepochs += 1
+        return f
@@ -0,0 +1,177 @@
+from __future__ import print_function
+
+from scipy import dot, sqrt
+
+from pybrain.supervised.trainers.backprop import BackpropTrainer
+
+
+class LBFGSTrainer(BackpropTrainer):
+    """ Train the parameters of a module by limited-memory BFGS on the full
+        training set.
+
+        Every call to train() performs one quasi-Newton iteration: the error
+        and its gradient are evaluated over the whole dataset by
+        backpropagation, a search direction is computed from the curvature
+        pairs of the last iterations, and a backtracking line search along it
+        determines the step. The curvature history is kept between the calls,
+        so trainEpochs() and trainUntilConvergence() work as for the other
+        trainers, one iteration counting as one epoch.
+
+        The minimized error is the one reported by BackpropTrainer, i.e. the
+        summed squared error per output value, plus the weight decay term. """
+
+    def __init__(self, module, dataset=None, memory=10, c1=1e-4, maxlinesearch=20, gtol=1e-10, **kwargs):
+        """ Set up training algorithm parameters, and objects associated with the trainer.
+
+            :arg module: the module whose parameters should be trained.
+            :key dataset: the dataset to train on
+            :key memory: number of curvature pairs the inverse Hessian is approximated from (10)
+            :key c1: sufficient decrease constant of the line search (1e-4)
+            :key maxlinesearch: maximum number of step reductions per iteration (20)
+            :key gtol: no step is made once the norm of the gradient is below (1e-10)
+
+            The other keyword arguments are passed on to :class:`BackpropTrainer`.
+        """
+        BackpropTrainer.__init__(self, module, dataset, **kwargs)
+        self.memory = memory
+        self.c1 = c1
+        self.maxlinesearch = maxlinesearch
+        self.gtol = gtol
+        self.resetHistory()
+
+    def resetHistory(self):
+        """ Forget the curvature information gathered so far. """
+        self._pairs = []
+        self._step = None
+        self._point = None
+
+    def _evaluate(self, params):
+        """ Return the error of the module with the given parameters on the
+            whole dataset, and its gradient. """
+        self.module._setParameters(params)
+        self.module.resetDerivatives()
+        errors, ponderation = self._calcDatasetDerivs(self.ds)
+        assert ponderation > 0, "Dataset cannot be empty."
+        # the derivatives point uphill with respect to the target, i.e. downhill for the error
+        grad = -self.module.derivs / ponderation + self.weightdecay * params
+        error = errors / ponderation + 0.5 * self.weightdecay * dot(params, params)
+        return error, grad
+
+    def _currentPoint(self):
+        """ Return the parameters with their error and gradient, reusing the
+            values from the last iteration if neither the parameters nor the
+            dataset have changed since. """
+        params = self.module.params.copy()
+        if self._point is not None:
+            ds, x, f, g = self._point
+            if ds is self.ds and (x == params).all():
+                return x, f, g
+        f, g = self._evaluate(params)
+        return params, f, g
+
+    def _direction(self, g):
+        """ Two-loop recursion: multiply the negative gradient by the current
+            approximation of the inverse Hessian. """
+        q = -g
+        alphas = []
+        for s, y, rho in reversed(self._pairs):
+            a = rho * dot(s, q)
+            q -= a * y
+            alphas.append(a)
+        if self._pairs:
+            s, y, _ = self._pairs[-1]
+            q *= dot(s, y) / dot(y, y)
+        for (s, y, rho), a in zip(self._pairs, reversed(alphas)):
+            b = rho * dot(y, q)
+            q += (a - b) * s
+        return q
+
+    def _initialStep(self, g, d):
+        if self._pairs:
+            return 1.
+        # without curvature information the direction is the plain gradient
+        return min(1., 1. / sqrt(dot(g, g)))
+
+    def _update(self, s, y, g, d):
+        sy = dot(s, y)
+        if sy > 1e-10 * dot(y, y):
+            self._pairs.append((s, y, 1. / sy))
+            if len(self._pairs) > self.memory:
+                self._pairs.pop(0)
+
+    def train(self):
+        """ Train the module by one quasi-Newton iteration and return the
+            training error at the new parameters. """
+        assert len(self.ds) > 0, "Dataset cannot be empty."
+        x, f, g = self._currentPoint()
+        if sqrt(dot(g, g)) > self.gtol:
+            d = self._direction(g)
+            gd = dot(g, d)
+            if gd >= 0:
+                # not a descent direction: start over from the gradient
+                self.resetHistory()
+                d = -g
+                gd = -dot(g, g)
+            step = self._initialStep(g, d)
+            for _ in range(self.maxlinesearch):
+                xnew = x + step * d
+                fnew, gnew = self._evaluate(xnew)
+                if fnew <= f + self.c1 * step * gd:
+                    break
+                # minimum of the quadratic through f, gd and fnew, safeguarded
+                trial = -gd * step ** 2 / (2 * (fnew - f - gd * step))
+                if not trial > 0:
+                    # e.g. the error overflowed
+                    trial = 0.1 * step
+                step = min(max(trial, 0.1 * step), 0.5 * step)
+            else:
+                # no sufficient decrease found, stay where we are
+                self.resetHistory()
+                xnew, fnew, gnew = x, f, g
+            if xnew is not x:
+                self._update(xnew - x, gnew - g, g, d)
+                self._step = step
+            x, f, g = xnew, fnew, gnew
+        self.module._setParameters(x)
+        self._point = (self.ds, x.copy(), f, g)
+        if self.verbose:
+            print("epoch {epoch:6d}  total error {error:12.5g}   gradient norm {norm:12.5g}".format(
+                epoch=self.epoch, error=f, norm=sqrt(dot(g, g))))
+        self.epoch += 1
+        self.totalepochs += 1
+        return f
+
+
+class ConjugateGradientTrainer(LBFGSTrainer):
+    """ Train the parameters of a module by nonlinear conjugate gradient
+        (Polak-Ribiere with restarts) on the full training set.
+
+        Needs less memory than :class:`LBFGSTrainer`, but usually more
+        iterations. See there for the use of train(). """
+
+    def __init__(self, module, dataset=None, **kwargs):
+        """ Same arguments as :class:`LBFGSTrainer`, except for `memory`. """
+        LBFGSTrainer.__init__(self, module, dataset, memory=0, **kwargs)
+
+    def resetHistory(self):
+        self._d = None
+        self._g = None
+        self._step = None
+        self._point = None
+
+    def _direction(self, g):
+        if self._d is None:
+            return -g
+        # PR+ restarts from the gradient when beta would become negative
+        beta = max(0., dot(g, g - self._g) / dot(self._g, self._g))
+        return -g + beta * self._d
+
+    def _initialStep(self, g, d):
+        if self._d is None:
+            return min(1., 1. / sqrt(dot(g, g)))
+        # assume the same first-order change as in the last iteration
+        return self._step * dot(self._g, self._d) / dot(g, d)
+
+    def _update(self, s, y, g, d):
+        self._d = d
+        self._g = g
@@ -0,0 +1,163 @@
+from __future__ import print_function
+
+from itertools import islice
+from multiprocessing import Process, Pipe, RawArray, cpu_count
+
+from numpy import frombuffer, array_split, arange, random
+
+from pybrain.supervised.trainers.backprop import BackpropTrainer
+from pybrain.datasets.streaming import StreamingDataSet
+from pybrain.datasets.shared import SharedDataSet
+
+
+def _work(conn, module, shared, start, stop, rawparams, rawderivs, rank):
+    """ Main loop of a worker process: compute the derivatives on the
+        sequences start to stop of the shared dataset, or train on them in
+        Hogwild mode, whenever the master asks to. """
+    dataset = shared.attach()
+    sequences = list(islice(dataset._provideSequences(), start, stop))
+    paramdim = len(rawparams)
+    # the clone of the network works on the shared parameters and writes its
+    # derivatives into its own slot of the shared derivatives
+    module._setParameters(frombuffer(rawparams))
+    module._setDerivatives(frombuffer(rawderivs)[rank * paramdim:(rank + 1) * paramdim])
+    trainer = BackpropTrainer(module)
+    while True:
+        command = conn.recv()
+        if command is None:
+            break
+        errors = 0.
+        ponderation = 0.
+        if command[0] == 'derivs':
+            module.resetDerivatives()
+            for seq in sequences:
+                e, p = trainer._calcDerivs(seq)
+                errors += e
+                ponderation += p
+        else:
+            _, alpha, weightdecay, seed = command
+            random.seed(seed)
+            params = module.params
+            for i in random.permutation(len(sequences)):
+                module.resetDerivatives()
+                e, p = trainer._calcDerivs(sequences[i])
+                errors += e
+                ponderation += p
+                # lock-free update of the parameters shared by all workers
+                params += alpha * (module.derivs - weightdecay * params)
+        conn.send((errors, ponderation))
+    conn.close()
+
+
+class DataParallelTrainer(BackpropTrainer):
+    """ Trainer that computes the gradient on several processes at once.
+
+        The sequences of the dataset are split into one contiguous shard per
+        worker process. Every worker holds a clone of the module whose
+        parameters are a view on a shared memory array, and reads its shard
+        from a :class:`SharedDataSet`.
+
+        By default, training is synchronous: in each epoch, the workers
+        compute the derivatives on their shards, these are summed up into the
+        derivatives of the module, and the trainer's GradientDescent makes one
+        step, as with batch learning or :class:`RPropMinusTrainer`. The result
+        is the same as when training on a single process.
+
+        In Hogwild mode, the workers instead do online gradient descent on
+        their shards and update the shared parameters without any locking
+        (Niu et al., 2011). This usually converges like online learning,
+        while scaling with the number of processes, but is not deterministic.
+
+        The worker processes are started with the first epoch and run until
+        close() is called, or a new dataset is trained on. """
+
+    def __init__(self, module, dataset=None, processes=None, hogwild=False, rprop=False, **kwargs):
+        """ Create a trainer for the specified `module` and `dataset`.
+
+            :key processes: number of worker processes, defaults to the number of CPUs
+            :key hogwild: train asynchronously with lock-free parameter updates (False)
+            :key rprop: make the synchronous steps with RProp- instead of gradient
+                        descent, using the settings of :class:`RPropMinusTrainer` (False)
+
+            The other keyword arguments are passed on to :class:`BackpropTrainer`.
+            The learning rate and its decay are used in both modes, the
+            momentum only by synchronous steps.
+        """
+        BackpropTrainer.__init__(self, module, dataset, **kwargs)
+        self.processes = processes or cpu_count()
+        self.hogwild = hogwild
+        if rprop:
+            assert not hogwild, "RProp needs the full gradient, it cannot be used with Hogwild."
+            self.descent.rprop = True
+            self.descent.deltamin = 1.0e-6
+            self.descent.init(module.params)
+        self._workers = []
+        self._workerds = None
+
+    def _startWorkers(self):
+        if self._workers and self._workerds is self.ds:
+            return
+        self.close()
+        dataset = self.ds
+        assert not isinstance(dataset, StreamingDataSet), \
+            "A StreamingDataSet cannot be shared with worker processes."
+        if hasattr(dataset, 'getNumSequences'):
+            nsequences = dataset.getNumSequences()
+        else:
+            nsequences = len(dataset)
+        paramdim = self.module.paramdim
+        nworkers = min(self.processes, nsequences)
+        self._shared = SharedDataSet(dataset)
+        self._rawparams = RawArray('d', paramdim)
+        self._rawderivs = RawArray('d', nworkers * paramdim)
+        self._params = frombuffer(self._rawparams)
+        self._derivs = frombuffer(self._rawderivs).reshape(nworkers, paramdim)
+        for rank, shard in enumerate(array_split(arange(nsequences), nworkers)):
+            conn, childconn = Pipe()
+            p = Process(target=_work, args=(childconn, self.module, self._shared, shard[0],
+                                            shard[-1] + 1, self._rawparams, self._rawderivs, rank))
+            p.daemon = True
+            p.start()
+            self._workers.append((p, conn))
+        self._workerds = dataset
+
+    def close(self):
+        """ Stop the worker processes and free the shared dataset. """
+        for p, conn in self._workers:
+            conn.send(None)
+        for p, conn in self._workers:
+            p.join()
+            conn.close()
+        if self._workers:
+            self._shared.unlink()
+        self._workers = []
+        self._workerds = None
+
+    def _collect(self, command):
+        for _, conn in self._workers:
+            conn.send(command)
+        results = [conn.recv() for _, conn in self._workers]
+        return sum(e for e, _ in results), sum(p for _, p in results)
+
+    def train(self):
+        """ Train the associated module for one epoch. """
+        assert len(self.ds) > 0, "Dataset cannot be empty."
+        self._startWorkers()
+        self._params[:] = self.module.params
+        if self.hogwild:
+            alpha = self.descent.alpha
+            errors, ponderation = self._collect(('hogwild', alpha, self.weightdecay,
+                                                 random.randint(2 ** 31)))
+            self.module.params[:] = self._params
+            if self.descent.values is not self.module.params:
+                self.descent.values[:] = self.module.params
+            self.descent.alpha *= self.descent.alphadecay
+        else:
+            errors, ponderation = self._collect(('derivs',))
+            self._derivs.sum(axis=0, out=self.module.derivs)
+            self._updateParameters()
+        if self.verbose:
+            print("Total error: {z: .12g}".format(z=errors / ponderation))
+        self.epoch += 1
+        self.totalepochs += 1
+        return errors / ponderation
@@ -6,6 +6,7 @@ __author__ = 'Martin Felder'
 from scipy import sqrt
 
 from pybrain.supervised.trainers import BackpropTrainer
+from pybrain.auxiliary.gradientdescent import IRpropPlus
 
 
 class RPropMinusTrainer(BackpropTrainer):
@@ -38,20 +39,30 @@ class RPropMinusTrainer(BackpropTrainer):
     def train(self):
         """ Train the network for one epoch """
         self.module.resetDerivatives()
-        errors = 0
-        ponderation = 0
-        for seq in self.ds._provideSequences():
-            e, p = self._calcDerivs(seq)
-            errors += e
-            ponderation += p
+        errors, ponderation = self._calcDatasetDerivs(self.ds)
         if self.verbose:
             print(("epoch {epoch:6d}  total error {error:12.5g}   avg weight  {weight:12.5g}".format(
                 epoch=self.epoch,
                 error=errors / ponderation,
                 weight=sqrt((self.module.params ** 2).mean()))))
-        self.module._setParameters(self.descent(self.module.derivs - self.weightdecay * self.module.params))
+        self._updateParameters(errors)
         self.epoch += 1
         self.totalepochs += 1
         return errors / ponderation
 
 
+class IRpropPlusTrainer(RPropMinusTrainer):
+    """ Train the parameters of a module like :class:`RPropMinusTrainer`, but
+        by iRprop+, i.e. with weight backtracking: where the sign of a
+        derivative changes while the error has increased, the last step of
+        the parameter is reverted (cf. [Igel&Huesken, Neurocomputing 50, 2003]).
+        """
+
+    def __init__(self, module, etaminus=0.5, etaplus=1.2, deltamin=1.0e-6, deltamax=5.0, delta0=0.1, **kwargs):
+        """ Same arguments as :class:`RPropMinusTrainer`. """
+        # the RProp setup of RPropMinusTrainer is replaced by the descent below
+        BackpropTrainer.__init__(self, module, **kwargs)
+        self.descent = IRpropPlus(upfactor=etaplus, downfactor=etaminus, bound=deltamax,
+                                  deltamin=deltamin, delta0=delta0)
+        self.descent.inplace = True
+        self.descent.init(module.params)
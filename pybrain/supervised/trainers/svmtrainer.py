@@ -10,9 +10,22 @@ except ImportError:
     raise ImportError("Cannot find LIBSVM installation. Make sure svm.py and svmc.* are in the PYTHONPATH!")
 
 from numpy import * #@UnusedWildImport
+from functools import cmp_to_key
+from multiprocessing import get_context
 import logging
 
 
+# the grid search object inside the worker processes of a parallel search
+_search = None
+
+def _initWorker(search):
+    global _search
+    _search = search
+
+def _scoreJob(point):
+    return _search._score(*point)
+
+
 class SVMTrainer(object):
     """A class performing supervised learning of a DataSet by an SVM unit. See 
     the remarks on :class:`SVMUnit` above. This whole class is a bit of a hack,
@@ -36,6 +49,7 @@ class SVMTrainer(object):
         self.svmtarget = dataset['target'].flatten()
         self.plot = plot
         self.searchlog = 'gridsearch_results.txt'
+        self.processes = 1
         # set default parameters for training
         self.params = {
             'kernel_type':RBF
@@ -51,6 +65,7 @@ class SVMTrainer(object):
         :key log2g: base 2 log of the RBF width parameter
         :key log2C: base 2 log of the slack parameter
         :key searchlog: filename into which to dump the search log
+        :key processes: number of worker processes for the grid search
         :key others: ...are passed through to the grid search and/or libsvm 
         """
         
@@ -58,7 +73,7 @@ class SVMTrainer(object):
         problem = svm_problem(self.ds['target'].flatten(), self.ds['input'].tolist())
         if search:
             # this is a bit of a hack...
-            model = eval(search + "(problem, self.svmtarget, cmin=[0,-7],cmax=[25,1], cstep=[0.5,0.2],plotflag=self.plot,searchlog=self.searchlog,**self.params)")
+            model = eval(search + "(problem, self.svmtarget, cmin=[0,-7],cmax=[25,1], cstep=[0.5,0.2],plotflag=self.plot,searchlog=self.searchlog,processes=self.processes,**self.params)")
         else:
             param = svm_parameter(**self.params)
             model = svm_model(problem, param)
@@ -81,7 +96,9 @@ class SVMTrainer(object):
         """ Set parameters for SVM training. Apart from the ones below, you can use all parameters 
         defined for the LIBSVM svm_model class, see their documentation.
 
-        :key searchlog: Save a list of coordinates and the achieved CV accuracy to this file."""
+        :key searchlog: Save a list of coordinates and the achieved CV accuracy to this file.
+        :key processes: number of worker processes the grid search distributes the
+            cross-validation runs over, None for one per CPU."""
         if 'weight' in kwargs:
             self.params['nr_weight'] = len(kwargs['weight'])
         if 'log2C' in kwargs:
@@ -93,6 +110,8 @@ class SVMTrainer(object):
         if 'searchlog' in kwargs:
             self.searchlog = kwargs['searchlog']
             kwargs.pop('searchlog')
+        if 'processes' in kwargs:
+            self.processes = kwargs.pop('processes')
         self.params.update(kwargs)
 
         
@@ -105,7 +124,7 @@ class GridSearch(svm_model):
     allScores = []
     
     def __init__(self, problem, targets, cmin, cmax, cstep=None, crossval=5,
-                 plotflag=False, maxdepth=8, searchlog='gridsearch_results.txt', **params):
+                 plotflag=False, maxdepth=8, searchlog='gridsearch_results.txt', processes=1, **params):
         """ Set up (log) grid search over the two RBF kernel parameters C and gamma.
 
         :arg problem: the LIBSVM svm_problem to be optimized, ie. the input and target data
@@ -117,6 +136,8 @@ class GridSearch(svm_model):
         :key plotflag: if True, plot the error surface contour (regular) or search pattern (DOE)
         :key maxdepth: maximum window bisection depth (DOE only)
         :key searchlog: Save a list of coordinates and the achieved CV accuracy to this file
+        :key processes: number of worker processes running the cross-validations, None for
+            one per CPU. The workers are forked from the current process and inherit the problem.
         :key others: ...are passed through to the cross_validation method of LIBSVM
         """
         self.nPars = len(cmin)
@@ -142,7 +163,17 @@ class GridSearch(svm_model):
         self.resfile = open(searchlog, 'w')
 
         # do the parameter searching
-        param = self.search()
+        self._pool = None
+        if processes != 1:
+            # the workers inherit the problem and the open log file by forking
+            self._pool = get_context('fork').Pool(processes, _initWorker, (self,))
+        try:
+            param = self.search()
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
         
         if self.plotflag: 
             p.ioff()
@@ -156,24 +187,39 @@ class GridSearch(svm_model):
         if 'weight' in kwargs:
             self.params['nr_weight'] = len(kwargs['weight'])
         self.params.update(kwargs)
+
+    def _score(self, c, g):
+        """ run cross-validation for a single point and return the fraction of correct results """
+        params = dict(self.params, C=2 ** c, gamma=2 ** g)
+        cvresult = array(cross_validation(self.problem, svm_parameter(**params), self.crossval))
+        corr, = where(cvresult == self.targets)
+        return float(corr.size) / self.targets.size
+
+    def _scores(self, points):
+        """ yield the scores of a list of (log2C, log2g) points in their order; with a worker pool,
+        the points are evaluated concurrently while the earlier results are being consumed """
+        if self._pool is None:
+            for c, g in points:
+                yield self._score(c, g)
+        else:
+            for score in self._pool.imap(_scoreJob, points):
+                yield score
     
     def search(self):
         """ iterate successive parameter grid refinement and evaluation; adapted from LIBSVM grid search tool """
         jobs = self.calculate_jobs()
+        points = [point for line in jobs for point in line]
+        # the plot is updated whenever the points of a line are complete
+        lineends = set(cumsum([len(line) for line in jobs]))
         scores = []
-        for line in jobs:
-            for (c, g) in line:
-                # run cross-validation for this point
-                self.setParams(C=2 ** c, gamma=2 ** g)
-                param = svm_parameter(**self.params)
-                cvresult = array(cross_validation(self.problem, param, self.crossval))
-                corr, = where(cvresult == self.targets)
-                res = (c, g, float(corr.size) / self.targets.size)                
-                scores.append(res)
-                self._save_points(res)
-            self._redraw(scores)
+        for (c, g), score in zip(points, self._scores(points)):
+            res = (c, g, score)
+            scores.append(res)
+            self._save_points(res)
+            if self.plotflag and len(scores) in lineends:
+                self._redraw(scores)
         scores = array(scores)
-        best = scores[scores[:, 0].argmax(), 1:]
+        best = scores[scores[:, 2].argmax(), :2]
         self.setParams(C=2 ** best[0], gamma=2 ** best[1])
         logging.info("best log2C=%12.7g, log2g=%11.7g " % (best[0], best[1]))
         param = svm_parameter(**self.params)
@@ -243,8 +289,8 @@ class GridSearch(svm_model):
         
     def _redraw(self, db, tofile=0, eta=None):
         """ redraw the updated grid interactively """
-        import pylab as p 
         if len(db) <= 3 or not self.plotflag: return
+        import pylab as p 
         #begin_level = round(max(map(lambda(x):x[2],db))) - 3
         #step_size = 0.25
         nContours = 25
@@ -257,12 +303,12 @@ class GridSearch(svm_model):
             if x[1] > y[1]: return - 1
             if x[1] < y[1]: return 1
             return 0
-        db.sort(cmp)
+        db.sort(key=cmp_to_key(cmp))
         dbarr = p.asarray(db)
         # reconstruct grid: array is ordered along first and second dimension
         x = dbarr[:, 0]
         dimy = len(x[x == x[0]])
-        dimx = x.size / dimy
+        dimx = x.size // dimy
         print(('plotting: ', dimx, dimy))
         x = x.reshape(dimx, dimy)
         y = dbarr[:, 1]
@@ -314,26 +360,19 @@ class GridSearchDOE(GridSearch):
         points = self.refineGrid(cmin, cmax)
         
         # calculate scores for all grid points using n-fold cross-validation
-        scores = []
+        scores = zeros(self.nPts)
         isnew = array([True] * self.nPts)
         for i in range(self.nPts):
             idx = self._findIndex(points[i, :])
             if idx >= 0:
                 # point already exists
                 isnew[i] = False
-                scores.append(self.allScores[idx])
-            else: 
-                # new point, run cross-validation
-                self.setParams(C=2 ** points[i, 0], gamma=2 ** points[i, 1])
-                param = svm_parameter(**self.params)
-                cvresult = array(cross_validation(self.problem, param, self.crossval))
-                # save cross validation result as "% correct" 
-                corr, = where(cvresult == self.targets)
-                corr = float(corr.size) / self.targets.size
-                scores.append(corr)
-                self._save_points((points[i, 0], points[i, 1], corr))
-
-        scores = array(scores)
+                scores[i] = self.allScores[idx]
+        # run cross-validation for the new points; save result as "% correct"
+        newidx, = where(isnew)
+        for i, corr in zip(newidx, self._scores([tuple(points[i, :]) for i in newidx])):
+            scores[i] = corr
+            self._save_points((points[i, 0], points[i, 1], corr))
         
         # find max and new ranges by halving the old ones, whereby
         # entire search region must lie within original search range
@@ -0,0 +1,71 @@
+"""
+    >>> from scipy import array, zeros
+    >>> from pybrain.auxiliary import GradientDescent
+
+With `inplace` set, the steps are made on the array given to init() itself:
+
+    >>> values = zeros(3)
+    >>> gd = GradientDescent()
+    >>> gd.inplace = True
+    >>> gd.init(values)
+    >>> gd(array([1., 2., 3.])) is values
+    True
+    >>> values.tolist()
+    [0.1, 0.2, 0.30000000000000004]
+
+The first step of Adam has the size of the learning rate in every direction,
+whatever the scale of the gradient:
+
+    >>> gd = GradientDescent()
+    >>> gd.adaptive = 'adam'
+    >>> gd.alpha = 0.01
+    >>> gd.init(zeros(3))
+    >>> [round(x, 6) for x in gd(array([1e-3, -2., 100.]))]
+    [0.01, -0.01, 0.01]
+
+AdaGrad divides by the root of the summed squared gradients, so its steps
+shrink when the gradient stays the same:
+
+    >>> gd = GradientDescent()
+    >>> gd.adaptive = 'adagrad'
+    >>> gd.init(zeros(1))
+    >>> steps = [gd(array([4.]))[0] for _ in range(4)]
+    >>> [round(b - a, 6) for a, b in zip([0.] + steps, steps)]
+    [0.1, 0.070711, 0.057735, 0.05]
+
+Training with RMSProp:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> from scipy import random
+    >>> random.seed(3)
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> for x, y in [([0, 0], [0]), ([0, 1], [1]), ([1, 0], [1]), ([1, 1], [0])]:
+    ...     ds.addSample(x, y)
+    >>> n = buildNetwork(2, 3, 1)
+    >>> t = BackpropTrainer(n, ds, adaptive='rmsprop', learningrate=0.02, batchlearning=True)
+    >>> errors = [t.train() for _ in range(300)]
+    >>> errors[-1] < 0.01
+    True
+
+The trainers follow the module to a new parameter array, whose values are
+then trained further:
+
+    >>> from pybrain.supervised.trainers import RPropMinusTrainer
+    >>> for trainer in BackpropTrainer, RPropMinusTrainer:
+    ...     n = buildNetwork(2, 3, 1)
+    ...     t = trainer(n, dataset=ds, batchlearning=True)
+    ...     n._setParameters(n.params + 5)
+    ...     start = n.params.copy()
+    ...     _ = t.train()
+    ...     print(t.descent.values is n.params, 0 < abs(n.params - start).max() < 1)
+    True True
+    True True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
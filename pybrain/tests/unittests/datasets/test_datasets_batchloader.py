@@ -0,0 +1,48 @@
+"""
+    >>> from scipy import arange, concatenate
+    >>> from pybrain.datasets import SupervisedDataSet, BatchLoader
+    >>> ds = SupervisedDataSet(arange(22.).reshape(11, 2), arange(11.).reshape(11, 1))
+
+randomBatches delivers every batch exactly once, in random order:
+
+    >>> batches = list(ds.randomBatches('target', 3))
+    >>> sorted(len(b) for b in batches)
+    [2, 3, 3, 3]
+    >>> sorted(concatenate(batches).flatten().tolist()) == list(range(11))
+    True
+
+The loader yields linked input and target batches:
+
+    >>> loader = BatchLoader(ds, 4)
+    >>> len(loader)
+    3
+    >>> batches = list(loader)
+    >>> [len(inp) for inp, tar in batches]
+    [4, 4, 3]
+    >>> all((inp[:, 0] == 2 * tar[:, 0]).all() for inp, tar in batches)
+    True
+    >>> sorted(concatenate([tar for inp, tar in batches]).flatten().tolist()) == list(range(11))
+    True
+
+Without shuffling and copying, the batches are views on the dataset:
+
+    >>> loader = BatchLoader(ds, 4, shuffle=False, contiguous=False, droplast=True)
+    >>> [tar.flatten().tolist() for inp, tar in loader]
+    [[0.0, 1.0, 2.0, 3.0], [4.0, 5.0, 6.0, 7.0]]
+    >>> from numpy import shares_memory
+    >>> shares_memory(next(iter(loader))[0], ds.data['input'])
+    True
+
+Minibatch training with the BackpropTrainer:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> trainer = BackpropTrainer(buildNetwork(2, 3, 1), ds, minibatchsize=4)
+    >>> err = trainer.train()
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,37 @@
+"""
+Class targets can be converted to a compact 1-of-k view, which only stores the
+class numbers and expands rows when they are accessed:
+
+    >>> from scipy import array
+    >>> from pybrain.datasets import ClassificationDataSet
+    >>> d = ClassificationDataSet(2, 1, nb_classes=3)
+    >>> for inp, cls in [((0.1, 0.5), 0), ((1.2, 1.2), 1), ((1.4, 1.6), 1),
+    ...                  ((0.1, 0.8), 2), ((0.2, 0.9), 2)]:
+    ...     d.appendLinked(inp, [cls])
+    >>> d._convertToOneOfMany(compact=True)
+    >>> d.outdim
+    3
+    >>> d['target'][1]
+    array([0, 1, 0])
+    >>> d['target'][3:].argmax(axis=1)
+    array([2, 2])
+    >>> array(d['target'][:2])
+    array([[1, 0, 0],
+           [0, 1, 0]])
+
+Validation works on the class numbers directly:
+
+    >>> from pybrain.tools.validation import Validator
+    >>> output = array([[0.8, 0.1, 0.1], [0.2, 0.7, 0.1], [0.6, 0.3, 0.1],
+    ...                 [0.1, 0.1, 0.8], [0.3, 0.3, 0.4]])
+    >>> Validator.classificationPerformance(output, d['target'])
+    0.8
+    >>> abs(Validator.MSE(output, d['target']) - Validator.MSE(output, array(d['target']))) < 1e-12
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,46 @@
+"""
+Files in LIBSVM/SVMlight format can be read into dense or sparse inputs.
+
+    >>> from io import StringIO
+    >>> from pybrain.datasets import ClassificationDataSet
+    >>> text = '1 3:2.5 1:1\\n0 2:-1 # comment\\n\\n1 qid:4 4:0.5\\n'
+
+    >>> ds = ClassificationDataSet.load_libsvm(StringIO(text))
+    >>> ds['input']
+    array([[ 1. ,  0. ,  2.5,  0. ],
+           [ 0. , -1. ,  0. ,  0. ],
+           [ 0. ,  0. ,  0. ,  0.5]])
+    >>> ds['target'].ravel().tolist()
+    [1, 0, 1]
+
+With `sparse` set, the input field is a CSR matrix:
+
+    >>> ds = ClassificationDataSet.load_libsvm(StringIO(text), sparse=True, nfeatures=1000)
+    >>> ds['input'].format, ds['input'].shape, ds['input'].nnz
+    ('csr', (3, 1000), 4)
+
+Networks are activated directly on its rows:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> net = buildNetwork(1000, 3, 1)
+    >>> dense = ds['input'][0].toarray().ravel()
+    >>> abs(net.activate(ds['input'][0]) - net.activate(dense)).max() < 1e-12
+    True
+
+and back-propagate their errors to the same derivatives:
+
+    >>> def derivs(inpt):
+    ...     net.reset()
+    ...     net.resetDerivatives()
+    ...     net.activate(inpt)
+    ...     _ = net.backActivate([1.])
+    ...     return net.derivs.copy()
+    >>> abs(derivs(ds['input'][0]) - derivs(dense)).max() < 1e-12
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,30 @@
+"""
+Datasets report the memory used by their rows and the memory allocated:
+
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> for i in range(5):
+    ...     ds.addSample([i, i], [i])
+    >>> ds.memoryReport()['input']
+    (80, 96)
+
+The slack left by growing fields can be released:
+
+    >>> ds.shrinkToFit()
+    >>> ds.memoryReport()['input']
+    (80, 80)
+
+The growth policy is configurable:
+
+    >>> ds.growthFactor = 1
+    >>> ds.growthIncrement = 9
+    >>> ds.addSample([5, 5], [5])
+    >>> ds.memoryReport()['input']
+    (96, 240)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
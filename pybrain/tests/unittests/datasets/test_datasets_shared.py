@@ -0,0 +1,40 @@
+"""
+The fields of a dataset can be published in shared memory. The handle is
+cheap to pickle and reattaches to the same memory:
+
+    >>> import pickle
+    >>> from scipy import arange
+    >>> from pybrain.datasets import SupervisedDataSet, SharedDataSet
+    >>> ds = SupervisedDataSet(arange(20.).reshape(10, 2), arange(10.).reshape(10, 1))
+    >>> handle = SharedDataSet(ds)
+    >>> copy = pickle.loads(pickle.dumps(handle)).attach()
+    >>> type(copy).__name__, len(copy), copy.indim
+    ('SupervisedDataSet', 10, 2)
+    >>> copy.getSample(3)[0].tolist()
+    [6.0, 7.0]
+    >>> copy['input'].flags.writeable
+    False
+
+Appending makes a private copy of the fields:
+
+    >>> copy.addSample([20, 21], [10])
+    >>> len(copy), len(ds)
+    (11, 10)
+
+This also holds for a dataset attached in the publishing process, which
+leaves the original untouched:
+
+    >>> local = handle.attach()
+    >>> local.addSample([20, 21], [10])
+    >>> len(local), len(ds), ds['input'].shape, ds.endmarker['input']
+    (11, 10, (10, 2), 10)
+
+    >>> del copy, local
+    >>> handle.unlink()
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,55 @@
+"""
+Streaming datasets pull their samples chunk by chunk from a source.
+
+    >>> from scipy import array, arange
+    >>> from pybrain.datasets import StreamingDataSet
+
+A restartable source is given as a callable and may yield whole chunks:
+
+    >>> inp = arange(20.).reshape(10, 2)
+    >>> tar = arange(10.).reshape(10, 1)
+    >>> ds = StreamingDataSet(2, 1, lambda: iter([(inp[:7], tar[:7]), (inp[7:], tar[7:])]),
+    ...                       chunksize=4)
+    >>> [len(t) for i, t in ds.iterChunks()]
+    [4, 4, 2]
+    >>> len(ds)
+    10
+
+Every pass delivers the same samples again, with a shuffle buffer in a
+different order:
+
+    >>> ds.shufflebuffer = 3
+    >>> targets = []
+    >>> for sample in ds:
+    ...     targets.append(sample[1][0])
+    >>> sorted(targets) == list(range(10))
+    True
+
+An iterator is consumed only once, successive passes continue where the last
+one stopped:
+
+    >>> samples = ((array([i, i]), array([i])) for i in range(100))
+    >>> ds = StreamingDataSet(2, 1, samples, maxbytes=8 * 3 * 5, epochsize=12)
+    >>> ds.chunksize
+    5
+    >>> [int(s[0][1][0]) for s in ds._provideSequences()][-1]
+    11
+    >>> [int(s[0][1][0]) for s in ds._provideSequences()][0]
+    12
+
+Trainers and validators work on streamed data without holding it in memory:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> from pybrain.tools.validation import ModuleValidator
+    >>> net = buildNetwork(2, 3, 1)
+    >>> trainer = BackpropTrainer(net, ds)
+    >>> err = trainer.train()
+    >>> mse = ModuleValidator.MSE(net, ds)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
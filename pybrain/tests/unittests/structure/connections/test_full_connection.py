@@ -0,0 +1,39 @@
+"""
+Full connections from wide layers only use the weights of the non-zero inputs,
+here the outputs of the few hidden units that get an input at all:
+
+    >>> from scipy import random, zeros
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LinearLayer
+    >>> random.seed(1)
+    >>> n = buildNetwork(3, 1200, 2, hiddenclass=LinearLayer, bias=False)
+    >>> inconn = n.connections[n['in']][0]
+    >>> hiddenconn = n.connections[n['hidden0']][0]
+    >>> weights = zeros((1200, 3))
+    >>> weights[:50] = random.randn(50, 3)
+    >>> inconn.params[:] = weights.ravel()
+    >>> (n.activate([1., 2., 3.]) != 0).all(), hiddenconn._nonzero(n['hidden0'].outputbuffer[0]).shape
+    (True, (50,))
+
+The errors still reach all hidden units, with the same derivatives as if the
+connection ignored the sparsity:
+
+    >>> def backprop():
+    ...     n.reset()
+    ...     n.resetDerivatives()
+    ...     n.activate([1., 2., 3.])
+    ...     inerr = n.backActivate([1., -1.])
+    ...     return inerr, inconn.derivs.copy(), hiddenconn.derivs.copy()
+    >>> sparse = backprop()
+    >>> hiddenconn.sparseDim = 10000
+    >>> dense = backprop()
+    >>> [abs(s - d).max() < 1e-9 for s, d in zip(sparse, dense)]
+    [True, True, True]
+    >>> abs(dense[1].reshape(1200, 3)[50:]).max() > 0
+    True
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,37 @@
+"""
+The winners of a batch of inputs are those of the online activation, also
+when they are looked up in a k-d tree.
+
+    >>> from numpy import random, array
+    >>> from pybrain.structure.modules import KohonenMap
+    >>> random.seed(0)
+    >>> som = KohonenMap(2, 8)
+    >>> inputs = random.random((300, 2))
+    >>> online = array([som.activate(x) for x in inputs])
+    >>> (som.winners(inputs) == online).all()
+    True
+    >>> (som.winners(inputs, kdtree=True) == online).all()
+    True
+    >>> (som.activateBatch(inputs) == online).all()
+    True
+
+Batch training spreads the neurons over the inputs, here the unit square,
+and keeps their order on the grid.
+
+    >>> som.neighbours = 4.
+    >>> som.neighbourdecay = 0.9997
+    >>> som.trainBatch(inputs, epochs=20)
+    >>> abs(som.neighbours - 4 * 0.9997 ** 6000) < 1e-12
+    True
+    >>> (som.neurons.min(axis=(0, 1)) < 0.15).all() and (som.neurons.max(axis=(0, 1)) > 0.85).all()
+    True
+    >>> from numpy import sqrt
+    >>> steps = sqrt(((som.neurons[1:] - som.neurons[:-1]) ** 2).sum(2))
+    >>> steps.mean() < 0.25
+    True
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
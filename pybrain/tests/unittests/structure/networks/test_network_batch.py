@@ -0,0 +1,62 @@
+"""
+Feed-forward networks evaluate whole batches of inputs at once. The result
+is the same as activating the network on every row:
+
+    >>> from scipy import array, allclose
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import SoftmaxLayer
+    >>> net = buildNetwork(3, 4, 2, outclass=SoftmaxLayer)
+    >>> inputs = array([[0., 1., 2.], [1., 0., -1.], [.5, .5, .5]])
+    >>> out = net.activateBatch(inputs)
+    >>> out.shape
+    (3, 2)
+    >>> allclose(out, [net.activate(x) for x in inputs])
+    True
+
+Layers and connections derived from the standard ones transform batches the
+way they transform single rows:
+
+    >>> from pybrain.structure import SigmoidLayer, FullConnection
+    >>> class ScaledSigmoidLayer(SigmoidLayer):
+    ...     def _forwardImplementation(self, inbuf, outbuf):
+    ...         outbuf[:] = 4 * inbuf
+    >>> class DoubledConnection(FullConnection):
+    ...     def _forwardImplementation(self, inbuf, outbuf):
+    ...         FullConnection._forwardImplementation(self, 2 * inbuf, outbuf)
+    >>> net = buildNetwork(3, 4, 2, hiddenclass=ScaledSigmoidLayer, outclass=SoftmaxLayer)
+    >>> allclose(net.activateBatch(inputs), [net.activate(x) for x in inputs])
+    True
+    >>> net = buildNetwork(3, 4, 2, outclass=SoftmaxLayer)
+    >>> net.addConnection(DoubledConnection(net['in'], net['out']))
+    >>> net.sortModules()
+    >>> allclose(net.activateBatch(inputs), [net.activate(x) for x in inputs])
+    True
+
+This also holds if the transformation of a single row does not work on
+every element separately:
+
+    >>> from pybrain.structure import LinearLayer
+    >>> class CenteredLayer(LinearLayer):
+    ...     def _forwardImplementation(self, inbuf, outbuf):
+    ...         outbuf[:] = inbuf - inbuf.mean()
+    >>> net = buildNetwork(3, 4, 2, hiddenclass=CenteredLayer, outclass=CenteredLayer)
+    >>> allclose(net.activateBatch(inputs), [net.activate(x) for x in inputs])
+    True
+
+Recurrent networks cannot be batched and fall back to activating row by row:
+
+    >>> rnn = buildNetwork(3, 4, 2, recurrent=True)
+    >>> rnn._batchable()
+    False
+    >>> rnn.reset()
+    >>> out = rnn.activateBatch(inputs)
+    >>> rnn.reset()
+    >>> allclose(out, [rnn.activate(x) for x in inputs])
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,34 @@
+"""
+The R-operator computes the derivatives of the outputs of a network along a
+direction in parameter space with a single forward pass. They agree with
+finite differences, also for LSTM networks through time:
+
+    >>> from scipy import random, array, allclose
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer, SoftmaxLayer
+    >>> random.seed(0)
+
+    >>> def outputs(net, params, seq):
+    ...     net._setParameters(params)
+    ...     net.reset()
+    ...     return array([net.activate(x) for x in seq])
+    >>> def check(net, length):
+    ...     seq = random.randn(length, net.indim)
+    ...     v = random.randn(net.paramdim)
+    ...     p = net.params.copy()
+    ...     fd = (outputs(net, p + 1e-6 * v, seq) - outputs(net, p - 1e-6 * v, seq)) / 2e-6
+    ...     outputs(net, p, seq)
+    ...     r = net.activateR(v, length)
+    ...     return allclose(r, fd[-length:], atol=1e-6)
+
+    >>> check(buildNetwork(3, 4, 2, outclass=SoftmaxLayer), 1)
+    True
+    >>> check(buildNetwork(3, 4, 2, hiddenclass=LSTMLayer, peepholes=True, recurrent=True), 5)
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,72 @@
+"""
+    >>> import os, tempfile
+    >>> import random as pyrandom
+    >>> from scipy import random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.supervised.trainers import BackpropTrainer, Checkpointer
+
+    >>> def setup():
+    ...     random.seed(5)
+    ...     pyrandom.seed(5)
+    ...     ds = SupervisedDataSet(3, 1)
+    ...     for _ in range(40):
+    ...         ds.addSample(random.randn(3), [random.rand()])
+    ...     n = buildNetwork(3, 4, 1)
+    ...     return n, BackpropTrainer(n, ds, momentum=0.5, learningrate=0.05)
+
+The parameters of the last epochs are kept in a ring, the best ones are put
+back into the module at the end:
+
+    >>> n, t = setup()
+    >>> c = Checkpointer(t, size=3)
+    >>> _ = t.trainUntilConvergence(maxEpochs=20, continueEpochs=100, checkpoint=c)
+    >>> c.stored, c.epochs.tolist()
+    (21, [18, 19, 20])
+    >>> (n.params == c.best).all(), c.besterror == min(t.validationErrors[1:])
+    (True, True)
+
+A run that is interrupted continues from its last checkpoint as if it had
+never stopped:
+
+    >>> n, t = setup()
+    >>> _ = t.trainUntilConvergence(maxEpochs=20, continueEpochs=100)
+    >>> uninterrupted = n.params.copy(), t.validationErrors
+
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'checkpoint.npz')
+    >>> n, t = setup()
+    >>> c = Checkpointer(t, filename=filename)
+    >>> _ = t.trainUntilConvergence(maxEpochs=8, continueEpochs=100, checkpoint=c)
+    >>> c.close()
+
+    >>> n, t = setup()
+    >>> c = Checkpointer(t, filename=filename)
+    >>> c.load()
+    >>> _ = t.trainUntilConvergence(maxEpochs=20, continueEpochs=100, checkpoint=c)
+    >>> c.close()
+    >>> (n.params == uninterrupted[0]).all(), t.validationErrors == uninterrupted[1]
+    (True, True)
+
+Errors while writing in the background are raised in the training thread,
+which can go on writing checkpoints:
+
+    >>> c = Checkpointer(t, filename=os.path.join(filename, 'nonexistent', 'checkpoint.npz'))
+    >>> c.save(1, force=True)
+    >>> try:
+    ...     c.wait()
+    ... except EnvironmentError:
+    ...     print('failed')
+    failed
+    >>> c.filename = filename + '.2'
+    >>> c.save(2, force=True)
+    >>> c.wait()
+    >>> c.close()
+    >>> os.path.exists(c.filename)
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,56 @@
+"""
+The batched evaluation of an Evolino population computes the same fitness
+values and output weights as the evaluation of one individual after the other.
+
+    >>> import random
+    >>> from numpy import arange, sin, cos
+    >>> from pybrain.datasets.sequential import SequentialDataSet
+    >>> from pybrain.structure.modules.evolinonetwork import EvolinoNetwork
+    >>> from pybrain.supervised.evolino.population import EvolinoPopulation
+    >>> from pybrain.supervised.evolino.individual import EvolinoSubIndividual
+    >>> from pybrain.supervised.evolino.gfilter import Randomization
+    >>> from pybrain.supervised.evolino.filter import EvolinoEvaluation, EvolinoBatchEvaluation
+
+    >>> dataset = SequentialDataSet(0, 2)
+    >>> for k in range(2):
+    ...     dataset.newSequence()
+    ...     for x in arange(0, 10 + 5 * k, 0.2):
+    ...         dataset.addSample([], [sin(x + k), cos(0.3 * x)])
+
+    >>> net = EvolinoNetwork(dataset.outdim, 5)
+    >>> net.backprojectionFactor = 0.1
+    >>> population = EvolinoPopulation(EvolinoSubIndividual(net.getGenome()), 6, 1,
+    ...                                Randomization(-0.5, 0.5))
+
+    >>> def fitnesses():
+    ...     return [sp.getIndividualFitness(i) for sp in population.getSubPopulations()
+    ...             for i in sp.getIndividuals()]
+
+    >>> random.seed(1)
+    >>> evaluation = EvolinoEvaluation(net, dataset, wtRatio=1. / 3)
+    >>> evaluation.apply(population)
+    >>> expected = fitnesses()
+    >>> W = net.getOutputWeightMatrix().copy()
+
+    >>> random.seed(1)
+    >>> batch = EvolinoBatchEvaluation(net, dataset, wtRatio=1. / 3)
+    >>> batch.apply(population)
+    >>> max(abs(f - e) / abs(e) for f, e in zip(fitnesses(), expected)) < 1e-6
+    True
+    >>> abs(net.getOutputWeightMatrix() - W).max() < 1e-6
+    True
+    >>> abs(batch.max_fitness - evaluation.max_fitness) < 1e-6 * abs(evaluation.max_fitness)
+    True
+
+The individuals can be evaluated by several processes.
+
+    >>> random.seed(1)
+    >>> EvolinoBatchEvaluation(net, dataset, wtRatio=1. / 3, processes=2).apply(population)
+    >>> max(abs(f - e) / abs(e) for f, e in zip(fitnesses(), expected)) < 1e-6
+    True
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
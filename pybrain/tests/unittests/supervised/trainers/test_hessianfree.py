@@ -0,0 +1,49 @@
+"""
+    >>> from pybrain.tools.shortcuts     import buildNetwork
+    >>> from pybrain.supervised.trainers import HessianFreeTrainer
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from scipy import random, zeros, dot, outer, allclose
+
+    >>> random.seed(42)
+
+Create an XOR-dataset and a network
+
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> ds.addSample([0,0], [0])
+    >>> ds.addSample([0,1], [1])
+    >>> ds.addSample([1,0], [1])
+    >>> ds.addSample([1,1], [0])
+    >>> n = buildNetwork(ds.indim, 3, ds.outdim)
+    >>> t = HessianFreeTrainer(n, ds)
+
+The products with the Gauss-Newton matrix equal those with J^T J / N, where J
+holds the derivatives of the outputs with respect to the parameters:
+
+    >>> def jacobianRow(x, e=1e-6):
+    ...     p = n.params.copy()
+    ...     row = zeros(n.paramdim)
+    ...     for i in range(n.paramdim):
+    ...         q = p.copy(); q[i] += e; n._setParameters(q); plus = n.activate(x)[0]
+    ...         q[i] -= 2 * e; n._setParameters(q); minus = n.activate(x)[0]
+    ...         row[i] = (plus - minus) / (2 * e)
+    ...     n._setParameters(p)
+    ...     return row
+    >>> G = sum(outer(jacobianRow(x), jacobianRow(x)) for x in ds['input']) / len(ds)
+    >>> v = random.randn(n.paramdim)
+    >>> allclose(t.gaussNewtonProduct(v), dot(G, v), atol=1e-6)
+    True
+
+Training never increases the error:
+
+    >>> errors = [t.train() for _ in range(15)]
+    >>> all(e2 <= e1 for e1, e2 in zip(errors, errors[1:]))
+    True
+    >>> errors[-1] < errors[0]
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,44 @@
+"""
+    >>> from pybrain.tools.shortcuts     import buildNetwork
+    >>> from pybrain.supervised.trainers import LBFGSTrainer, ConjugateGradientTrainer
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from scipy import random
+
+    >>> random.seed(42)
+
+Create an XOR-dataset and a network
+
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> ds.addSample([0,0], [0])
+    >>> ds.addSample([0,1], [1])
+    >>> ds.addSample([1,0], [1])
+    >>> ds.addSample([1,1], [0])
+    >>> n = buildNetwork(ds.indim, 3, ds.outdim)
+    >>> initial = n.params.copy()
+
+Every call to train() makes one quasi-Newton step on the whole dataset, and
+the error never increases:
+
+    >>> t = LBFGSTrainer(n, ds)
+    >>> errors = [t.train() for _ in range(50)]
+    >>> all(e2 <= e1 for e1, e2 in zip(errors, errors[1:]))
+    True
+    >>> errors[-1] < 1e-3
+    True
+    >>> abs(t.testOnData() - errors[-1]) < 1e-12
+    True
+
+The conjugate gradient variant works the same way:
+
+    >>> n.params[:] = initial
+    >>> t = ConjugateGradientTrainer(n, ds)
+    >>> errors = [t.train() for _ in range(20)]
+    >>> all(e2 <= e1 for e1, e2 in zip(errors, errors[1:]))
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
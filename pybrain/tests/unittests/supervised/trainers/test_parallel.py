@@ -0,0 +1,43 @@
+"""
+    >>> from pybrain.tools.shortcuts     import buildNetwork
+    >>> from pybrain.supervised.trainers import RPropMinusTrainer, DataParallelTrainer
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from scipy import random
+
+    >>> random.seed(42)
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> for x in random.randn(40, 2):
+    ...     ds.addSample(x, [x[0] * x[1]])
+    >>> n = buildNetwork(ds.indim, 4, ds.outdim)
+    >>> initial = n.params.copy()
+
+Synchronous training on several processes gives the same result as on one:
+
+    >>> t = RPropMinusTrainer(n, dataset=ds)
+    >>> t.trainEpochs(3)
+    >>> single = n.params.copy()
+
+    >>> n._setParameters(initial.copy())
+    >>> t = DataParallelTrainer(n, ds, processes=3, rprop=True)
+    >>> t.trainEpochs(3)
+    >>> abs(n.params - single).max() < 1e-12
+    True
+
+The worker processes keep running until the trainer is closed:
+
+    >>> t.close()
+
+In Hogwild mode, the workers update the shared parameters without locking:
+
+    >>> t = DataParallelTrainer(n, ds, processes=2, hogwild=True, learningrate=0.05)
+    >>> errors = [t.train() for _ in range(5)]
+    >>> errors[-1] < errors[0]
+    True
+    >>> t.close()
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
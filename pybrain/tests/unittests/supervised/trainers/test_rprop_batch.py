@@ -0,0 +1,97 @@
+"""
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer, RPropMinusTrainer, IRpropPlusTrainer
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from scipy import random
+
+    >>> random.seed(42)
+    >>> ds = SupervisedDataSet(3, 2)
+    >>> for _ in range(1500):
+    ...     ds.addSample(random.randn(3), random.rand(2))
+    >>> n = buildNetwork(3, 5, 2, bias=True)
+
+Feed-forward networks compute the derivatives on the whole dataset in batches,
+with the same result as sample by sample:
+
+    >>> n.maxbatchsize = 400
+    >>> t = BackpropTrainer(n)
+    >>> n.resetDerivatives()
+    >>> for seq in ds._provideSequences():
+    ...     _ = t._calcDerivs(seq)
+    >>> derivs = n.derivs.copy()
+    >>> n.resetDerivatives()
+    >>> error, ponderation = t._calcDatasetDerivs(ds)
+    >>> abs(n.derivs - derivs).max() < 1e-9, ponderation
+    (True, 3000.0)
+
+This also holds for layers and connections of subclasses that back-propagate
+single samples in their own way:
+
+    >>> from pybrain.structure import SigmoidLayer, FullConnection
+    >>> class DampedSigmoidLayer(SigmoidLayer):
+    ...     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
+    ...         SigmoidLayer._backwardImplementation(self, outerr, inerr, outbuf, inbuf)
+    ...         inerr *= 0.5
+    >>> class DoubledConnection(FullConnection):
+    ...     def _backwardImplementation(self, outerr, inerr, inbuf):
+    ...         FullConnection._backwardImplementation(self, 2 * outerr, inerr, inbuf)
+    >>> n2 = buildNetwork(3, 5, 2, bias=True, hiddenclass=DampedSigmoidLayer)
+    >>> n2.connections[n2['in']] = [DoubledConnection(n2['in'], n2['hidden0'])]
+    >>> n2.sortModules()
+    >>> t = BackpropTrainer(n2)
+    >>> n2.resetDerivatives()
+    >>> for seq in ds._provideSequences():
+    ...     _ = t._calcDerivs(seq)
+    >>> derivs = n2.derivs.copy()
+    >>> n2.resetDerivatives()
+    >>> _ = t._calcDatasetDerivs(ds)
+    >>> abs(n2.derivs - derivs).max() < 1e-9
+    True
+
+including derivatives that do not work on every element separately:
+
+    >>> from pybrain.structure import LinearLayer
+    >>> class CenteredLayer(LinearLayer):
+    ...     def _forwardImplementation(self, inbuf, outbuf):
+    ...         outbuf[:] = inbuf - inbuf.mean()
+    ...     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
+    ...         inerr[:] = outerr - outerr.mean()
+    >>> n2 = buildNetwork(3, 5, 2, bias=True, hiddenclass=CenteredLayer)
+    >>> t = BackpropTrainer(n2)
+    >>> n2.resetDerivatives()
+    >>> for seq in ds._provideSequences():
+    ...     _ = t._calcDerivs(seq)
+    >>> derivs = n2.derivs.copy()
+    >>> n2.resetDerivatives()
+    >>> _ = t._calcDatasetDerivs(ds)
+    >>> abs(n2.derivs - derivs).max() < 1e-9
+    True
+
+Both RProp variants reduce the error:
+
+    >>> for trainer in RPropMinusTrainer, IRpropPlusTrainer:
+    ...     n.randomize()
+    ...     t = trainer(n, dataset=ds)
+    ...     errors = [t.train() for _ in range(40)]
+    ...     print(errors[-1] < errors[0] / 4)
+    True
+    True
+
+iRprop+ takes back the steps of the parameters whose derivative changed its
+sign if the error increased:
+
+    >>> from pybrain.auxiliary.gradientdescent import IRpropPlus
+    >>> from scipy import array, zeros
+    >>> rp = IRpropPlus(delta0=0.5)
+    >>> rp.init(zeros(2))
+    >>> rp(array([1., -1.]), 1.).tolist()
+    [0.5, -0.5]
+    >>> rp(array([1., 1.]), 2.).tolist()
+    [1.1, 0.0]
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,45 @@
+"""
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> from pybrain.structure import LSTMLayer
+    >>> from scipy import random
+
+    >>> random.seed(42)
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, recurrent=True)
+    >>> ds = SequentialDataSet(2, 1)
+    >>> ds.newSequence()
+    >>> for _ in range(30):
+    ...     ds.addSample(random.randn(2), random.randn(1))
+    >>> seq = list(ds._provideSequences())[0]
+
+With a horizon that reaches back to the start of the sequence, the
+derivatives summed over all chunks are those of full backpropagation
+through time:
+
+    >>> n.resetDerivatives()
+    >>> error, _ = BackpropTrainer(n)._calcDerivs(seq)
+    >>> full = n.derivs.copy()
+    >>> n.resetDerivatives()
+    >>> truncated, _ = BackpropTrainer(n, bpttchunk=7, bptthorizon=30)._calcDerivs(seq)
+    >>> abs(n.derivs - full).max() < 1e-10, abs(truncated - error) < 1e-10
+    (True, True)
+
+With a short horizon, the buffers of the network stay small, however long the
+sequences are:
+
+    >>> ds.newSequence()
+    >>> for _ in range(1000):
+    ...     ds.addSample(random.randn(2), random.randn(1))
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, recurrent=True)
+    >>> t = BackpropTrainer(n, ds, bpttchunk=5, bptthorizon=10)
+    >>> errors = [t.train() for _ in range(3)]
+    >>> n.inputbuffer.shape[0] <= 32, n['hidden0'].state.shape[0] <= 32
+    (True, True)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
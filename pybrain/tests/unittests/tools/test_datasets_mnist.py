@@ -0,0 +1,70 @@
+"""
+Tensors of any element type are read from IDX files, like those of MNIST:
+
+    >>> import gzip, os, struct, tempfile
+    >>> from numpy import arange, array, memmap
+    >>> from pybrain.tools.datasets.mnist import readIdx, makeIdxDataSet
+    >>> path = tempfile.mkdtemp()
+    >>> def writeIdx(filename, a, typecode, opener=open):
+    ...     with opener(os.path.join(path, filename), 'wb') as fp:
+    ...         fp.write(struct.pack('>HBB', 0, typecode, a.ndim))
+    ...         fp.write(struct.pack('>' + 'i' * a.ndim, *a.shape))
+    ...         fp.write(a.tobytes())
+    >>> pixels = arange(18, dtype='>u1').reshape(3, 2, 3) * 10
+    >>> writeIdx('images', pixels, 0x08)
+    >>> writeIdx('images.gz', pixels, 0x08, gzip.open)
+    >>> writeIdx('labels', array([2, 0, 2], dtype='>u1'), 0x08)
+    >>> writeIdx('floats', array([[0.5, -1.], [2., 1e-3]], dtype='>f8'), 0x0E)
+
+Uncompressed files are memory-mapped, gzipped ones read into memory:
+
+    >>> images = readIdx(os.path.join(path, 'images'))
+    >>> isinstance(images, memmap), images.shape, images[1, 1].tolist()
+    (True, (3, 2, 3), [90, 100, 110])
+    >>> (readIdx(os.path.join(path, 'images.gz')) == pixels).all()
+    True
+    >>> readIdx(os.path.join(path, 'floats')).tolist()
+    [[0.5, -1.0], [2.0, 0.001]]
+
+The images are flattened into the inputs of a dataset without copying them,
+the labels become one-of-many targets, or classes:
+
+    >>> from pybrain.datasets import ClassificationDataSet
+    >>> ds = makeIdxDataSet(os.path.join(path, 'images'), os.path.join(path, 'labels'))
+    >>> inp = ds['input']
+    >>> inp.shape, inp.dtype.name, inp.flags.owndata, inp.flags.writeable
+    ((3, 6), 'uint8', False, False)
+    >>> ds['target'].tolist()
+    [[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+    >>> ds = makeIdxDataSet(os.path.join(path, 'images'), os.path.join(path, 'labels'),
+    ...                     nb_classes=4, dsclass=ClassificationDataSet)
+    >>> ds.nClasses, ds['class'].ravel().tolist()
+    (4, [2, 0, 2])
+
+Networks are trained on the integer inputs as they are:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> ds = makeIdxDataSet(os.path.join(path, 'images'), os.path.join(path, 'labels'))
+    >>> net = buildNetwork(6, 3, 3)
+    >>> out = net.activateOnDataset(ds)
+    >>> abs(out - [net.activate(x) for x in pixels.reshape(3, 6) / 1.]).max() < 1e-12
+    True
+    >>> error = BackpropTrainer(net, ds, learningrate=1e-4).train()
+
+Normalizing the inputs replaces them by floats:
+
+    >>> from pybrain.tools.datasettools import DataSetNormalizer
+    >>> normalizer = DataSetNormalizer()
+    >>> normalizer.calculate(ds, bounds=[0, 1])
+    >>> normalizer.normalize(ds)
+    >>> ds['input'].dtype.name, ds['input'].min(), ds['input'].max()
+    ('float64', 0.0, 1.0)
+    >>> readIdx(os.path.join(path, 'images')).max()
+    170
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
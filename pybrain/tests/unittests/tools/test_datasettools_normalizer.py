@@ -0,0 +1,35 @@
+"""
+Statistics can be accumulated chunk by chunk and merged across shards:
+
+    >>> from scipy import array, allclose
+    >>> from pybrain.tools.datasettools import RunningStatistics, DataSetNormalizer
+    >>> data = array([[1., 10.], [2., 20.], [3., 60.], [6., 30.]])
+    >>> left = RunningStatistics(2).update(data[:1])
+    >>> right = RunningStatistics(2).update(data[1:])
+    >>> stats = left.merge(right)
+    >>> stats.count
+    4
+    >>> allclose(stats.mean, data.mean(axis=0)), allclose(stats.var, data.var(axis=0))
+    (True, True)
+    >>> stats.min.tolist(), stats.max.tolist()
+    ([1.0, 10.0], [6.0, 60.0])
+
+Normalization rewrites the dataset field in place:
+
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> ds = SupervisedDataSet(data, array([[0.]] * 4))
+    >>> field = ds.data['input']
+    >>> normalizer = DataSetNormalizer()
+    >>> normalizer.calculate(ds, bounds=[0, 1])
+    >>> normalizer.normalize(ds)
+    >>> ds['input'].tolist()
+    [[0.0, 0.0], [0.2, 0.2], [0.4, 1.0], [1.0, 0.4]]
+    >>> ds.data['input'] is field
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,60 @@
+"""
+Time windows are read-only views on the fields of a sequential dataset:
+
+    >>> from scipy import arange, shares_memory
+    >>> from pybrain.datasets import SequentialDataSet, SupervisedDataSet
+    >>> from pybrain.tools.datasettools import timeWindows, sequenceWindowStarts
+    >>> ds = SequentialDataSet(1, 1)
+    >>> for length, cls in [(7, 0), (4, 1)]:
+    ...     ds.newSequence()
+    ...     for t in range(length):
+    ...         ds.addSample([len(ds)], [cls])
+    >>> windows = timeWindows(ds['input'], 3)
+    >>> windows.shape, windows.flags.writeable
+    ((9, 3), False)
+    >>> shares_memory(windows, ds.data['input'])
+    True
+
+Only windows within a sequence are used:
+
+    >>> starts = sequenceWindowStarts(ds, 3)
+    >>> starts.tolist()
+    [0, 3, 7]
+    >>> windows[starts].tolist()
+    [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0], [7.0, 8.0, 9.0]]
+    >>> sequenceWindowStarts(ds, 3, step=2).tolist()
+    [0, 2, 4, 7]
+
+    >>> from pybrain.tools.datasettools import convertSequenceToTimeWindows
+    >>> dswin = convertSequenceToTimeWindows(ds, SupervisedDataSet, 3) #doctest: +ELLIPSIS
+    (...
+    >>> dswin['target'].ravel().tolist()
+    [0.0, 0.0, 1.0]
+
+A module is activated on the windows batch by batch, with the same outputs as
+window by window:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.tools.datasettools import activateOnWindows, windowSequenceEval
+    >>> net = buildNetwork(3, 4, 2)
+    >>> out = activateOnWindows(net, ds, 3, step=1, batchsize=2)
+    >>> expected = [net.activate(w) for w in windows[sequenceWindowStarts(ds, 3, step=1)]]
+    >>> out.shape, abs(out - expected).max() < 1e-12
+    ((7, 2), True)
+
+The classes of the windows are assessed per sequence, as the percentage of
+windows that get the class of their sequence right:
+
+    >>> seq_res = windowSequenceEval(ds, 3, [0, 1, 1]) #doctest: +ELLIPSIS
+    sequence 0 correct:        50.00%
+    sequence 1 correct:       100.00%
+    ...
+    >>> seq_res.tolist()
+    [50.0, 100.0]
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,56 @@
+"""
+The gradient checker compares the derivatives computed by backpropagation
+with finite differences, for every module and connection of a network:
+
+    >>> from numpy import random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.structure import SigmoidLayer
+    >>> from pybrain.tools.gradientcheck import checkGradient
+    >>> random.seed(0)
+    >>> ds = SupervisedDataSet(3, 2)
+    >>> for _ in range(10):
+    ...     ds.addSample(random.randn(3), random.randn(2))
+    >>> net = buildNetwork(3, 4, 2, bias=True)
+    >>> report = checkGradient(net, ds, directions=2)
+    >>> [checked for _, _, checked, _ in report.containers]
+    [2, 4, 12, 8]
+    >>> report.maxError() < 1e-5
+    True
+
+A random subset of the parameters of each container can be checked instead,
+on several processes. Errors are attributed to the connections they affect:
+
+    >>> class BrokenLayer(SigmoidLayer):
+    ...     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
+    ...         inerr[:] = 1.1 * outbuf * (1 - outbuf) * outerr
+    >>> net = buildNetwork(3, 4, 2, hiddenclass=BrokenLayer, bias=False)
+    >>> report = checkGradient(net, ds, samples=3, directions=1, processes=2)
+    >>> [(paramdim, checked) for _, paramdim, checked, _ in report.containers]
+    [(12, 3), (8, 3)]
+    >>> report.incorrect() == [net.connections[net['in']][0].name]
+    True
+    >>> report.directional[0] > 1e-4
+    True
+
+Workers started without fork get a pickled copy of the network, whose
+perturbations have the same effect:
+
+    >>> import pickle
+    >>> from numpy import allclose
+    >>> from pybrain.tools.gradientcheck import _initWorker, _differences
+    >>> net = buildNetwork(3, 4, 2)
+    >>> task = ([0, 5, 13], [], 1e-6)
+    >>> _initWorker(net, ds)
+    >>> local = _differences(task)
+    >>> _initWorker(pickle.loads(pickle.dumps(net)), ds)
+    >>> pickled = _differences(task)
+    >>> _initWorker(None, None)
+    >>> allclose(local, pickled), min(abs(d) for d in local) > 0
+    (True, True)
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
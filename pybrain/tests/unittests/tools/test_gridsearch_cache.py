@@ -0,0 +1,39 @@
+"""
+Grid searches validate every metaparameter setting only once. The refined
+grids of the DOE search overlap, but shared points are not validated again:
+
+    >>> import os, tempfile
+    >>> from pybrain.tools.gridsearch import GridSearch2D, GridSearchDOE
+    >>> calls = []
+    >>> class Paraboloid(object):
+    ...     def _validate(self, params):
+    ...         calls.append(params)
+    ...         return -(params[0] - 1) ** 2 - (params[1] + 2) ** 2
+    >>> class DOE(Paraboloid, GridSearchDOE):
+    ...     pass
+    >>> DOE([-4, -4], [4, 4], 4).search().tolist()
+    [1.0, -2.0]
+    >>> len(calls) < 4 * 13
+    True
+
+Results can be written to a cache file. A search that is restarted with
+the same file continues with the points that are still missing, here none:
+
+    >>> class Grid(Paraboloid, GridSearch2D):
+    ...     pass
+    >>> cachefile = os.path.join(tempfile.mkdtemp(), 'gridsearch.cache')
+    >>> Grid([-4, -4], [4, 4], 5, cachefile=cachefile).search()
+    (0.0, -2.0)
+    >>> del calls[:]
+    >>> Grid([-4, -4], [4, 4], 5, cachefile=cachefile, processes=2).search()
+    (0.0, -2.0)
+    >>> calls
+    []
+    >>> os.remove(cachefile)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,53 @@
+"""
+The folds of a cross validation are drawn and trained with their own seeds,
+so the results do not depend on the global random state, nor on whether the
+folds run one after the other or on a pool of worker processes:
+
+    >>> from scipy import random
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> from pybrain.tools.validation import CrossValidator, ModuleValidator
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> for x in random.randn(60, 2):
+    ...     ds.addSample(x, [x.sum()])
+    >>> trainer = BackpropTrainer(buildNetwork(2, 3, 1), ds)
+
+    >>> cv = CrossValidator(trainer, ds, n_folds=3, valfunc=ModuleValidator.MSE,
+    ...                     max_epochs=2, seed=42)
+    >>> perf = cv.validate()
+    >>> len(cv.foldscores), len(cv.foldtimes)
+    (3, 3)
+
+Every fold trains its own copy of the network, whose parameters move away
+from those of the trainer's network, which stay where they are:
+
+    >>> params = trainer.module.params.copy()
+    >>> moved = lambda module, dataset: abs(module.params - params).max()
+    >>> cv = CrossValidator(trainer, ds, n_folds=3, valfunc=moved, max_epochs=2, seed=42)
+    >>> min(cv.validate(), *cv.foldscores) > 0.01
+    True
+    >>> (trainer.module.params == params).all()
+    True
+    >>> perf < ModuleValidator.MSE(trainer.module, ds)
+    True
+
+    >>> cv = CrossValidator(trainer, ds, n_folds=3, valfunc=ModuleValidator.MSE,
+    ...                     max_epochs=2, seed=42)
+    >>> scores = (cv.validate(), cv.foldscores)
+    >>> cv = CrossValidator(trainer, ds, n_folds=3, valfunc=ModuleValidator.MSE,
+    ...                     max_epochs=2, seed=42, processes=2)
+    >>> (cv.validate(), cv.foldscores) == scores
+    True
+
+The trainer passed in is left untouched:
+
+    >>> trainer.ds is ds
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
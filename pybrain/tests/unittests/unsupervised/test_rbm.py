@@ -0,0 +1,71 @@
+"""
+Train a restricted Boltzmann machine with batched contrastive divergence on
+noisy copies of two patterns.
+
+    >>> from numpy import random, array, tile
+    >>> from pybrain.structure.networks.rbm import Rbm
+    >>> from pybrain.datasets import UnsupervisedDataSet
+    >>> from pybrain.unsupervised.trainers.rbm import RbmGibbsTrainerConfig, RbmBernoulliTrainer
+
+    >>> random.seed(0)
+    >>> patterns = array([[0, 1] * 4, [1, 1, 0, 0] * 2], dtype=float)
+    >>> samples = patterns[random.randint(2, size=200)]
+    >>> samples = abs(samples - (random.rand(200, 8) < 0.05))
+    >>> dataset = UnsupervisedDataSet(8)
+    >>> dataset.setField('sample', samples)
+
+    >>> cfg = RbmGibbsTrainerConfig()
+    >>> cfg.maxIter = 1
+    >>> rbm = Rbm.fromDims(8, 2)
+    >>> rbm.params[:] = random.randn(16) * 0.1
+    >>> trainer = RbmBernoulliTrainer(rbm, dataset, cfg)
+    >>> errors = [trainer.train() for _ in range(20)]
+    >>> errors[-1] < errors[0] / 2
+    True
+
+The trained parameters are those of the rbm's network, and the inverse rbm
+reconstructs the patterns.
+
+    >>> hidden = rbm.activate(patterns[0])
+    >>> abs(hidden - trainer.hiddenProbabilities(patterns[:1])[0]).max() < 1e-12
+    True
+    >>> (trainer.invRbm.activate(hidden).round() == patterns[0]).all()
+    True
+
+Persistent contrastive divergence with several Gibbs steps learns as well.
+
+    >>> cfg.persistent = True
+    >>> cfg.cdSteps = 3
+    >>> rbm = Rbm.fromDims(8, 2)
+    >>> rbm.params[:] = random.randn(16) * 0.1
+    >>> trainer = RbmBernoulliTrainer(rbm, dataset, cfg)
+    >>> errors = [trainer.train() for _ in range(20)]
+    >>> errors[-1] < errors[0] / 2
+    True
+
+A deep belief network is pretrained layer by layer.
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import SigmoidLayer
+    >>> from pybrain.unsupervised.trainers.deepbelief import DeepBeliefTrainer
+    >>> net = buildNetwork(8, 4, 2, bias=True, hiddenclass=SigmoidLayer, outclass=SigmoidLayer)
+    >>> dbn = DeepBeliefTrainer(net, dataset, epochs=2, cfg=cfg)
+    >>> dbn.train()
+    >>> [(rbm.visibleDim, rbm.hiddenDim) for rbm in dbn.rbms]
+    [(8, 4), (4, 2)]
+
+The second rbm is trained on the cached activations of the first one, which
+follow changes of its parameters.
+
+    >>> first = dbn.rbmTrainers[0]
+    >>> abs(dbn.layerData(1) - first.hiddenProbabilities(samples)).max() < 1e-12
+    True
+    >>> dbn.rbms[0].biasParams[:] += 1
+    >>> abs(dbn.layerData(1) - first.hiddenProbabilities(samples)).max() < 1e-12
+    True
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -1,56 +1,113 @@
-import itertools
+import gzip
 import os
-import scipy
 import struct
 
-from pybrain.datasets import SupervisedDataSet
+from numpy import dtype, memmap, frombuffer, zeros, arange, prod
+
+from pybrain.datasets import SupervisedDataSet, ClassificationDataSet
+
+
+# element types of the IDX format, indexed by the type code in the magic number
+idxTypes = {
+    0x08: dtype('>u1'),
+    0x09: dtype('>i1'),
+    0x0B: dtype('>i2'),
+    0x0C: dtype('>i4'),
+    0x0D: dtype('>f4'),
+    0x0E: dtype('>f8'),
+}
+
+
+def readIdxHeader(fp):
+    """Read the header of an IDX file from the file-like `fp` and return the
+    element type and the shape of the stored tensor."""
+    zero, typecode, ndim = struct.unpack('>HBB', fp.read(4))
+    if zero != 0 or typecode not in idxTypes:
+        raise ValueError("Not an IDX file: magic number %#x" % ((typecode << 8) | ndim))
+    shape = struct.unpack('>' + 'i' * ndim, fp.read(4 * ndim))
+    return idxTypes[typecode], shape
+
+
+def readIdx(filename, mmap=True):
+    """Return the tensor stored in the IDX file `filename` as an array.
+
+    Uncompressed files are memory-mapped read-only unless `mmap` is False, so
+    nothing is read before it is accessed. Gzipped files (ending with '.gz')
+    are decompressed into memory."""
+    if filename.endswith('.gz'):
+        with gzip.open(filename, 'rb') as fp:
+            eltype, shape = readIdxHeader(fp)
+            data = fp.read()
+        return frombuffer(data, dtype=eltype, count=int(prod(shape))).reshape(shape)
+    with open(filename, 'rb') as fp:
+        eltype, shape = readIdxHeader(fp)
+        offset = fp.tell()
+        if not mmap:
+            data = fp.read()
+            return frombuffer(data, dtype=eltype, count=int(prod(shape))).reshape(shape)
+    return memmap(filename, dtype=eltype, mode='r', offset=offset, shape=shape)
 
 
 def labels(filename):
-    fp = file(filename)
-    magicnumber, length = struct.unpack('>ii', fp.read(8))
-    assert magicnumber in (2049, 2051), ("Not an MNIST file: %i" % magicnumber)
-    for _ in range(length):
-        label, = struct.unpack('B', fp.read(1))
-        yield label
+    """Yield the labels stored in an IDX file one by one."""
+    for label in readIdx(filename):
+        yield int(label)
 
 
 def images(filename):
-    fp = file(filename,'rb')
-    chunk = fp.read(16)
-    magicnumber, length, numrows, numcols = struct.unpack('>iiii', chunk)
-    assert magicnumber in (2049, 2051), ("Not an MNIST file: %i" % magicnumber)
-    imagesize = numrows * numcols
-    for _ in range(length):
-        imagestring = fp.read(imagesize)
-        image = struct.unpack('B' * imagesize, imagestring)
-        yield scipy.array(image)
+    """Yield the images stored in an IDX file one by one, as flat arrays of the
+    element type of the file."""
+    data = readIdx(filename)
+    for image in data.reshape(data.shape[0], -1):
+        yield image
 
 
 def flaggedArrayByIndex(idx, length):
-    arr = scipy.zeros(length)
+    arr = zeros(length)
     arr[idx] = 1.
     return arr
 
 
-def makeMnistDataSets(path):
+def oneOfMany(labels, nb_classes=None):
+    """Return an array with one row per entry of the integer array `labels`,
+    having a one in the column given by the label and zeros elsewhere."""
+    if nb_classes is None:
+        nb_classes = int(labels.max()) + 1
+    targets = zeros((len(labels), nb_classes))
+    targets[arange(len(labels)), labels] = 1.
+    return targets
+
+
+def makeIdxDataSet(imagefile, labelfile, nb_classes=None, dsclass=SupervisedDataSet):
+    """Return a dataset holding the samples from the IDX file `imagefile`, each
+    flattened into a single input row, and the targets from `labelfile`.
+
+    The inputs keep the element type of the file and, if it is uncompressed,
+    stay memory-mapped: the modules convert them to floats batch by batch.
+    They are read-only; DataSetNormalizer.normalize() replaces them by
+    normalized floats.
+
+    For a SupervisedDataSet the targets are given in a one-of-many
+    representation with `nb_classes` columns (determined from the labels if
+    not given). For a ClassificationDataSet the class numbers are used."""
+    data = readIdx(imagefile)
+    inp = data.reshape(data.shape[0], -1)
+    lab = readIdx(labelfile).astype(int)
+    assert len(lab) == len(inp), "Number of samples and labels differ."
+    if issubclass(dsclass, ClassificationDataSet):
+        if nb_classes is None:
+            nb_classes = int(lab.max()) + 1
+        return dsclass(inp, lab.reshape(-1, 1), nb_classes=nb_classes)
+    return dsclass(inp, oneOfMany(lab, nb_classes))
+
+
+def makeMnistDataSets(path, dsclass=SupervisedDataSet):
     """Return a pair consisting of two datasets, the first being the training
     and the second being the test dataset."""
-    test = SupervisedDataSet(28 * 28, 10)
-    test_image_file = os.path.join(path, 't10k-images-idx3-ubyte')
-    test_label_file = os.path.join(path, 't10k-labels-idx1-ubyte')
-    test_images = images(test_image_file)
-    test_labels = (flaggedArrayByIndex(l, 10) for l in labels(test_label_file))
-
-    for image, label in zip(test_images, test_labels):
-        test.addSample(image, label)
-
-    train = SupervisedDataSet(28 * 28, 10)
-    train_image_file = os.path.join(path, 'train-images-idx3-ubyte')
-    train_label_file = os.path.join(path, 'train-labels-idx1-ubyte')
-    train_images = images(train_image_file)
-    train_labels = (flaggedArrayByIndex(l, 10) for l in labels(train_label_file))
-    for image, label in zip(train_images, train_labels):
-        train.addSample(image, label)
-
+    train = makeIdxDataSet(os.path.join(path, 'train-images-idx3-ubyte'),
+                           os.path.join(path, 'train-labels-idx1-ubyte'),
+                           10, dsclass)
+    test = makeIdxDataSet(os.path.join(path, 't10k-images-idx3-ubyte'),
+                          os.path.join(path, 't10k-labels-idx1-ubyte'),
+                          10, dsclass)
     return train, test
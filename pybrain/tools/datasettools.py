@@ -4,96 +4,191 @@ from __future__ import print_function
 # to be used for supervised training.
 __author__ = "Martin Felder"
 
-from numpy import r_, array, isfinite
-from pybrain.datasets import SequentialDataSet
+from numpy import r_, array, isfinite, zeros, full, inf, minimum, maximum, sqrt, \
+    atleast_2d, where, errstate, ascontiguousarray, ravel, arange, concatenate, \
+    searchsorted, bincount
+from numpy.lib.stride_tricks import as_strided
+from pybrain.datasets import SequentialDataSet, StreamingDataSet
 
 
-def convertSequenceToTimeWindows(DSseq, NewClass, winsize):
+def timeWindows(a, winsize):
+    """ Return a read-only view on the array `a` (one time step per row), whose
+    row i holds the rows i, ..., i + winsize - 1 of `a` concatenated. No data
+    is copied, however many windows overlap.
+
+    :arg a: 2d array, e.g. a field of a SequentialDataSet
+    :arg winsize: number of time steps per window"""
+    a = ascontiguousarray(a)
+    nwin = max(0, len(a) - winsize + 1)
+    windows = as_strided(a, shape=(nwin, winsize * a.shape[1]),
+                         strides=(a.strides[0], a.strides[1]))
+    windows.flags.writeable = False
+    return windows
+
+
+def sequenceWindowStarts(DSseq, winsize, step=None):
+    """ Return the indices of the first time steps of all windows of length
+    `winsize` that lie completely within one sequence of `DSseq`, starting at
+    the beginning of each sequence and `step` time steps apart (defaults to
+    `winsize`, i.e. no overlap). Rows of timeWindows() at these indices are the
+    windows of the dataset. """
+    step = winsize if step is None else step
+    si = r_[ravel(DSseq['sequence_index']).astype(int), len(DSseq)]
+    starts = [arange(si[i], si[i + 1] - winsize + 1, step)
+              for i in range(DSseq.getNumSequences())]
+    return concatenate(starts + [zeros(0, dtype=int)]).astype(int)
+
+
+def convertSequenceToTimeWindows(DSseq, NewClass, winsize, step=None):
     """ Converts a sequential classification dataset into time windows of fixed length.
     Assumes the correct class is given at the last timestep of each sequence. Incomplete windows at the
-    sequence end are pruned. No overlap between windows.
+    sequence end are pruned. No overlap between windows, unless a `step` smaller than `winsize` is given.
+
+    The windows are gathered at once from a strided view on the input field. To
+    avoid copying the data altogether, use timeWindows() and
+    sequenceWindowStarts() directly.
 
     :arg DSseq: the sequential data set to cut up
     :arg winsize: size of the data window
-    :arg NewClass: class of the windowed data set to be returned (gets initialised with indim*winsize, outdim)"""
+    :arg NewClass: class of the windowed data set to be returned (gets initialised with indim*winsize, outdim)
+    :key step: number of time steps between the starts of two windows"""
     assert isinstance(DSseq, SequentialDataSet)
     #assert isinstance(DSwin, SupervisedDataSet)
 
     DSwin = NewClass(DSseq.indim * winsize, DSseq.outdim)
-    nsamples = 0
-    nseqs = 0
-    si = r_[DSseq['sequence_index'].flatten(), DSseq.endmarker['sequence_index']]
-    for i in range(DSseq.getNumSequences()):
-        # get one sequence as arrays
-        input = DSseq['input'][si[i]:si[i + 1], :]
-        target = DSseq['target'][si[i]:si[i + 1], :]
-        nseqs += 1
-        # cut this sequence into windows, assuming class is given at the last step of each sequence
-        for k in range(winsize, input.shape[0], winsize):
-            inp_win = input[k - winsize:k, :]
-            tar_win = target[k - 1, :]
-            DSwin.addSample(inp_win.flatten(), tar_win.flatten())
-            nsamples += 1
-            ##print("added sample %d from sequence %d: %d - %d" %( nsamples, nseqs, k-winsize, k-1))
+    starts = sequenceWindowStarts(DSseq, winsize, step)
+    # the target of a window is the one of its last time step
+    DSwin.setField('input', timeWindows(DSseq['input'], winsize)[starts])
+    DSwin.setField('target', DSseq['target'][starts + winsize - 1])
+    nsamples = len(starts)
     print(("samples in original dataset: ", len(DSseq)))
     print(("window size * nsamples = ", winsize * nsamples))
     print(("total data points in original data: ", len(DSseq) * DSseq.indim))
     print(("total data points in windowed dataset: ", len(DSwin) * DSwin.indim))
     return DSwin
 
+
+def activateOnWindows(module, DSseq, winsize, step=None, batchsize=1000):
+    """ Return the outputs of `module` on all windows of `DSseq` (see
+    sequenceWindowStarts()), one per row. At most `batchsize` windows are
+    copied out of the strided view at a time and transformed at once by
+    module.activateBatch(), which activates modules with state between samples
+    on one window after the other. """
+    windows = timeWindows(DSseq['input'], winsize)
+    starts = sequenceWindowStarts(DSseq, winsize, step)
+    output = zeros((len(starts), module.outdim))
+    for b in range(0, len(starts), batchsize):
+        output[b:b + batchsize] = module.activateBatch(windows[starts[b:b + batchsize]])
+    return output
+
+
 def windowSequenceEval(DS, winsz, result):
-    """ take results of a window-based classification and assess/plot them on the sequence
-    WARNING: NOT TESTED!"""
-    si_old = 0
-    idx = 0
-    x = []
-    y = []
-    seq_res = []
-    for i, si in enumerate(DS['sequence_index'][1:].astype(int)):
-        tar = DS['target'][si - 1]
-        curr_x = si_old
-        correct = 0.
-        wrong = 0.
-        while curr_x < si:
-            x.append(curr_x)
-            if result[idx] == tar:
-                correct += 1.
-                y += [1., 1.]
-            else:
-                wrong += 1.
-                y += [0., 0.]
-            idx += 1
-            #print("winidx: ", idx)
-            curr_x += winsz
-            x.append(curr_x)
-
-        seq_res.append(100. * correct / (correct + wrong))
-        print(("sequence %d correct: %g12.2%%" % (i, seq_res[-1])))
-
-    seq_res = array(seq_res)
-    print(("total fraction of correct sequences: ", 100. * float((seq_res >= 0.5).sum()) / seq_res.size))
+    """ take results of a window-based classification and assess them on the sequence
+
+    `result` holds one class per window, in the order given by
+    sequenceWindowStarts(). Return the percentage of correctly classified
+    windows for every sequence."""
+    si = r_[ravel(DS['sequence_index']).astype(int), len(DS)]
+    starts = sequenceWindowStarts(DS, winsz)
+    assert len(result) == len(starts)
+    # the class of a sequence is given at its last time step
+    tar = DS['target'][si[1:] - 1]
+    tar = ravel(tar) if tar.shape[1] == 1 else tar.argmax(axis=1)
+    seqnr = searchsorted(si[1:], starts, side='right')
+    correct = ravel(result) == tar[seqnr]
+    nseq = DS.getNumSequences()
+    nwin = bincount(seqnr, minlength=nseq)
+    seq_res = 100. * bincount(seqnr, weights=correct, minlength=nseq) / maximum(nwin, 1)
+    for i in range(nseq):
+        print(("sequence %d correct: %12.2f%%" % (i, seq_res[i])))
+
+    print(("total fraction of correct sequences: ", 100. * float((seq_res >= 50.).sum()) / seq_res.size))
+    return seq_res
+
+
+class RunningStatistics(object):
+    """ Single-pass statistics over the columns of a data stream: count, mean,
+    variance (Welford's algorithm, updated chunk by chunk), minimum and maximum.
+
+    Statistics of separate shards of the data can be combined with merge(). """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.count = 0
+        self.mean = zeros(dim)
+        self.m2 = zeros(dim)
+        self.min = full(dim, inf)
+        self.max = full(dim, -inf)
+
+    def update(self, data):
+        """ Add the samples in `data` (one per row, or a single sample). """
+        data = atleast_2d(data)
+        if len(data) == 0:
+            return self
+        n = len(data)
+        mean = data.mean(axis=0)
+        m2 = ((data - mean) ** 2).sum(axis=0)
+        self._combine(n, mean, m2, data.min(axis=0), data.max(axis=0))
+        return self
+
+    def merge(self, other):
+        """ Add the statistics of another RunningStatistics object. """
+        assert self.dim == other.dim
+        if other.count > 0:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, n, mean, m2, mn, mx):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (float(n) / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (float(self.count) * n / total)
+        self.count = total
+        self.min = minimum(self.min, mn)
+        self.max = maximum(self.max, mx)
+
+    @property
+    def var(self):
+        """ The (population) variance of the samples seen so far. """
+        return self.m2 / self.count if self.count else zeros(self.dim)
+
+    @property
+    def std(self):
+        return sqrt(self.var)
 
 
 class DataSetNormalizer(object):
-    """ normalize a dataset according to a stored LIBSVM normalization file """
-    def __init__(self, fname=None, meanstd=False):
+    """ normalize a dataset according to a stored LIBSVM normalization file
+
+    The normalization parameters are either min/max (scaled to given bounds)
+    or mean/std of the features. They can be computed from a dataset at once
+    with calculate(), or incrementally from chunks of data with update(), and
+    combined from several shards of the data with merge(). """
+
+    # number of rows processed at once when computing the statistics
+    chunksize = 10000
+
+    def __init__(self, fname=None, meanstd=False, bounds=(-1, 1)):
         self.dim = 0
         self.meanstd = meanstd
+        self.newmin, self.newmax = bounds
+        self.stats = None
         if fname is not None:
             self.load(fname)
 
     def load(self, fname):
-        f = file(fname)
+        f = open(fname)
         c = []
         # the first line determines whether we interpret the file as
         # giving min/max of features or mean/std
-        x = f.readline()
+        x = f.readline().strip()
         self.meanstd = False if x == 'x' else True
 
         # the next line gives the normalization bounds
         bounds = array(f.readline().split()).astype(float)
         for line in f:
             c.append(array(line.split()).astype(float)[1:])
+        f.close()
         self.dim = len(c)
         c = array(c)
         self.par1 = c[:, 0]
@@ -103,44 +198,92 @@ class DataSetNormalizer(object):
         self.newmax = bounds[1]
 
     def save(self, fname):
-        f = file(fname, "w+")
-        f.write('x\n')
-        f.write('%g %g' % (self.newmin, self.newmax))
+        f = open(fname, "w+")
+        f.write('m\n' if self.meanstd else 'x\n')
+        f.write('%g %g\n' % (self.newmin, self.newmax))
         for i in range(self.dim):
-            f.write('%d %g %g' % (i + 1, self.par1[i], self.par2[i]))
+            f.write('%d %g %g\n' % (i + 1, self.par1[i], self.par2[i]))
         f.close()
 
     def normalizePattern(self, y):
-        return (y - self.par1) * self.scale + self.newmin
+        return self.normalizeArray(array(y, dtype=float))
+
+    def normalizeArray(self, a, out=None):
+        """ Return the normalized array `a` (one sample per row), written to
+        `out` if given. Pass `out=a` to normalize in place. """
+        if out is None:
+            out = array(a, dtype=float)
+        elif out is not a:
+            out[...] = a
+        out -= self.par1
+        if self.meanstd:
+            out /= where(self.par2 > 0, self.par2, 1.0)
+        else:
+            out *= where(isfinite(self.scale), self.scale, 1.0)
+            out += self.newmin
+        return out
 
     def normalize(self, ds, field='input'):
-        """ normalize dataset or vector wrt. to stored min and max """
+        """ normalize dataset or vector wrt. to stored min and max
+
+        The field is modified in place, unless it is read-only or holds no
+        floats, e.g. the memory-mapped pixels of an IDX file: then it is
+        replaced by a normalized copy. For a StreamingDataSet, every chunk is
+        normalized when it is loaded instead. """
         if self.dim <= 0:
             raise IndexError("No normalization parameters defined!")
-        dsdim = ds[field].shape[1]
+        dsdim = ds.getDimension(field)
         if self.dim != dsdim:
             raise IndexError("Dimension of normalization params does not match DataSet field!")
-        newfeat = ds[field]
-        if self.meanstd:
-            for i in range(dsdim):
-                divisor = self.par2[i] if self.par2[i] > 0 else 1.0
-                newfeat[:, i] = (newfeat[:, i] - self.par1[i]) / divisor
+        if isinstance(ds, StreamingDataSet):
+            ds.transforms[field] = self.normalizeArray
+            return
+        newfeat = ds.data[field][:ds.endmarker[field]]
+        if newfeat.flags.writeable and newfeat.dtype.kind == 'f':
+            self.normalizeArray(newfeat, out=newfeat)
         else:
-            for i in range(dsdim):
-                scale = self.scale[i] if isfinite(self.scale[i]) else 1.0
-                newfeat[:, i] = (newfeat[:, i] - self.par1[i]) * scale + self.newmin
-        ds.setField(field, newfeat)
+            ds.setField(field, self.normalizeArray(newfeat))
 
-    def calculate(self, ds, bounds=[-1, 1], field='input'):
-        self.dim = ds[field].shape[1]
+    def update(self, data):
+        """ Add a chunk of samples (one per row) to the statistics and
+        recompute the normalization parameters. """
+        data = atleast_2d(data)
+        if self.stats is None:
+            self.stats = RunningStatistics(data.shape[1])
+        self.stats.update(data)
+        self._setParameters()
+
+    def merge(self, other):
+        """ Add the statistics collected by another normalizer, e.g. on a
+        different shard of the data. """
+        if self.stats is None:
+            self.stats = RunningStatistics(other.stats.dim)
+        self.stats.merge(other.stats)
+        self._setParameters()
+
+    def _setParameters(self):
+        self.dim = self.stats.dim
         if self.meanstd:
-            self.par1 = ds[field].mean(axis=0)
-            self.par2 = ds[field].std(axis=0)
+            self.par1 = self.stats.mean
+            self.par2 = self.stats.std
         else:
-            self.par1 = ds[field].min(axis=0)
-            self.par2 = ds[field].max(axis=0)
-            self.scale = (bounds[1] - bounds[0]) / (self.par2 - self.par1)
+            self.par1 = self.stats.min
+            self.par2 = self.stats.max
+            with errstate(divide='ignore', invalid='ignore'):
+                self.scale = (self.newmax - self.newmin) / (self.par2 - self.par1)
+
+    def calculate(self, ds, bounds=[-1, 1], field='input'):
+        """ Compute the normalization parameters from a dataset field in a
+        single pass over chunks of the data. """
         self.newmin = bounds[0]
         self.newmax = bounds[1]
-
-
+        self.stats = RunningStatistics(ds.getDimension(field))
+        if isinstance(ds, StreamingDataSet):
+            column = ['input', 'target'].index(field)
+            for chunk in ds.iterChunks():
+                self.update(chunk[column])
+        else:
+            data = ds.data[field][:ds.endmarker[field]]
+            for start in range(0, len(data), self.chunksize):
+                self.update(data[start:start + self.chunksize])
+        self._setParameters()
@@ -0,0 +1,194 @@
+"""Verification of the derivatives that modules compute by backpropagation
+against finite differences of the error.
+
+The analytical gradient of the summed squared error over the dataset is
+computed by a single backward pass over all sequences. Each numerical
+derivative only takes two forward passes, which are batched for
+non-sequential modules, and the perturbations can be spread over a pool of
+worker processes. For large networks, a random subset of the parameters of
+every module and connection can be checked, together with derivatives along
+random directions, which cover all parameters at once."""
+
+from __future__ import print_function
+
+from numpy import array, zeros, dot, sqrt, random, arange, concatenate, array_split
+
+from pybrain.structure.networks.network import Network
+from pybrain.supervised.trainers.backprop import BackpropTrainer
+
+
+class GradientReport(object):
+    """ Result of a gradient check.
+
+        `containers` holds one tuple (name, paramdim, checked, maxerror) per
+        ParameterContainer (module or connection), giving the number of its
+        parameters that were checked and the largest relative error among
+        them. `directional` holds the relative errors of the derivatives
+        along random directions. """
+
+    def __init__(self, containers, directional):
+        self.containers = containers
+        self.directional = directional
+
+    def maxError(self):
+        """ Return the largest relative error found. """
+        errors = [e for _, _, n, e in self.containers if n > 0] + list(self.directional)
+        return max(errors) if errors else 0.
+
+    def incorrect(self, tolerance=1e-4):
+        """ Return the names of the containers with a relative error above
+            `tolerance`. """
+        return [name for name, _, n, e in self.containers if n > 0 and e > tolerance]
+
+    def __str__(self):
+        lines = ["%-30s %8s %8s %12s" % ('container', 'params', 'checked', 'max error')]
+        for name, paramdim, checked, error in self.containers:
+            lines.append("%-30s %8d %8d %12.3g" % (name, paramdim, checked, error))
+        if len(self.directional):
+            lines.append("%-30s %8s %8d %12.3g" % ('random directions', '', len(self.directional),
+                                                  max(self.directional)))
+        return '\n'.join(lines)
+
+
+def relativeError(analytical, numerical, floor=1e-7):
+    """ Return the relative difference of two (arrays of) derivatives.
+        Differences of derivatives that are both smaller than `floor` are
+        measured in absolute terms. """
+    diff = abs(analytical - numerical)
+    scale = abs(analytical) + abs(numerical)
+    return diff / (scale + (scale < floor) * floor)
+
+
+def datasetError(module, dataset):
+    """ Return the summed squared error of the module on the dataset, weighted
+        by the importance if there is one, as minimized by the trainers. """
+    if not module.sequential and module._batchable() and dataset.hasField('input'):
+        err = dataset.getField('target') - module.activateBatch(dataset.getField('input'))
+        if dataset.hasField('importance'):
+            err = err * dataset.getField('importance') ** 0.5
+        return 0.5 * (err ** 2).sum()
+    error = 0.
+    for seq in dataset._provideSequences():
+        module.reset()
+        for sample in seq:
+            err = sample[1] - module.activate(sample[0])
+            if len(sample) > 2:
+                error += 0.5 * dot(sample[2], err ** 2)
+            else:
+                error += 0.5 * dot(err, err)
+    return error
+
+
+# module and dataset of the worker processes
+_state = None
+
+def _initWorker(module, data):
+    global _state
+    if hasattr(data, 'attach'):
+        data = data.attach()
+    if module is not None and module.paramdim:
+        # a module unpickled in a spawned process has its own copies of the
+        # parameters of its connections: link them to the flat array again
+        module._setParameters(module.params)
+    _state = (module, data)
+
+def _differences(task):
+    """ Return the central differences of the error along the unit vectors of
+        the given parameter indices and along the given directions. """
+    indices, directions, epsilon = task
+    module, dataset = _state
+    params = module.params.copy()
+    result = []
+    try:
+        for i in indices:
+            module.params[i] = params[i] + epsilon
+            right = datasetError(module, dataset)
+            module.params[i] = params[i] - epsilon
+            left = datasetError(module, dataset)
+            module.params[i] = params[i]
+            result.append((right - left) / (2 * epsilon))
+        for v in directions:
+            module.params[:] = params + epsilon * v
+            right = datasetError(module, dataset)
+            module.params[:] = params - epsilon * v
+            left = datasetError(module, dataset)
+            result.append((right - left) / (2 * epsilon))
+    finally:
+        module.params[:] = params
+    return result
+
+
+def checkGradient(module, dataset, epsilon=1e-6, samples=None, directions=0, processes=1):
+    """ Compare the derivatives computed by backpropagation with central
+        differences of the error on `dataset` and return a GradientReport.
+
+        :arg module: the module to check, usually a network
+        :arg dataset: the data the error is computed on
+        :key epsilon: size of the perturbations
+        :key samples: check at most this many randomly chosen parameters of
+             every module and connection, instead of all
+        :key directions: number of additional checks along random directions
+             in parameter space, each covering all parameters
+        :key processes: number of worker processes the perturbations are
+             spread over; None starts one per CPU
+    """
+    # analytical derivatives of the error
+    trainer = BackpropTrainer(module)
+    module.resetDerivatives()
+    for seq in dataset._provideSequences():
+        trainer._calcDerivs(seq)
+    analytical = -module.derivs.copy()
+
+    if isinstance(module, Network):
+        containers = [(c.name, c.paramdim) for c in module._containerIterator()]
+    else:
+        containers = [(module.name, module.paramdim)]
+    chosen = []
+    start = 0
+    for _, paramdim in containers:
+        indices = arange(start, start + paramdim)
+        if samples is not None and samples < paramdim:
+            indices = random.permutation(indices)[:samples]
+        chosen.append(indices)
+        start += paramdim
+    indices = concatenate(chosen) if chosen else zeros(0, dtype=int)
+    vectors = random.randn(directions, module.paramdim)
+    vectors /= sqrt((vectors ** 2).sum(axis=1))[:, None]
+
+    if processes is None:
+        from multiprocessing import cpu_count
+        processes = cpu_count()
+    # several chunks per worker to even out the load
+    nchunks = 1 if processes == 1 else 4 * processes
+    tasks = [(chunk, [], epsilon) for chunk in array_split(indices, nchunks) if len(chunk)]
+    tasks += [([], [v], epsilon) for v in vectors]
+    if processes == 1:
+        _initWorker(module, dataset)
+        try:
+            results = list(map(_differences, tasks))
+        finally:
+            _initWorker(None, None)
+    else:
+        from multiprocessing import Pool
+        from pybrain.datasets.shared import SharedDataSet
+        with SharedDataSet(dataset) as shared:
+            pool = Pool(processes, _initWorker, (module, shared))
+            try:
+                results = pool.map(_differences, tasks)
+            finally:
+                pool.close()
+                pool.join()
+
+    numerical = zeros(module.paramdim)
+    directional = []
+    for (chunk, vs, _), res in zip(tasks, results):
+        if len(chunk):
+            numerical[chunk] = res
+        else:
+            directional.append(relativeError(dot(analytical, vs[0]), res[0]))
+
+    report = []
+    for (name, paramdim), idx in zip(containers, chosen):
+        errors = relativeError(analytical[idx], numerical[idx])
+        report.append((name, paramdim, len(idx), errors.max() if len(idx) else 0.))
+    return GradientReport(report, array(directional))
@@ -2,11 +2,106 @@ from __future__ import print_function
 
 __author__ = 'Michael Isik'
 
-from pybrain.tools.validation import CrossValidator
-from numpy import linspace, append, ones, zeros, array, where, apply_along_axis
+import os
 import copy
 
-class GridSearch2D:
+from pybrain.tools.validation import CrossValidator
+from numpy import linspace, append, ones, zeros, array, where
+
+
+def _paramKey(params):
+    """ Return the dictionary key of a metaparameter setting. The values are
+        rounded, so that grid points computed in different ways coincide.
+    """
+    return tuple(round(float(p), 10) for p in params)
+
+
+# the search object inside the worker processes of a parallel search
+_searcher = None
+
+def _initWorker(searcher):
+    global _searcher
+    _searcher = searcher
+
+def _validateJob(params):
+    return params, _searcher._validate(params)
+
+
+class _CachedSearch(object):
+    """ Evaluation engine shared by the grid searches.
+
+        Performances are memoized by their metaparameters, so a setting is
+        validated only once per search object, even if it occurs on several
+        levels of a refined grid. Optionally, the settings of one step are
+        validated concurrently on a pool of worker processes, and every result
+        is appended to a cache file as soon as it is available. A search
+        started with an existing cache file resumes from the results stored
+        there.
+    """
+    _processes = 1
+    _cachefile = None
+
+    def _setSearchArg(self, key, value):
+        """ Handle the keyword arguments common to all searches. Returns
+            False, if the key is unknown. """
+        if key == "processes":
+            self._processes = value
+        elif key == "cachefile":
+            self._cachefile = value
+        else:
+            return False
+        return True
+
+    def _loadCache(self):
+        """ Read the performances stored in the cache file, if there is one. """
+        if not self._cachefile or not os.path.exists(self._cachefile):
+            return
+        with open(self._cachefile) as f:
+            for line in f:
+                values = [float(v) for v in line.split()]
+                if values:
+                    self._performances[_paramKey(values[:-1])] = values[-1]
+
+    def _storeResult(self, params, perf):
+        if self._cachefile:
+            with open(self._cachefile, 'a') as f:
+                f.write(' '.join(repr(float(v)) for v in params + (perf,)) + '\n')
+
+    def _startPool(self):
+        """ Return a worker pool, or None if the search runs sequentially. """
+        if self._processes == 1:
+            return None
+        from multiprocessing import Pool
+        return Pool(self._processes, _initWorker, (self,))
+
+    def _evaluate(self, jobs, pool=None):
+        """ Return the performances of a list of metaparameter settings,
+            validating only those that are not known yet.
+        """
+        perfs = self._performances
+        todo = []
+        for params in jobs:
+            key = _paramKey(params)
+            if key not in perfs and key not in todo:
+                todo.append(key)
+        if pool is None:
+            results = ((params, self._validate(params)) for params in todo)
+        else:
+            results = pool.imap_unordered(_validateJob, todo)
+        for params, perf in results:
+            perfs[params] = perf
+            self._storeResult(params, perf)
+            if self._verbosity > 0:
+                print(("validated:", params, " performance = ", perf))
+        return [perfs[_paramKey(params)] for params in jobs]
+
+    def _closePool(self, pool):
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+class GridSearch2D(_CachedSearch):
     """ Abstract class providing a method for searching optimal metaparmeters
         of a training algorithm.
 
@@ -46,10 +141,16 @@ class GridSearch2D:
     def setArgs(self, **kwargs):
         """ :key **kwargs:
                 verbosity : set verbosity
+                processes : number of worker processes validating the jobs
+                            of one step concurrently, None for one per CPU (1)
+                cachefile : name of a file the performances are appended to,
+                            and read from when the search is restarted
         """
         for key, value in list(kwargs.items()):
             if key in ("verbose", "verbosity", "ver", "v"):
                 self._verbosity = value
+            else:
+                self._setSearchArg(key, value)
 
     def getPerformances(self):
         """ Returns the performances calculated so far. They are stored inside
@@ -64,16 +165,16 @@ class GridSearch2D:
             After enough new jobs were validated in order to visualize a grid,
             the _onStep() callback method is called.
         """
+        self._loadCache()
         jobs = self._calculateJobs()
         perfs = self._performances
-        for line in jobs:
-            for params in line:
-                perf = self._validate(params)
-                perfs[params] = perf
-                if self._verbosity > 0:
-                    print(("validated:", params, " performance = ", perf))
-
-            self._onStep()
+        pool = self._startPool()
+        try:
+            for line in jobs:
+                self._evaluate(line, pool)
+                self._onStep()
+        finally:
+            self._closePool(pool)
 
         max_idx = array(list(perfs.values())).argmax()
         return list(perfs.keys())[max_idx]
@@ -99,7 +200,7 @@ class GridSearch2D:
         for i in range(ndim):
             linspaces.append(
                 self._permuteSequence(
-                    list(linspace(self._min_params[i], self._max_params[i], self._n_steps[i]))))
+                    list(linspace(self._min_params[i], self._max_params[i], int(self._n_steps[i])))))
 #        print(linspaces; exit(0))
 #        linspaces = array(linspaces,float)
         nr_c = len(linspaces[0])
@@ -145,7 +246,7 @@ class GridSearch2D:
 
 
 
-class GridSearchDOE:
+class GridSearchDOE(_CachedSearch):
     """ Abstract class providing a method for searching optimal metaparmeters
         of a training algorithm after the DOE principle.
         Read: "Parameter selection for support vector machines"
@@ -181,6 +282,8 @@ class GridSearchDOE:
         for key, value in list(kwargs.items()):
             if key in ("verbose", "ver", "v"):
                 self._verbosity = value
+            else:
+                self._setSearchArg(key, value)
 
     def search(self):
         """ The main search method, that validates all calculated metaparameter
@@ -188,30 +291,25 @@ class GridSearchDOE:
         """
         self._n_params = len(self._min_params)
 
+        self._loadCache()
         center = self._min_params + self._range / 2.
-        for level in range(self._n_iterations):
-            grid = self._calcGrid(center, level)
-            local_perf = apply_along_axis(self._validateWrapper, 1, grid)
-
-            max_idx = local_perf.argmax()
-            center = grid[max_idx]
-            if self._verbosity > 0:
-                print()
-                print(("Found maximum at:", center, "   performance = ", local_perf[max_idx]))
-                print()
+        pool = self._startPool()
+        try:
+            for level in range(self._n_iterations):
+                grid = self._calcGrid(center, level)
+                local_perf = array(self._evaluate(grid, pool))
+
+                max_idx = local_perf.argmax()
+                center = grid[max_idx]
+                if self._verbosity > 0:
+                    print()
+                    print(("Found maximum at:", center, "   performance = ", local_perf[max_idx]))
+                    print()
+        finally:
+            self._closePool(pool)
 
         return center
 
-
-    def _validateWrapper(self, params):
-        """ Helper function that wraps the _validate() method.
-        """
-        perf = self._validate(params)
-        if self._verbosity > 0:
-            print(("validated:", params, " performance = ", perf))
-        self._performances[tuple(params)] = perf
-        return perf
-
     def _calcGrid(self, center, level):
         """ Calculate the next grid to validate.
 
@@ -279,6 +377,7 @@ class GridSearchCostGamma(GridSearch2D):
                 nfolds    : Number of folds of crossvalidation
                 max_epochs: Maximum number of epochs for training
                 verbosity : set verbosity
+                processes, cachefile : see GridSearch2D.setArgs()
         """
         for key, value in list(kwargs.items()):
             if key in ("folds", "nfolds"):
@@ -335,16 +434,8 @@ class GridSearchDOECostGamma(GridSearchDOE):
 
     def _validate(self, params):
         """ See GridSearchCostGamma """
-        glob_idx = tuple(params)
-        perf = self._performances
-
-        if glob_idx not in perf:
-            trainer = self._getTrainerForParams(params)
-            local_perf = CrossValidator(trainer, self._dataset, self._n_folds, **self._validator_kwargs).validate()
-            perf[glob_idx] = local_perf
-        else:
-            local_perf = perf[glob_idx]
-        return local_perf
+        trainer = self._getTrainerForParams(params)
+        return CrossValidator(trainer, self._dataset, self._n_folds, **self._validator_kwargs).validate()
 
 
     def _getTrainerForParams(self, params):
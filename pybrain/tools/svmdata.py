@@ -2,7 +2,11 @@ from __future__ import print_function
 
 __author__ = 'Michael Isik'
 
+from numpy import array, unique
+from scipy.sparse import issparse
+
 from pybrain.datasets import SupervisedDataSet
+from pybrain.datasets.libsvmformat import readLibsvm
 
 class SVMData(SupervisedDataSet):
     """ Reads data files in LIBSVM/SVMlight format """
@@ -30,17 +34,18 @@ class SVMData(SupervisedDataSet):
 
 
     def _setDataFields(self, x, y):
-        if not len(x): raise Exception("no input data found")
-        SupervisedDataSet.__init__(self, len(x[0]), 1)
+        if not issparse(x):
+            x = array(x, dtype=float)
+        y = array(y, dtype=float)
+        if not x.shape[0]: raise Exception("no input data found")
+        SupervisedDataSet.__init__(self, x.shape[1], 1)
         self.setField('input'  , x)
         self.setField('target' , y)
 
-        flat_labels = list(self.getField('target').flatten())
-        classes = list(set(flat_labels))
-        self._classes = classes
+        classes, counts = unique(self.getField('target'), return_counts=True)
+        self._classes = classes.tolist()
         self.nClasses = len(classes)
-        for class_ in classes:
-            self.classHist[class_] = flat_labels.count(class_)
+        self.classHist = dict(zip(self._classes, counts.tolist()))
 
 
 
@@ -61,44 +66,15 @@ class SVMData(SupervisedDataSet):
             y.append([ float(label) ])
         self._setDataFields(x, y)
 
-    def loadSVMdata(self, fname):
+    def loadSVMdata(self, fname, sparse=False):
         """ read svm sparse format from file 'fname' (with labels only)
-            output: [attributes[], labels[]] """
-
-        x = []
-        y = []
-        nFeatMax = 0
-        for line in open(fname, 'r').readlines():
-            # format is:
-            # <class>  <featnr>:<featval>  <featnr>:<featval> ...
-            # (whereby featnr starts at 1)
-            if not line: break
-            line = line.split()
-            label = float(line[0])
-
-
-            feat = []
-            nextidx = 1
-            for r in line[1:]:
-                # construct list of features, taking care of sparsity
-                (idx, val) = r.split(':')
-                idx = int(idx)
-                for _ in range(nextidx, idx):
-                    feat.append(0) # zzzzwar hier ein bug??
-                feat.append(float(val))
-                nextidx = idx + 1
-            nFeat = len(feat)
-            if nFeatMax < nFeat: nFeatMax = nFeat
-
-            x.append(feat)
-            y.append([ label ])
-            self.nSamples += 1
-
-        for xi in x:
-            while len(xi) < nFeatMax:
-                xi.append(0.)
+            output: [attributes[], labels[]]
 
-        self._setDataFields(x, y)
+            If `sparse` is set, the input field is kept as a scipy.sparse CSR
+            matrix. """
+        x, y = readLibsvm(fname, sparse=sparse)
+        self.nSamples = len(y)
+        self._setDataFields(x, y.reshape(-1, 1))
 
 
     def loadRawData(self, fname):
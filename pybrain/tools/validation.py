@@ -1,12 +1,19 @@
+from __future__ import print_function
+
 __author__ = 'Michael Isik'
 
 
-from numpy.random import permutation
-from numpy import array, array_split, apply_along_axis, concatenate, ones, dot, delete, append, zeros, argmax
+from numpy.random import RandomState
+from numpy import random
+import random as pyrandom
+from numpy import array, array_split, apply_along_axis, concatenate, ones, dot, delete, append, zeros, argmax, arange
 import copy
+import time
+from pybrain.datasets.classification import OneOfManyTargets
 from pybrain.datasets.importance import ImportanceDataSet
 from pybrain.datasets.sequential import SequentialDataSet
 from pybrain.datasets.supervised import SupervisedDataSet
+from pybrain.datasets.streaming import StreamingDataSet
 
 
 
@@ -25,8 +32,17 @@ class Validator(object):
 
             :arg output: array of output values
             :arg target: array of target values
+
+            If the targets are given as OneOfManyTargets, their class numbers
+            are compared to the outputs directly, after reducing outputs in
+            1-of-k representation to the index of their maximum.
         """
         output = array(output)
+        if isinstance(target, OneOfManyTargets):
+            if output.ndim == 2 and output.shape[1] == target.nClasses:
+                output = output.argmax(axis=1)
+            output = output.ravel()
+            target = target.classes
         target = array(target)
         assert len(output) == len(target)
         n_correct = sum(output == target)
@@ -54,8 +70,16 @@ class Validator(object):
                 sum of all importance values for normalization
                 purposes.
         """
-        # assert equal shapes
         output = array(output)
+        if isinstance(target, OneOfManyTargets) and importance is None:
+            # subtract the non-membership bound everywhere and the rest at
+            # the class positions, without expanding the targets
+            assert output.shape == target.shape
+            error = output - target.bounds[0]
+            error[arange(len(error)), target.classes.astype(int)] -= \
+                target.bounds[1] - target.bounds[0]
+            return (error ** 2).mean()
+        # assert equal shapes
         target = array(target)
         assert output.shape == target.shape
         if importance is not None:
@@ -95,6 +119,8 @@ class ClassificationHelper(object):
                          Each vector will be converted to the index of the
                          component with the maximum value.
         """
+        if isinstance(data, OneOfManyTargets):
+            return data.argmax(axis=1)
         return apply_along_axis(argmax, 1, data)
 
 
@@ -194,6 +220,8 @@ class ModuleValidator(object):
             :arg dataset: Dataset object at least containing the fields
                 'input' and 'target' (for example SupervisedDataSet)
         """
+        if isinstance(dataset, StreamingDataSet):
+            return cls._validateStreaming(valfunc, module, dataset)
         target = dataset.getField('target')
         output = ModuleValidator.calculateModuleOutput(module, dataset)
 
@@ -204,6 +232,24 @@ class ModuleValidator(object):
             return valfunc(output, target)
 
 
+    @classmethod
+    def _validateStreaming(cls, valfunc, module, dataset):
+        """ Validates the module chunk by chunk on a StreamingDataSet, so that
+            the data never has to be held in memory completely. The results
+            of valfunc on the chunks are averaged, weighted by the number of
+            samples in each chunk.
+        """
+        result = 0.
+        total = 0
+        module.reset()
+        for input, target in dataset.iterChunks():
+            output = module.activateBatch(input)
+            result += valfunc(output, target) * len(target)
+            total += len(target)
+        assert total > 0, "Dataset cannot be empty."
+        return result / total
+
+
     @classmethod
     def _calculateModuleOutputSequential(cls, module, dataset):
         """ Calculates the module's output on the dataset. Especially designed
@@ -212,14 +258,14 @@ class ModuleValidator(object):
 
             :arg dataset: Dataset object of type SequentialDataSet or subclass.
         """
+        if module._batchable():
+            # the outputs do not depend on the sequences
+            return module.activateBatch(dataset.getField('input'))
         outputs = []
         for seq in dataset._provideSequences():
             module.reset()
-            for i in range(len(seq)):
-                output = module.activate(seq[i][0])
-                outputs.append(output.copy())
-        outputs = array(outputs)
-        return outputs
+            outputs.append(module.activateBatch([sample[0] for sample in seq]))
+        return concatenate(outputs) if outputs else zeros((0, module.outdim))
 
 
     @classmethod
@@ -233,14 +279,58 @@ class ModuleValidator(object):
             return cls._calculateModuleOutputSequential(module, dataset)
         else:
             module.reset()
-            input = dataset.getField('input')
-            output = array([module.activate(inp) for inp in input])
-            return output
+            return module.activateBatch(dataset.getField('input'))
 
 
 
 
 
+def _relinkTrainer(trainer):
+    """ Make the connections of a copied or unpickled module views on its
+        parameters and derivatives again, which copying separates, and bind
+        the trainer's GradientDescent to the parameters. """
+    module = trainer.module
+    if module.paramdim == 0:
+        return
+    module._setParameters(module.params)
+    if module.hasDerivatives:
+        module._setDerivatives(module.derivs)
+    descent = getattr(trainer, 'descent', None)
+    if descent is not None and getattr(descent, 'inplace', False) \
+            and descent.values is not module.params:
+        descent.init(module.params)
+
+
+def _validateFold(task):
+    """ Train a copy of the trainer on one fold and evaluate it on the held-out
+        rows. Runs in the worker processes of a parallel CrossValidator, too.
+
+        Returns the performance and the wall time in seconds.
+    """
+    trainer, data, train_idxs, test_idxs, seed, max_epochs, valfunc = task
+    start = time.time()
+    _relinkTrainer(trainer)
+    if hasattr(data, 'attach'):
+        data = data.attach()
+    inp = data.getField("input")
+    tar = data.getField("target")
+    random.seed(seed)
+    pyrandom.seed(seed)
+    train_ds = SupervisedDataSet(data.indim, data.outdim)
+    train_ds.setField("input", inp[train_idxs])
+    train_ds.setField("target", tar[train_idxs])
+    trainer.setData(train_ds)
+    if not max_epochs:
+        trainer.train()
+    else:
+        trainer.trainEpochs(max_epochs)
+    test_ds = SupervisedDataSet(data.indim, data.outdim)
+    test_ds.setField("input", inp[test_idxs])
+    test_ds.setField("target", tar[test_idxs])
+    perf = valfunc(trainer.module, test_ds)
+    return perf, time.time() - start
+
+
 class CrossValidator(object):
     """ Class for crossvalidating data.
         An object of CrossValidator must be supplied with a trainer that contains
@@ -267,6 +357,11 @@ class CrossValidator(object):
         self._n_folds = n_folds
         self._calculatePerformance = valfunc
         self._max_epochs = None
+        self._verbosity = False
+        self._processes = 1
+        self._seed = None
+        self.foldscores = []
+        self.foldtimes = []
         self.setArgs(**kwargs)
 
     def setArgs(self, **kwargs):
@@ -274,64 +369,86 @@ class CrossValidator(object):
 
         :key max_epochs: maximum number of epochs the trainer should train the module for.
         :key verbosity: set verbosity level
+        :key processes: number of worker processes the folds are distributed
+             over. 1 runs them one after the other in this process, None
+             starts one worker per CPU. (1)
+        :key seed: seed for the random number generators. It determines the
+             folds, and fold i is trained with seed+i, whether it runs in
+             parallel or not. If not given, the seed is drawn from the global
+             random state.
         """
         for key, value in list(kwargs.items()):
-            if key in ("verbose", "ver", "v"):
+            if key in ("verbose", "ver", "v", "verbosity"):
                 self._verbosity = value
-            elif key in ("max_epochs"):
+            elif key in ("max_epochs",):
                 self._max_epochs = value
+            elif key in ("processes",):
+                self._processes = value
+            elif key in ("seed",):
+                self._seed = value
+
+    def _detachedTrainer(self):
+        """ Return a shallow copy of the trainer without its dataset, so that
+            copying or pickling it for the folds does not copy the data. """
+        trainer = copy.copy(self._trainer)
+        trainer.ds = None
+        return trainer
 
     def validate(self):
         """ The main method of this class. It runs the crossvalidation process
             and returns the validation result (e.g. performance).
+
+            The performance and the wall time of every single fold are kept in
+            the lists `foldscores` and `foldtimes`.
         """
         dataset = self._dataset
-        trainer = self._trainer
         n_folds = self._n_folds
         l = dataset.getLength()
-        inp = dataset.getField("input")
-        tar = dataset.getField("target")
-        indim = dataset.indim
-        outdim = dataset.outdim
         assert l > n_folds
 
-        perms = array_split(permutation(l), n_folds)
+        seed = self._seed
+        if seed is None:
+            seed = random.randint(2 ** 31 - n_folds)
+        perms = array_split(RandomState(seed).permutation(l), n_folds)
 
-        perf = 0.
+        trainer = self._detachedTrainer()
+        tasks = []
         for i in range(n_folds):
-            # determine train indices
-            train_perms_idxs = list(range(n_folds))
-            train_perms_idxs.pop(i)
-            temp_list = []
-            for train_perms_idx in train_perms_idxs:
-                temp_list.append(perms[ train_perms_idx ])
-            train_idxs = concatenate(temp_list)
-
-            # determine test indices
-            test_idxs = perms[i]
-
-            # train
-            #print("training iteration", i)
-            train_ds = SupervisedDataSet(indim, outdim)
-            train_ds.setField("input"  , inp[train_idxs])
-            train_ds.setField("target" , tar[train_idxs])
-            trainer = copy.deepcopy(self._trainer)
-            trainer.setData(train_ds)
-            if not self._max_epochs:
-                trainer.train()
-            else:
-                trainer.trainEpochs(self._max_epochs)
-
-            # test
-            #print("testing iteration", i)
-            test_ds = SupervisedDataSet(indim, outdim)
-            test_ds.setField("input"  , inp[test_idxs])
-            test_ds.setField("target" , tar[test_idxs])
-#            perf += self.getPerformance( trainer.module, dataset )
-            perf += self._calculatePerformance(trainer.module, dataset)
-
-        perf /= n_folds
-        return perf
+            train_idxs = concatenate(perms[:i] + perms[i + 1:])
+            tasks.append([trainer, dataset, train_idxs, perms[i], seed + i,
+                          self._max_epochs, self._calculatePerformance])
+
+        if self._processes == 1:
+            # training reseeds the global generators: restore them afterwards
+            state = random.get_state()
+            pystate = pyrandom.getstate()
+            try:
+                results = []
+                for task in tasks:
+                    task[0] = copy.deepcopy(trainer)
+                    results.append(_validateFold(task))
+            finally:
+                random.set_state(state)
+                pyrandom.setstate(pystate)
+        else:
+            from multiprocessing import Pool
+            from pybrain.datasets.shared import SharedDataSet
+            with SharedDataSet(dataset) as shared:
+                for task in tasks:
+                    task[1] = shared
+                pool = Pool(self._processes)
+                try:
+                    results = pool.map(_validateFold, tasks)
+                finally:
+                    pool.close()
+                    pool.join()
+
+        self.foldscores = [perf for perf, _ in results]
+        self.foldtimes = [t for _, t in results]
+        if self._verbosity:
+            for i, (perf, t) in enumerate(results):
+                print("fold %d: performance %s, %.2fs" % (i, perf, t))
+        return sum(self.foldscores) / n_folds
 
 #    def getPerformance( self, module, dataset ):
 #        inp    = dataset.getField("input")
@@ -4,10 +4,14 @@ __author__ = 'Justin S Bayer, bayer.justin@googlemail.com'
 __version__ = '$Id$'
 
 
-import copy
+import os
+from tempfile import TemporaryFile
+
+from numpy import memmap, concatenate, array_equal
+from numpy.lib.format import open_memmap
 
 from pybrain.datasets import SupervisedDataSet, UnsupervisedDataSet
-from pybrain.structure import BiasUnit, FeedForwardNetwork, FullConnection
+from pybrain.structure import BiasUnit
 from pybrain.structure.networks.rbm import Rbm
 from pybrain.structure.modules.neuronlayer import NeuronLayer
 from pybrain.supervised.trainers import Trainer
@@ -19,11 +23,18 @@ class DeepBeliefTrainer(Trainer):
     """Trainer for deep networks.
 
     Trains the network by greedily training layer after layer with the
-    RbmGibbsTrainer.
+    RbmGibbsTrainer, on the hidden activations of the layer before.
 
     The network that is being trained is assumed to be a chain of layers that
     are connected with full connections and feature a bias each.
 
+    The hidden activations of every layer, which the next layer is trained
+    on, are computed once for the whole dataset and cached in memory-mapped
+    arrays, from which the trainers read their batches. They are only
+    computed again when the parameters of a layer below have changed, so
+    that each call of train() propagates the data through every layer just
+    once.
+
     The behaviour of the trainer is undefined for other cases.
     """
 
@@ -33,7 +44,20 @@ class DeepBeliefTrainer(Trainer):
     }
 
     def __init__(self, net, dataset, epochs=50,
-                 cfg=None, distribution='bernoulli'):
+                 cfg=None, distribution='bernoulli', cachedir=None,
+                 chunksize=10000):
+        """
+        :arg net: the network to pretrain
+        :arg dataset: the samples, in the 'input' or 'sample' field
+        :key epochs: number of epochs every layer is trained for
+        :key cfg: an RbmGibbsTrainerConfig for the rbm trainers
+        :key distribution: 'bernoulli' or 'gauss'
+        :key cachedir: directory the hidden activations are stored in, as
+             layer1.npy, layer2.npy and so on; by default they are kept in
+             temporary files
+        :key chunksize: number of samples whose activations are computed at
+             once
+        """
         if isinstance(dataset, SupervisedDataSet):
             self.datasetfield = 'input'
         elif isinstance(dataset, UnsupervisedDataSet):
@@ -46,6 +70,55 @@ class DeepBeliefTrainer(Trainer):
         self.epochs = epochs
         self.cfg = cfg
         self.trainerKlass = self.trainers[distribution]
+        self.cachedir = cachedir
+        self.chunksize = chunksize
+
+        self.rbms = list(self.iterRbms())
+        # the data of every layer, with the parameters of the rbm below and
+        # the version of its data they were computed from
+        samples = len(dataset.getField(self.datasetfield))
+        self._layerdata = [dataset.getField(self.datasetfield)]
+        self._layerdata += [self._allocate(index, samples, rbm.hiddenDim)
+                            for index, rbm in enumerate(self.rbms[:-1], 1)]
+        self._computedFrom = [None] * len(self.rbms)
+        self._versions = [0] * len(self.rbms)
+        self.rbmTrainers = []
+        for rbm, data in zip(self.rbms, self._layerdata):
+            layerset = UnsupervisedDataSet(rbm.visibleDim)
+            layerset.setField('sample', data)
+            self.rbmTrainers.append(self.trainerKlass(rbm, layerset, self.cfg))
+
+    def _allocate(self, index, samples, dim):
+        """Return a memory-mapped array for the activations of layer `index`."""
+        if self.cachedir is None:
+            return memmap(TemporaryFile(), dtype=float, mode='w+',
+                          shape=(samples, dim))
+        filename = os.path.join(self.cachedir, 'layer%d.npy' % index)
+        return open_memmap(filename, mode='w+', dtype=float,
+                           shape=(samples, dim))
+
+    def layerData(self, index):
+        """Return the samples the rbm `index` is trained on: the dataset for
+        the first rbm, and the hidden activations of the rbm below for the
+        others. They are computed again if the parameters of any rbm below
+        have changed since."""
+        data = self._layerdata[index]
+        if index == 0:
+            return data
+        below = self.layerData(index - 1)
+        rbm = self.rbms[index - 1]
+        params = concatenate([rbm.params, rbm.biasParams])
+        computedFrom = self._computedFrom[index]
+        if (computedFrom is None
+                or computedFrom[1] != self._versions[index - 1]
+                or not array_equal(computedFrom[0], params)):
+            trainer = self.rbmTrainers[index - 1]
+            for start in range(0, len(data), self.chunksize):
+                stop = start + self.chunksize
+                data[start:stop] = trainer.hiddenProbabilities(below[start:stop])
+            self._computedFrom[index] = params, self._versions[index - 1]
+            self._versions[index] += 1
+        return data
 
     def trainRbm(self, rbm, dataset):
         trainer = self.trainerKlass(rbm, dataset, self.cfg)
@@ -71,46 +144,12 @@ class DeepBeliefTrainer(Trainer):
             yield rbm
 
     def train(self):
-        # We will build up a network piecewise in order to create a new dataset
-        # for each layer.
-        dataset = self.dataset
-        piecenet = FeedForwardNetwork()
-        piecenet.addInputModule(copy.deepcopy(self.net.inmodules[0]))
-        # Add a bias
-        bias = BiasUnit()
-        piecenet.addModule(bias)
-        # Add the first visible layer
-        firstRbm = next(self.iterRbms())
-        visible = copy.deepcopy(firstRbm.visible)
-        piecenet.addModule(visible)
-        # For saving the rbms and their inverses
-        self.invRbms = []
-        self.rbms = []
-        for rbm in self.iterRbms():
+        for index, trainer in enumerate(self.rbmTrainers):
             self.net.sortModules()
-            # Train the first layer with an rbm trainer for `epoch` epochs.
-            trainer = self.trainerKlass(rbm, dataset, self.cfg)
+            # bring the data of the layer up to date
+            self.layerData(index)
+            # Train the layer with an rbm trainer for `epoch` epochs.
             for _ in range(self.epochs):
                 trainer.train()
-            self.invRbms.append(trainer.invRbm)
-            self.rbms.append(rbm)
-            # Add the connections and the hidden layer of the rbm to the net.
-            hidden = copy.deepcopy(rbm.hidden)
-            biascon = FullConnection(bias, hidden)
-            biascon.params[:] = rbm.biasWeights
-            con = FullConnection(visible, hidden)
-            con.params[:] = rbm.weights
-
-            piecenet.addConnection(biascon)
-            piecenet.addConnection(con)
-            piecenet.addModule(hidden)
-            # Overwrite old outputs
-            piecenet.outmodules = [hidden]
-            piecenet.outdim = rbm.hiddenDim
-            piecenet.sortModules()
-
-            dataset = UnsupervisedDataSet(rbm.hiddenDim)
-            for sample, in self.dataset:
-                new_sample = piecenet.activate(sample)
-                dataset.addSample(new_sample)
-            visible = hidden
+        # For saving the rbms and their inverses
+        self.invRbms = [trainer.invRbm for trainer in self.rbmTrainers]
@@ -2,10 +2,12 @@ __author__ = ('Christian Osendorfer, osendorf@in.tum.de;'
               'Justin S Bayer, bayerj@in.tum.de'
               'SUN Yi, yi@idsia.ch')
 
-from scipy import random, outer, zeros, ones
+from scipy import random, dot, zeros, ones
 
 from pybrain.datasets import SupervisedDataSet, UnsupervisedDataSet
+from pybrain.structure.networks.rbm import Rbm
 from pybrain.supervised.trainers import Trainer
+from pybrain.tools.functions import sigmoid
 from pybrain.utilities import abstractMethod
 
 
@@ -28,13 +30,22 @@ class RbmGibbsTrainerConfig:
 
         self.visibleDistribution = 'bernoulli'
 
+        self.cdSteps = 1		# Gibbs steps of the negative phase (the k of CD-k)
+        self.persistent = False	# keep the Gibbs chains between updates (PCD)
+
 
 class RbmGibbsTrainer(Trainer):
-    """Class for training rbms with contrastive divergence."""
+    """Class for training rbms with contrastive divergence.
+
+    The trainer works directly on the weight matrix and the hidden biases of
+    the rbm, which are views on the parameters of its network, and keeps the
+    visible biases itself. The updates are computed for whole batches of
+    samples at once, by CD-k or, if cfg.persistent is set, by persistent
+    contrastive divergence (Tieleman, 2008), whose Gibbs chains carry over
+    from one update to the next."""
 
     def __init__(self, rbm, dataset, cfg=None):
         self.rbm = rbm
-        self.invRbm = rbm.invert()
         self.dataset = dataset
         self.cfg = RbmGibbsTrainerConfig() if cfg is None else cfg
 
@@ -43,134 +54,128 @@ class RbmGibbsTrainer(Trainer):
         elif isinstance(self.dataset, UnsupervisedDataSet):
             self.datasetField = 'sample'
 
+        # weights of the connection from the visible to the hidden layer
+        self.weights = rbm.params.reshape(rbm.hiddenDim, rbm.visibleDim)
+        self.hidBias = rbm.biasParams
+        self.visBias = zeros(rbm.visibleDim)
+        self._uw = zeros(self.weights.shape)
+        self._uhb = zeros(rbm.hiddenDim)
+        self._uvb = zeros(rbm.visibleDim)
+        # states of the visible units of the persistent chains
+        self.chains = None
+
+    @property
+    def invRbm(self):
+        """The inverse rbm, from the hidden to the visible layer, with the
+        current weights and visible biases."""
+        return Rbm.fromDims(self.rbm.hiddenDim, self.rbm.visibleDim,
+                            params=self.weights.T.flatten(),
+                            biasParams=self.visBias)
+
     def train(self):
-        self.trainOnDataset(self.dataset)
+        """Train on the dataset for one epoch and return the mean squared
+        reconstruction error."""
+        return self.trainOnDataset(self.dataset)
 
     def trainOnDataset(self, dataset):
         """This function trains the RBM using the same algorithm and
         implementation presented in:
-        http://www.cs.toronto.edu/~hinton/MatlabForSciencePaper.html"""
+        http://www.cs.toronto.edu/~hinton/MatlabForSciencePaper.html
+
+        The samples are shuffled, and every batch of them is trained on for
+        cfg.maxIter iterations. Returns the mean squared reconstruction
+        error of the last iteration on each batch."""
         cfg = self.cfg
-        for rows in dataset.randomBatches(self.datasetField, cfg.batchSize):
-            olduw, olduhb, olduvb = \
-                zeros((self.rbm.visibleDim, self.rbm.hiddenDim)), \
-                zeros(self.rbm.hiddenDim), zeros(self.rbm.visibleDim)
+        data = dataset.getField(self.datasetField)
+        order = random.permutation(len(data))
+        error = 0.
+        for start in range(0, len(data), cfg.batchSize):
+            rows = data[order[start:start + cfg.batchSize]]
+            self._uw[:] = 0
+            self._uhb[:] = 0
+            self._uvb[:] = 0
 
             for t in range(cfg.maxIter):
-                #print("*** Iteration %2d **************************************" % t)
-
-                params = self.rbm.params
-                params = params.reshape((self.rbm.visibleDim, self.rbm.hiddenDim))
-                biasParams = self.rbm.biasParams
-
                 mm = cfg.iniMm if t < cfg.mmSwitchIter else cfg.finMm
 
                 w, hb, vb = self.calcUpdateByRows(rows)
 
-                #print("Delta: ")
-                #print("Weight: ",)
-                #print(w)
-                #print("Visible bias: ",)
-                #print(vb)
-                #print("Hidden bias: ",)
-                #print(hb)
-                #print("")
-
-                olduw = uw = olduw * mm + \
-                	cfg.rWeights * (w - cfg.weightCost * params)
-                olduhb = uhb = olduhb * mm + cfg.rHidBias * hb
-                olduvb = uvb = olduvb * mm + cfg.rVisBias * vb
-
-                #print("Delta after momentum: ")
-                #print("Weight: ",)
-                #print(uw)
-                #print("Visible bias: ",)
-                #print(uvb)
-                #print("Hidden bias: ",)
-                #print(uhb)
-                #print("")
-
-                # update the parameters of the original rbm
-                params += uw
-                biasParams += uhb
-
-                # Create a new inverted rbm with correct parameters
-                invBiasParams = self.invRbm.biasParams
-                invBiasParams += uvb
-                self.invRbm = self.rbm.invert()
-                self.invRbm.biasParams[:] = invBiasParams
-
-                #print("Updated ")
-                #print("Weight: ",)
-                #print(self.rbm.connections[self.rbm['visible']][0].params.reshape( \)
-                #    (self.rbm.indim, self.rbm.outdim))
-                #print("Visible bias: ",)
-                #print(self.invRbm.connections[self.invRbm['bias']][0].params)
-                #print("Hidden bias: ",)
-                #print(self.rbm.connections[self.rbm['bias']][0].params)
-                #print("")
+                # momentum, weight decay and the update of the parameters,
+                # all in place
+                self._uw *= mm
+                self._uw += cfg.rWeights * (w - cfg.weightCost * self.weights)
+                self._uhb *= mm
+                self._uhb += cfg.rHidBias * hb
+                self._uvb *= mm
+                self._uvb += cfg.rVisBias * vb
+                self.weights += self._uw
+                self.hidBias += self._uhb
+                self.visBias += self._uvb
+            error += self._reconstructionError
+        return error / (len(data) * self.rbm.visibleDim)
+
+    def hiddenProbabilities(self, rows):
+        """Return the probabilities of the hidden units to be on, given the
+        states of the visible units as the rows of an array."""
+        return sigmoid(dot(rows, self.weights.T) + self.hidBias)
 
     def calcUpdateByRow(self, row):
         """This function trains the RBM using only one data row.
         Return a 3-tuple consiting of updates for (weightmatrix,
         hidden bias weights, visible bias weights)."""
+        return self.calcUpdateByRows(row.reshape(1, -1))
 
-        # a) positive phase
-        poshp = self.rbm.activate(row)	# compute the posterior probability
-        pos = outer(row, poshp)       	# fraction from the positive phase
-        poshb = poshp
-        posvb = row
+    def calcUpdateByRows(self, rows):
+        """Return a 3-tuple constisting of update for (weightmatrix,
+        hidden bias weights, visible bias weights), averaged over the rows.
+        The weight matrix has one row per hidden unit, like the parameters
+        of the rbm's connection."""
+        cfg = self.cfg
 
-        # b) the sampling & reconstruction
-        sampled = self.sampler(poshp)
-        recon = self.invRbm.activate(sampled)	# the re-construction of data
+        # a) positive phase
+        poshp = self.hiddenProbabilities(rows)
+        recon = self.reconstruct(self.sampler(poshp))
+        self._reconstructionError = ((rows - recon) ** 2).sum()
+
+        # b) the sampling & reconstruction, starting from the data or
+        # from the persistent chains
+        if cfg.persistent:
+            if self.chains is None:
+                self.chains = rows.copy()
+            recon = self.reconstruct(self.sampler(self.hiddenProbabilities(self.chains)))
+        for _ in range(cfg.cdSteps - 1):
+            recon = self.reconstruct(self.sampler(self.hiddenProbabilities(recon)))
+        if cfg.persistent:
+            self.chains = recon
 
         # c) negative phase
-        neghp = self.rbm.activate(recon)
-        neg = outer(recon, neghp)
-        neghb = neghp
-        negvb = recon
+        neghp = self.hiddenProbabilities(recon)
 
         # compute the raw delta
         # !!! note that this delta is only the 'theoretical' delta
-        return self.updater(pos, neg, poshb, neghb, posvb, negvb)
+        pos = dot(poshp.T, rows) / len(rows)
+        neg = dot(neghp.T, recon) / len(recon)
+        return self.updater(pos, neg, poshp.mean(axis=0), neghp.mean(axis=0),
+                            rows.mean(axis=0), recon.mean(axis=0))
 
     def sampler(self, probabilities):
-        abstractMethod()
+        """Return binary states of the hidden units, drawn with the given
+        probabilities."""
+        return (probabilities > random.rand(*probabilities.shape)).astype(float)
 
-    def updater(self, pos, neg, poshb, neghb, posvb, negvb):
+    def reconstruct(self, hidden):
+        """Return the reconstructed states of the visible units, given the
+        states of the hidden units as rows."""
         abstractMethod()
 
-    def calcUpdateByRows(self, rows):
-        """Return a 3-tuple constisting of update for (weightmatrix,
-        hidden bias weights, visible bias weights)."""
-
-        delta_w, delta_hb, delta_vb = \
-            zeros((self.rbm.visibleDim, self.rbm.hiddenDim)), \
-            zeros(self.rbm.hiddenDim), zeros(self.rbm.visibleDim)
-
-        for row in rows:
-            dw, dhb, dvb = self.calcUpdateByRow(row)
-            delta_w += dw
-            delta_hb += dhb
-            delta_vb += dvb
-
-        delta_w /= len(rows)
-        delta_hb /= len(rows)
-        delta_vb /= len(rows)
-
-        # !!! note that this delta is only the 'theoretical' delta
-        return delta_w, delta_hb, delta_vb
+    def updater(self, pos, neg, poshb, neghb, posvb, negvb):
+        return pos - neg, poshb - neghb, posvb - negvb
 
 
 class RbmBernoulliTrainer(RbmGibbsTrainer):
 
-    def sampler(self, probabilities):
-        result = probabilities > random.rand(self.rbm.hiddenDim)
-        return result.astype('int32')
-
-    def updater(self, pos, neg, poshb, neghb, posvb, negvb):
-        return pos - neg, poshb - neghb, posvb - negvb
+    def reconstruct(self, hidden):
+        return sigmoid(dot(hidden, self.weights) + self.visBias)
 
 
 class RbmGaussTrainer(RbmGibbsTrainer):
@@ -179,14 +184,13 @@ class RbmGaussTrainer(RbmGibbsTrainer):
         super(RbmGaussTrainer, self).__init__(rbm, dataset, cfg)
         #samples = self.dataset[self.datasetField]
         # self.visibleVariances = samples.var(axis=0)
-        self.visibleVariances = ones(rbm.net.outdim)
+        self.visibleVariances = ones(rbm.visibleDim)
 
-    def sampler(self, probabilities):
-        return random.normal(probabilities, self.visibleVariances)
+    def reconstruct(self, hidden):
+        # the means of the visible units
+        return dot(hidden, self.weights) * self.visibleVariances + self.visBias
 
     def updater(self, pos, neg, poshb, neghb, posvb, negvb):
         pos = pos / self.visibleVariances
+        neg = neg / self.visibleVariances
         return pos - neg, poshb - neghb, posvb - negvb
-
-
-